@@ -0,0 +1,59 @@
+"""Compare compiled record converters with a per-field callable loop.
+
+Usage: python benchmarks/converters.py [rows]
+"""
+
+import sys
+from timeit import timeit
+
+from postpy.base import Column, PrimaryKey, Table
+from postpy.converters import converter
+from postpy.data_types import text_parser
+
+
+def make_table():
+    columns = [Column('id', 'INTEGER', nullable=False),
+               Column('name', 'VARCHAR(50)', nullable=False),
+               Column('price', 'NUMERIC(10, 2)', nullable=True),
+               Column('weight', 'DOUBLE PRECISION', nullable=True),
+               Column('listed', 'DATE', nullable=True),
+               Column('active', 'BOOLEAN', nullable=True)]
+
+    return Table('benchmark', columns, PrimaryKey(['id']))
+
+
+def make_rows(count):
+    return [(str(i), 'item {}'.format(i), '{}.99'.format(i % 1000),
+             '' if i % 7 else '1.5', '2017-{:02d}-15'.format(i % 12 + 1), 't')
+            for i in range(count)]
+
+
+def field_loop(table, null_str=''):
+    parsers = [text_parser(column.data_type) for column in table.columns]
+
+    def convert(row):
+        return tuple(None if value == null_str else parse(value)
+                     for value, parse in zip(row, parsers))
+
+    return convert
+
+
+def main(count=100000):
+    table = make_table()
+    rows = make_rows(count)
+    loop = field_loop(table)
+    compiled = converter(table)
+
+    assert [loop(row) for row in rows[:100]] == [compiled(row) for row in rows[:100]]
+
+    loop_time = timeit(lambda: [loop(row) for row in rows], number=3) / 3
+    compiled_time = timeit(lambda: [compiled(row) for row in rows], number=3) / 3
+
+    print('rows:          {:d}'.format(count))
+    print('field loop:    {:.3f}s'.format(loop_time))
+    print('compiled:      {:.3f}s'.format(compiled_time))
+    print('speedup:       {:.1f}x'.format(loop_time / compiled_time))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
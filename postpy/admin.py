@@ -2,11 +2,16 @@
 Database administration queries
 """
 
+import re
+from collections import defaultdict, namedtuple
+
 import psycopg2
 
-from postpy.base import Table, Column, Database, PrimaryKey
+from postpy.base import Table, Column, Database, PrimaryKey, Index
 from postpy.ddl import compile_qualified_name
-from postpy.extensions import install_extension
+from postpy.dml import CopyFromDelete, CopyFromUpsert
+from postpy.extensions import check_extension, install_extension
+from postpy.instrumentation import execute
 from postpy.sql import select_dict
 
 
@@ -15,12 +20,312 @@ def get_user_tables(conn):
 
     query_string = "select schemaname, relname from pg_stat_user_tables;"
     with conn.cursor() as cursor:
-        cursor.execute(query_string)
+        execute(cursor, query_string)
         tables = cursor.fetchall()
 
     return tables
 
 
+def get_table_health(conn, schema=None, tables=None):
+    """Returns maintenance statistics of user tables.
+
+    Extends the tables of get_user_tables with dead tuple and HOT update
+    ratios, latest manual or automatic vacuum and analyze times, and
+    estimated bloat. Bloat is the table size beyond what its live rows
+    need, estimated from pg_stats column widths and therefore NULL for
+    tables never analyzed.
+
+    Notes
+    -----
+    Statistics are reported by backends asynchronously and may lag the
+    latest loads by about a second.
+
+    Parameters
+    ----------
+    conn : database connection.
+    schema : only tables of this schema.
+    tables : only these qualified table names, none when empty.
+    """
+
+    if tables is not None:
+        tables = list(tables)
+        if not tables:
+            return
+
+    query = """\
+WITH widths AS (
+  SELECT schemaname, tablename, sum(avg_width) AS row_width
+  FROM pg_catalog.pg_stats
+  GROUP BY schemaname, tablename
+)
+SELECT
+  s.schemaname AS schema,
+  s.relname AS table_name,
+  s.n_live_tup AS live_tuples,
+  s.n_dead_tup AS dead_tuples,
+  s.n_dead_tup::float8 / nullif(s.n_live_tup + s.n_dead_tup, 0) AS dead_ratio,
+  s.n_mod_since_analyze AS modified_since_analyze,
+  greatest(s.last_vacuum, s.last_autovacuum) AS last_vacuum,
+  greatest(s.last_analyze, s.last_autoanalyze) AS last_analyze,
+  s.n_tup_hot_upd::float8 / nullif(s.n_tup_upd, 0) AS hot_update_ratio,
+  pg_relation_size(s.relid) AS table_bytes,
+  CASE WHEN w.row_width IS NOT NULL THEN greatest(
+    pg_relation_size(s.relid) - ceil(
+      greatest(c.reltuples, 0) * (w.row_width + 28)
+      / (current_setting('block_size')::int - 24)
+    ) * current_setting('block_size')::int, 0)::bigint
+  END AS estimated_bloat_bytes
+FROM pg_catalog.pg_stat_user_tables AS s
+  JOIN pg_catalog.pg_class AS c ON c.oid = s.relid
+  LEFT JOIN widths AS w
+    ON w.schemaname = s.schemaname AND w.tablename = s.relname
+WHERE (%(schema)s IS NULL OR s.schemaname = %(schema)s)
+  AND (%(tables)s IS NULL OR s.relid = ANY (%(tables)s::regclass[]))
+ORDER BY s.schemaname, s.relname"""
+
+    params = {'schema': schema, 'tables': tables}
+
+    for record in select_dict(conn, query, params=params):
+        yield record
+
+
+class VacuumAdvice(namedtuple('VacuumAdvice', 'qualified_name reasons vacuum')):
+    """Maintenance recommended for a table.
+
+    Attributes
+    ----------
+    qualified_name : qualified table name.
+    reasons : thresholds the table crossed.
+    vacuum : whether dead tuples or bloat call for VACUUM, otherwise
+        only ANALYZE is recommended.
+    """
+
+    __slots__ = ()
+
+    @property
+    def statement(self) -> str:
+        if self.vacuum:
+            return 'VACUUM (ANALYZE) {};'.format(self.qualified_name)
+
+        return 'ANALYZE {};'.format(self.qualified_name)
+
+
+def recommend_vacuum(conn, schema=None, tables=None, dead_ratio=0.1,
+                     min_dead_tuples=1000, bloat_ratio=0.3, modified_ratio=0.1):
+    """Recommend VACUUM (ANALYZE) or ANALYZE for tables crossing thresholds.
+
+    Parameters
+    ----------
+    conn : database connection.
+    schema : only tables of this schema.
+    tables : only these qualified table names, i.e. the tables just loaded.
+        An empty collection selects no tables.
+    dead_ratio : dead tuple fraction calling for a vacuum.
+    min_dead_tuples : dead tuples needed before dead_ratio applies.
+    bloat_ratio : estimated bloat fraction of the table size calling for
+        a vacuum.
+    modified_ratio : fraction of rows modified since the last analyze
+        calling for an analyze.
+    """
+
+    advice = []
+
+    for record in get_table_health(conn, schema=schema, tables=tables):
+        reasons = []
+        live_tuples = record['live_tuples']
+        bloat = record['estimated_bloat_bytes']
+
+        many_dead = record['dead_tuples'] >= min_dead_tuples
+
+        if many_dead and (record['dead_ratio'] or 0) >= dead_ratio:
+            reasons.append('dead tuples {:.0%}'.format(record['dead_ratio']))
+
+        if bloat and bloat >= bloat_ratio * record['table_bytes']:
+            reasons.append('estimated bloat {:.0%}'.format(
+                bloat / record['table_bytes']))
+
+        vacuum = bool(reasons)
+
+        if record['last_analyze'] is None and live_tuples:
+            reasons.append('never analyzed')
+        elif record['modified_since_analyze'] > modified_ratio * live_tuples:
+            reasons.append('modified {:,d} rows since analyze'.format(
+                record['modified_since_analyze']))
+
+        if reasons:
+            qualified_name = compile_qualified_name(record['table_name'],
+                                                    schema=record['schema'])
+            advice.append(VacuumAdvice(qualified_name, reasons, vacuum))
+
+    return advice
+
+
+def vacuum_tables(conn, schema=None, tables=None, **thresholds):
+    """Run the maintenance recommend_vacuum advises, returning the advice.
+
+    VACUUM cannot run in a transaction block, so the connection is
+    switched to autocommit for the duration and any open transaction
+    committed first.
+    """
+
+    advice = recommend_vacuum(conn, schema=schema, tables=tables, **thresholds)
+    autocommit = conn.autocommit
+
+    if not autocommit:
+        conn.commit()
+        conn.autocommit = True
+
+    try:
+        with conn.cursor() as cursor:
+            for table_advice in advice:
+                execute(cursor, table_advice.statement)
+    finally:
+        conn.autocommit = autocommit
+
+    return advice
+
+
+STATEMENT_ORDERS = ('total_time', 'mean_time', 'rows', 'shared_blks_read', 'calls')
+
+_STAGING_TABLE = re.compile(r'\b(?:{})_\d+_(\w+)'.format(
+    '|'.join([CopyFromUpsert.TEMP_PREFIX, CopyFromDelete.TEMP_PREFIX])))
+_STATEMENT_SHAPES = [
+    ('copy staging', re.compile(r'^\s*(?:COPY|CREATE TEMPORARY TABLE|DROP TABLE)\b',
+                                re.IGNORECASE), _STAGING_TABLE),
+    ('upsert', re.compile(r'^\s*INSERT INTO (\S+)[^;]*\bON CONFLICT\b',
+                          re.IGNORECASE | re.DOTALL), None),
+    ('delete using', re.compile(r'^\s*DELETE FROM (\S+)[^;]*\bUSING\b',
+                                re.IGNORECASE | re.DOTALL), None),
+    ('copy', re.compile(r'^\s*COPY (\S+) FROM STDIN\b', re.IGNORECASE), None),
+    ('insert', re.compile(r'^\s*INSERT INTO (\S+)[^;]*\bVALUES\b',
+                          re.IGNORECASE | re.DOTALL), None),
+    ('insert select', re.compile(r'^\s*INSERT INTO (\S+)[^;]*\bSELECT\b',
+                                 re.IGNORECASE | re.DOTALL), None),
+    ('refresh', re.compile(r'^\s*REFRESH MATERIALIZED VIEW (?:CONCURRENTLY )?(\S+)',
+                           re.IGNORECASE), None),
+]
+
+
+class StatementShape(namedtuple('StatementShape', 'shape table_name')):
+    """Kind of postpy statement a query was generated as.
+
+    Attributes
+    ----------
+    shape : statement shape, i.e. 'upsert', 'copy staging' or
+        'delete using', 'other' when unrecognized.
+    table_name : table the statement loads, or None.
+    """
+
+    __slots__ = ()
+
+
+def classify_statement(query: str) -> StatementShape:
+    """Match a query to the postpy statement shape generating it.
+
+    Staging statements of CopyFromUpsert and CopyFromDelete are
+    attributed to the loaded table through the staging table name.
+    """
+
+    for shape, pattern, table_pattern in _STATEMENT_SHAPES:
+        match = pattern.match(query)
+
+        if match is None:
+            continue
+
+        if table_pattern is None:
+            return StatementShape(shape, match.group(1))
+
+        table_match = table_pattern.search(query)
+
+        if table_match is not None:
+            return StatementShape(shape, table_match.group(1))
+
+    return StatementShape('other', None)
+
+
+def get_top_statements(conn, order_by='total_time', limit=20) -> list:
+    """Returns the costliest statements recorded by pg_stat_statements.
+
+    Times are in milliseconds, taken from the execution times of
+    Postgres 13 and later. Each record carries the postpy statement
+    shape and table of the query.
+
+    Parameters
+    ----------
+    conn : database connection.
+    order_by : one of total_time, mean_time, rows, shared_blks_read or
+        calls, in descending order.
+    limit : number of statements.
+    """
+
+    if order_by not in STATEMENT_ORDERS:
+        raise ValueError('Unknown statement order {}'.format(order_by))
+
+    if not check_extension(conn, 'pg_stat_statements'):
+        raise psycopg2.ProgrammingError(
+            'Postgres extension is not installed.', 'pg_stat_statements')
+
+    time_suffix = '_exec_time' if conn.server_version >= 130000 else '_time'
+    query = """\
+SELECT
+  query,
+  calls,
+  total{suffix} AS total_time,
+  mean{suffix} AS mean_time,
+  rows,
+  shared_blks_read,
+  shared_blks_hit
+FROM pg_stat_statements
+WHERE dbid = (SELECT oid FROM pg_catalog.pg_database
+              WHERE datname = current_database())
+ORDER BY {order} DESC
+LIMIT %(limit)s""".format(suffix=time_suffix, order=order_by)
+
+    records = list(select_dict(conn, query, params={'limit': limit}))
+
+    for record in records:
+        record['shape'], record['table_name'] = classify_statement(record['query'])
+
+    return records
+
+
+def summarize_statement_shapes(statements) -> list:
+    """Total statement costs by statement shape and table.
+
+    Parameters
+    ----------
+    statements : records of get_top_statements.
+
+    Returns
+    -------
+    Records of shape, table_name, calls, total_time, rows and
+    shared_blks_read, costliest total time first.
+    """
+
+    totals = {}
+
+    for statement in statements:
+        key = statement['shape'], statement['table_name']
+        total = totals.setdefault(key, {'shape': key[0], 'table_name': key[1],
+                                        'calls': 0, 'total_time': 0.,
+                                        'rows': 0, 'shared_blks_read': 0})
+
+        for name in ('calls', 'total_time', 'rows', 'shared_blks_read'):
+            total[name] += statement[name]
+
+    return sorted(totals.values(), key=lambda total: -total['total_time'])
+
+
+def table_exists(conn, table: str, schema='public') -> bool:
+    """Check whether a table exists."""
+
+    query = 'SELECT to_regclass(%s) IS NOT NULL AS table_exists;'
+    qualified_name = compile_qualified_name(table, schema=schema)
+    records = list(select_dict(conn, query, params=(qualified_name,)))
+
+    return records[0]['table_exists']
+
+
 def get_primary_keys(conn, table: str, schema='public'):
     """Returns primary key columns for a specific table."""
 
@@ -62,6 +367,263 @@ ORDER BY attnum;"""
         yield record
 
 
+def get_index_definitions(conn, table: str, schema='public'):
+    """Returns index definitions of a table and any constraint they back.
+
+    Constraint type follows pg_constraint.contype, i.e. 'p' for
+    primary keys, 'u' for unique and 'x' for exclusion constraints.
+    """
+
+    query = """\
+SELECT
+  i.indexname AS index_name,
+  i.indexdef AS index_definition,
+  c.conname AS constraint_name,
+  c.contype AS constraint_type,
+  pg_get_constraintdef(c.oid) AS constraint_definition
+FROM pg_catalog.pg_indexes AS i
+  LEFT JOIN pg_catalog.pg_constraint AS c
+    ON c.conindid = (quote_ident(i.schemaname) || '.'
+                     || quote_ident(i.indexname))::regclass
+   AND c.contype IN ('p', 'u', 'x')
+WHERE i.schemaname=%s
+  AND i.tablename=%s
+ORDER BY c.contype NULLS LAST, i.indexname"""
+
+    for record in select_dict(conn, query, params=(schema, table)):
+        yield record
+
+
+def reflect_indexes(conn, table: str, schema='public'):
+    """Reflect a table's indexes as Index objects.
+
+    Key columns keep a non-default collation or operator class and their
+    sort order, i.e. ``name COLLATE "C" text_pattern_ops DESC NULLS LAST``.
+    """
+
+    query = """\
+SELECT
+  ic.relname AS name,
+  am.amname AS method,
+  ix.indisunique AS unique,
+  ix.indnkeyatts AS key_count,
+  ARRAY(
+    SELECT CASE WHEN ix.indkey[k - 1] = 0 AND key.options <> ''
+             THEN '(' || key.definition || ')'
+             ELSE key.definition END || key.options
+    FROM generate_series(1, ix.indnatts) AS k
+      LEFT JOIN pg_catalog.pg_collation AS coll
+        ON coll.oid = ix.indcollation[k - 1] AND k <= ix.indnkeyatts
+      LEFT JOIN pg_catalog.pg_opclass AS opc
+        ON opc.oid = ix.indclass[k - 1] AND k <= ix.indnkeyatts,
+      LATERAL (SELECT
+        pg_get_indexdef(ix.indexrelid, k, true) AS definition,
+        CASE WHEN coll.collname IS NULL OR coll.collname = 'default' THEN ''
+          WHEN pg_collation_is_visible(coll.oid)
+          THEN ' COLLATE ' || quote_ident(coll.collname)
+          ELSE ' COLLATE ' || coll.collnamespace::regnamespace::text
+            || '.' || quote_ident(coll.collname) END
+        || CASE WHEN coalesce(opc.opcdefault, true) THEN ''
+          WHEN pg_opclass_is_visible(opc.oid) THEN ' ' || quote_ident(opc.opcname)
+          ELSE ' ' || opc.opcnamespace::regnamespace::text
+            || '.' || quote_ident(opc.opcname) END
+        || CASE ix.indoption[k - 1] & 3
+          WHEN 1 THEN ' DESC NULLS LAST'
+          WHEN 2 THEN ' NULLS FIRST'
+          WHEN 3 THEN ' DESC'
+          ELSE '' END AS options
+      ) AS key
+    ORDER BY k
+  ) AS columns,
+  pg_get_expr(ix.indpred, ix.indrelid, true) AS predicate,
+  ic.reloptions AS storage_parameters
+FROM pg_catalog.pg_index AS ix
+  JOIN pg_catalog.pg_class AS ic ON ic.oid = ix.indexrelid
+  JOIN pg_catalog.pg_class AS tc ON tc.oid = ix.indrelid
+  JOIN pg_catalog.pg_namespace AS n ON n.oid = tc.relnamespace
+  JOIN pg_catalog.pg_am AS am ON am.oid = ic.relam
+WHERE n.nspname=%s
+  AND tc.relname=%s
+ORDER BY ic.relname"""
+
+    for record in select_dict(conn, query, params=(schema, table)):
+        key_count = record['key_count']
+        storage_parameters = dict(option.split('=', 1) for option
+                                  in record['storage_parameters'] or ())
+
+        yield Index(record['name'], table, record['columns'][:key_count],
+                    method=record['method'], unique=record['unique'],
+                    include=record['columns'][key_count:],
+                    where=record['predicate'] or '',
+                    storage_parameters=storage_parameters, schema=schema)
+
+
+def get_dependent_views(conn, table: str, schema='public'):
+    """Returns views selecting directly from a table with their definitions.
+
+    Definitions are printed as of now, naming the table as currently
+    named, so recreating a view after the table is renamed and replaced
+    binds it to the replacement.
+    """
+
+    query = """\
+SELECT DISTINCT
+  quote_ident(n.nspname) || '.' || quote_ident(v.relname) AS name,
+  pg_get_viewdef(v.oid) AS definition
+FROM pg_catalog.pg_depend AS d
+  JOIN pg_catalog.pg_rewrite AS r ON r.oid = d.objid
+  JOIN pg_catalog.pg_class AS v ON v.oid = r.ev_class
+  JOIN pg_catalog.pg_namespace AS n ON n.oid = v.relnamespace
+WHERE d.classid = 'pg_catalog.pg_rewrite'::regclass
+  AND d.refclassid = 'pg_catalog.pg_class'::regclass
+  AND d.refobjid = %s::regclass
+  AND v.oid <> d.refobjid
+  AND v.relkind = 'v'
+ORDER BY 1"""
+
+    qualified_name = compile_qualified_name(table, schema=schema)
+
+    for record in select_dict(conn, query, params=(qualified_name,)):
+        yield record
+
+
+def get_table_grants(conn, table: str, schema='public'):
+    """Returns privileges granted on a table to roles other than its owner.
+
+    Grantees are quoted role names or PUBLIC.
+    """
+
+    query = """\
+SELECT
+  CASE WHEN a.grantee = 0 THEN 'PUBLIC'
+       ELSE quote_ident(pg_get_userbyid(a.grantee)) END AS grantee,
+  a.privilege_type,
+  a.is_grantable
+FROM pg_catalog.pg_class AS c
+  CROSS JOIN LATERAL aclexplode(c.relacl) AS a
+WHERE c.oid = %s::regclass
+  AND a.grantee <> c.relowner
+ORDER BY 1, 2"""
+
+    qualified_name = compile_qualified_name(table, schema=schema)
+
+    for record in select_dict(conn, query, params=(qualified_name,)):
+        yield record
+
+
+def get_foreign_key_dependencies(conn, schema=None):
+    """Returns the tables each table references through foreign keys.
+
+    Self references are left out.
+
+    Returns
+    -------
+    Mapping of qualified table name to set of qualified table names.
+    """
+
+    query = """\
+SELECT DISTINCT
+  n.nspname || '.' || c.relname AS table_name,
+  rn.nspname || '.' || r.relname AS referenced_table
+FROM pg_catalog.pg_constraint AS k
+  JOIN pg_catalog.pg_class AS c ON c.oid = k.conrelid
+  JOIN pg_catalog.pg_namespace AS n ON n.oid = c.relnamespace
+  JOIN pg_catalog.pg_class AS r ON r.oid = k.confrelid
+  JOIN pg_catalog.pg_namespace AS rn ON rn.oid = r.relnamespace
+WHERE k.contype = 'f'
+  AND k.conrelid <> k.confrelid
+  AND (%(schema)s IS NULL OR n.nspname = %(schema)s)"""
+
+    dependencies = defaultdict(set)
+
+    for record in select_dict(conn, query, params={'schema': schema}):
+        dependencies[record['table_name']].add(record['referenced_table'])
+
+    return dict(dependencies)
+
+
+def get_materialized_views(conn, schema=None):
+    """Returns materialized views and whether they can refresh concurrently.
+
+    Concurrent refreshes need a populated view with a unique index on
+    plain columns without a WHERE clause.
+    """
+
+    query = """\
+SELECT
+  quote_ident(n.nspname) || '.' || quote_ident(c.relname) AS name,
+  c.relispopulated AS populated,
+  EXISTS (
+    SELECT 1
+    FROM pg_catalog.pg_index AS ix
+    WHERE ix.indrelid = c.oid
+      AND ix.indisunique
+      AND ix.indisvalid
+      AND ix.indpred IS NULL
+      AND NOT 0 = ANY (ix.indkey::int2[])
+  ) AS has_unique_index
+FROM pg_catalog.pg_class AS c
+  JOIN pg_catalog.pg_namespace AS n ON n.oid = c.relnamespace
+WHERE c.relkind = 'm'
+  AND (%(schema)s IS NULL OR n.nspname = %(schema)s)
+ORDER BY 1"""
+
+    for record in select_dict(conn, query, params={'schema': schema}):
+        yield record
+
+
+def get_view_dependencies(conn):
+    """Returns materialized view dependencies on other materialized views.
+
+    Dependencies through plain views are followed, so a materialized
+    view selecting from a view over another materialized view depends
+    on the latter.
+
+    Returns
+    -------
+    Mapping of qualified view name to set of qualified view names.
+    """
+
+    query = """\
+SELECT DISTINCT
+  quote_ident(dn.nspname) || '.' || quote_ident(dependent.relname) AS dependent,
+  dependent.relkind AS dependent_kind,
+  quote_ident(sn.nspname) || '.' || quote_ident(source.relname) AS source,
+  source.relkind AS source_kind
+FROM pg_catalog.pg_depend AS d
+  JOIN pg_catalog.pg_rewrite AS r ON r.oid = d.objid
+  JOIN pg_catalog.pg_class AS dependent ON dependent.oid = r.ev_class
+  JOIN pg_catalog.pg_namespace AS dn ON dn.oid = dependent.relnamespace
+  JOIN pg_catalog.pg_class AS source ON source.oid = d.refobjid
+  JOIN pg_catalog.pg_namespace AS sn ON sn.oid = source.relnamespace
+WHERE d.classid = 'pg_catalog.pg_rewrite'::regclass
+  AND d.refclassid = 'pg_catalog.pg_class'::regclass
+  AND dependent.oid <> source.oid
+  AND dependent.relkind IN ('m', 'v')
+  AND source.relkind IN ('m', 'v')"""
+
+    sources = defaultdict(set)
+    kinds = {}
+
+    for record in select_dict(conn, query):
+        sources[record['dependent']].add(record['source'])
+        kinds[record['dependent']] = record['dependent_kind']
+        kinds[record['source']] = record['source_kind']
+
+    def materialized_sources(name, seen):
+        for source in sources[name]:
+            if source in seen:
+                continue
+            seen.add(source)
+            if kinds[source] == 'm':
+                yield source
+            else:
+                yield from materialized_sources(source, seen)
+
+    return {name: set(materialized_sources(name, set()))
+            for name, kind in kinds.items() if kind == 'm'}
+
+
 def reflect_table(conn, table_name, schema='public'):
     """Reflect basic table attributes."""
 
@@ -82,8 +644,8 @@ def reset(db_name):
     conn.autocommit = True
 
     with conn.cursor() as cursor:
-        cursor.execute(db.drop_statement())
-        cursor.execute(db.create_statement())
+        execute(cursor, db.drop_statement())
+        execute(cursor, db.create_statement())
     conn.close()
 
 
@@ -1,23 +1,37 @@
+from bisect import bisect_right
 from collections import namedtuple
 
 from foil.formatters import format_repr
 
 from postpy.ddl import (
     compile_column, compile_qualified_name, compile_primary_key,
-    compile_create_table, compile_create_temporary_table
+    compile_create_table, compile_create_temporary_table,
+    compile_partition_by, compile_create_partition, compile_range_bound,
+    compile_list_bound, compile_hash_bound, compile_default_bound,
+    compile_create_index, compile_drop_index
 )
 
 
-__all__ = ('Database', 'Schema', 'Table', 'Column', 'PrimaryKey', 'View')
+__all__ = ('Database', 'Schema', 'Table', 'Column', 'PrimaryKey', 'View',
+           'Partitioning', 'RangePartition', 'ListPartition', 'HashPartition',
+           'DefaultPartition', 'Index')
+
+RANGE = 'RANGE'
+LIST = 'LIST'
+HASH = 'HASH'
 
 
 class Database:
-    __slots__ = 'name',
+    __slots__ = 'name', 'template'
 
-    def __init__(self, name):
+    def __init__(self, name, template=None):
         self.name = name
+        self.template = template
 
     def create_statement(self):
+        if self.template:
+            return 'CREATE DATABASE %s TEMPLATE %s;' % (self.name, self.template)
+
         return 'CREATE DATABASE %s;' % self.name
 
     def drop_statement(self):
@@ -43,20 +57,66 @@ class Schema:
         return format_repr(self, self.__slots__)
 
 
-class Table(namedtuple('Table', 'name columns primary_key schema')):
-    """Table statement formatter."""
+class Table(namedtuple('Table', 'name columns primary_key schema partitioning')):
+    """Table statement formatter.
+
+    Attributes
+    ----------
+    partitioning : optional Partitioning declaring the table as a
+        partitioned parent table.
+    """
 
     __slots__ = ()
 
-    def __new__(cls, name: str, columns, primary_key, schema='public'):
+    def __new__(cls, name: str, columns, primary_key, schema='public',
+                partitioning=None):
         return super(Table, cls).__new__(cls, name, columns,
                                          primary_key,
-                                         schema)
+                                         schema,
+                                         partitioning)
+
+    def create_statement(self, primary_key=True, unlogged=False):
+        """Create Table statement formatter.
+
+        Parameters
+        ----------
+        primary_key : include the inline primary key constraint.
+        unlogged : create as an unlogged table.
+        """
+
+        primary_key_statement = self.primary_key_statement if primary_key else ''
+        partition_statement = ''
+
+        if self.partitioning is not None:
+            partition_statement = self.partitioning.create_statement()
 
-    def create_statement(self):
         return compile_create_table(self.qualified_name,
                                     self.column_statement,
-                                    self.primary_key_statement)
+                                    primary_key_statement,
+                                    unlogged=unlogged,
+                                    partition_statement=partition_statement)
+
+    def create_partition_statements(self):
+        """Create Table statements for each declared partition."""
+
+        if self.partitioning is None:
+            return []
+
+        return [compile_create_partition(table.qualified_name,
+                                         self.qualified_name,
+                                         partition.bound_statement())
+                for partition, table in zip(self.partitioning.partitions,
+                                            self.partition_tables())]
+
+    def partition_tables(self):
+        """Leaf partitions as tables sharing the parent's columns."""
+
+        if self.partitioning is None:
+            return []
+
+        return [Table(partition.name, self.columns, self.primary_key,
+                      self.schema)
+                for partition in self.partitioning.partitions]
 
     def drop_statement(self):
         return 'DROP TABLE IF EXISTS {};'.format(self.qualified_name)
@@ -91,6 +151,12 @@ class Table(namedtuple('Table', 'name columns primary_key schema')):
     def primary_key_statement(self):
         return self.primary_key.create_statement()
 
+    @property
+    def primary_key_name(self):
+        """Postgres default primary key constraint name."""
+
+        return '{}_pkey'.format(self.name)
+
 
 class Column(namedtuple('Column', 'name data_type nullable')):
     __slots__ = ()
@@ -109,9 +175,240 @@ class PrimaryKey(namedtuple('PrimaryKey', ['column_names'])):
         return super(PrimaryKey, cls).__new__(cls, column_names)
 
     def create_statement(self):
+        """Primary key constraint, empty without key columns."""
+
+        if not self.column_names:
+            return ''
+
         return compile_primary_key(self.column_names)
 
 
+class Index(namedtuple('Index',
+                       'name table_name columns method unique include '
+                       'where storage_parameters schema')):
+    """Index statement formatter.
+
+    Attributes
+    ----------
+    name : index name.
+    table_name : indexed table name.
+    columns : key column names or expressions, optionally followed by a
+        collation, operator class and sort order.
+    method : access method, i.e. btree, brin, gin, gist or hash.
+    unique : unique index.
+    include : non-key columns stored in the index.
+    where : predicate of a partial index.
+    storage_parameters : mapping of storage parameters, i.e. fillfactor.
+    schema : schema of the table and index.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, name: str, table_name: str, columns, method='btree',
+                unique=False, include=(), where='', storage_parameters=None,
+                schema='public'):
+        return super(Index, cls).__new__(cls, name, table_name, list(columns),
+                                         method, unique, list(include), where,
+                                         dict(storage_parameters or {}), schema)
+
+    def create_statement(self, concurrently=False):
+        return compile_create_index(self.name, self.qualified_table_name,
+                                    self.columns, unique=self.unique,
+                                    method=self.method, include=self.include,
+                                    where=self.where,
+                                    storage_parameters=self.storage_parameters,
+                                    concurrently=concurrently)
+
+    def drop_statement(self, concurrently=False):
+        return compile_drop_index(self.qualified_name, concurrently=concurrently)
+
+    @property
+    def qualified_name(self):
+        return compile_qualified_name(self.name, schema=self.schema)
+
+    @property
+    def qualified_table_name(self):
+        return compile_qualified_name(self.table_name, schema=self.schema)
+
+
+class Partitioning(namedtuple('Partitioning', 'method column_names partitions')):
+    """Declarative partitioning of a table.
+
+    Attributes
+    ----------
+    method : RANGE, LIST or HASH.
+    column_names : partition key columns.
+    partitions : leaf partition declarations.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, method: str, column_names: list, partitions=()):
+        method = method.upper()
+
+        if method not in (RANGE, LIST, HASH):
+            raise ValueError('Unsupported partitioning method.', method)
+
+        return super(Partitioning, cls).__new__(cls, method, column_names,
+                                                tuple(partitions))
+
+    def create_statement(self):
+        return compile_partition_by(self.method, self.column_names)
+
+    def router(self):
+        """Callable mapping a partition key tuple to its partition name.
+
+        Keys outside every bound route to the default partition, or raise
+        KeyError without one.
+
+        Notes
+        -----
+        Hash partitioning depends on server side hash functions
+        and cannot be routed client side.
+        """
+
+        if self.method == HASH:
+            raise ValueError('Hash partitions cannot be routed client side.')
+
+        default_names = [partition.name for partition in self.partitions
+                         if isinstance(partition, DefaultPartition)]
+        default_name = default_names[0] if default_names else None
+
+        if self.method == LIST:
+            return _ListRouter(self.partitions, default_name)
+
+        return _RangeRouter(self.partitions, default_name)
+
+
+class RangePartition(namedtuple('RangePartition', 'name lower upper')):
+    """Partition holding keys from lower (inclusive) to upper (exclusive).
+
+    Bounds are tuples of key values, None for unbounded.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, name: str, lower, upper):
+        return super(RangePartition, cls).__new__(cls, name, _as_bound(lower),
+                                                  _as_bound(upper))
+
+    def bound_statement(self):
+        return compile_range_bound(self.lower, self.upper)
+
+
+class ListPartition(namedtuple('ListPartition', 'name values')):
+    __slots__ = ()
+
+    def bound_statement(self):
+        return compile_list_bound(self.values)
+
+
+class HashPartition(namedtuple('HashPartition', 'name modulus remainder')):
+    __slots__ = ()
+
+    def bound_statement(self):
+        return compile_hash_bound(self.modulus, self.remainder)
+
+
+class DefaultPartition(namedtuple('DefaultPartition', 'name')):
+    """Partition catching keys outside every other bound."""
+
+    __slots__ = ()
+
+    def bound_statement(self):
+        return compile_default_bound()
+
+
+def _as_bound(value):
+    if value is None or isinstance(value, tuple):
+        return value
+
+    return (value,)
+
+
+class _ListRouter:
+    def __init__(self, partitions, default_name):
+        self.default_name = default_name
+        self.names = {value: partition.name for partition in partitions
+                      if isinstance(partition, ListPartition)
+                      for value in partition.values}
+
+    def __call__(self, key):
+        return _route_default(self.names.get(key[0]), self.default_name, key)
+
+
+class _Unbounded:
+    """Bound value sorting below or above every key value."""
+
+    __slots__ = 'sign',
+
+    def __init__(self, sign):
+        self.sign = sign
+
+    def __lt__(self, other):
+        return self.sign < 0 and other is not self
+
+    def __le__(self, other):
+        return self.sign < 0 or other is self
+
+    def __gt__(self, other):
+        return self.sign > 0 and other is not self
+
+    def __ge__(self, other):
+        return self.sign > 0 or other is self
+
+
+_MINVALUE = _Unbounded(-1)
+_MAXVALUE = _Unbounded(1)
+
+
+def _unbounded_values(bound, unbounded):
+    if bound is None:
+        return bound
+
+    return tuple(unbounded if value is None else value for value in bound)
+
+
+class _RangeRouter:
+    def __init__(self, partitions, default_name):
+        self.default_name = default_name
+        ranges = [partition._replace(
+            lower=_unbounded_values(partition.lower, _MINVALUE),
+            upper=_unbounded_values(partition.upper, _MAXVALUE))
+            for partition in partitions if isinstance(partition, RangePartition)]
+        ranges.sort(key=lambda partition: (partition.lower is not None,
+                                           partition.lower or ()))
+        self.unbounded = None
+
+        if ranges and ranges[0].lower is None:
+            self.unbounded = ranges.pop(0)
+
+        self.lowers = [partition.lower for partition in ranges]
+        self.ranges = ranges
+
+    def __call__(self, key):
+        if None in key:
+            return _route_default(None, self.default_name, key)
+
+        position = bisect_right(self.lowers, key) - 1
+        candidate = self.ranges[position] if position >= 0 else self.unbounded
+        name = None
+
+        if candidate is not None and (candidate.upper is None or key < candidate.upper):
+            name = candidate.name
+
+        return _route_default(name, self.default_name, key)
+
+
+def _route_default(name, default_name, key):
+    if name is not None:
+        return name
+    if default_name is not None:
+        return default_name
+
+    raise KeyError('No partition for key.', key)
+
+
 class View:
     """Postgresql View statement formatter.
 
@@ -164,4 +461,5 @@ def order_table_columns(table: Table, column_names: list) -> Table:
                           if column in table.primary_key_columns]
     primary_key = PrimaryKey(ordered_pkey_names)
 
-    return Table(table.name, ordered_columns, primary_key, table.schema)
+    return Table(table.name, ordered_columns, primary_key, table.schema,
+                 table.partitioning)
@@ -0,0 +1,132 @@
+"""Assign values to labeled numeric ranges.
+
+Ranges such as those from data_types.generate_numeric_range are stored
+in a table whose exclusion constraint keeps them from overlapping and
+provides a GiST index, so values are bucketed set-wise by a single join
+on ``value <@ bounds``. Values already in memory are bucketed client
+side with a bisect over the sorted lower bounds.
+"""
+
+from bisect import bisect_right
+
+from postpy.ddl import compile_qualified_name
+from postpy.dml import insert_many
+from postpy.instrumentation import execute
+
+
+__all__ = ('RangeBuckets', 'create_range_table', 'compile_bucket_select',
+           'compile_bucket_update', 'assign_buckets')
+
+LABEL_COLUMN = 'label'
+BOUNDS_COLUMN = 'bounds'
+
+
+def create_range_table(conn, table_name: str, ranges, schema='public'):
+    """Create and fill a table of labeled non-overlapping ranges.
+
+    Parameters
+    ----------
+    conn : database connection.
+    table_name : range table name.
+    ranges : (label, NumericRange) pairs.
+    schema : range table schema.
+    """
+
+    qualified_name = compile_qualified_name(table_name, schema=schema)
+    statement = (
+        'CREATE TABLE {table} (\n'
+        '  {label} TEXT PRIMARY KEY,\n'
+        '  {bounds} NUMRANGE NOT NULL,\n'
+        '  EXCLUDE USING gist ({bounds} WITH &&)\n'
+        ');'.format(table=qualified_name, label=LABEL_COLUMN,
+                    bounds=BOUNDS_COLUMN))
+
+    with conn.cursor() as cursor:
+        execute(cursor, statement)
+
+    insert_many(conn, qualified_name, [LABEL_COLUMN, BOUNDS_COLUMN],
+                ((str(label), bounds) for label, bounds in ranges))
+
+
+def compile_bucket_select(qualified_name: str, value_column: str,
+                          range_table: str, columns=('*',)) -> str:
+    """Select rows with the label of the range containing their value.
+
+    Values outside every range have a NULL label.
+    """
+
+    column_str = ', '.join('source.{}'.format(column) for column in columns)
+
+    return ('SELECT {columns}, ranges.{label}\n'
+            '  FROM {table} AS source\n'
+            '  LEFT JOIN {ranges} AS ranges\n'
+            '    ON source.{value}::numeric <@ ranges.{bounds}'.format(
+                columns=column_str, label=LABEL_COLUMN, table=qualified_name,
+                ranges=range_table, value=value_column, bounds=BOUNDS_COLUMN))
+
+
+def compile_bucket_update(qualified_name: str, value_column: str,
+                          label_column: str, range_table: str) -> str:
+    """Set a label column from the range containing each row's value."""
+
+    return ('UPDATE {table} AS target SET {label_column} = ranges.{label}\n'
+            '  FROM {ranges} AS ranges\n'
+            '  WHERE target.{value}::numeric <@ ranges.{bounds}'.format(
+                table=qualified_name, label_column=label_column,
+                label=LABEL_COLUMN, ranges=range_table, value=value_column,
+                bounds=BOUNDS_COLUMN))
+
+
+def assign_buckets(conn, qualified_name: str, value_column: str,
+                   label_column: str, range_table: str) -> int:
+    """Label rows of a table in place, returning the number labeled."""
+
+    statement = compile_bucket_update(qualified_name, value_column,
+                                      label_column, range_table)
+
+    with conn.cursor() as cursor:
+        execute(cursor, statement)
+        return cursor.rowcount
+
+
+class RangeBuckets:
+    """Client side lookup of the labeled range containing a value.
+
+    Ranges must not overlap. Calling the instance returns the label of a
+    value's range, or None when no range contains it.
+    """
+
+    def __init__(self, ranges):
+        ranges = sorted(ranges, key=lambda item: (item[1].lower is not None,
+                                                  item[1].lower))
+        self.unbounded = None
+
+        if ranges and ranges[0][1].lower is None:
+            self.unbounded = ranges.pop(0)
+
+        self.lowers = [bounds.lower for _, bounds in ranges]
+        self.ranges = ranges
+
+    def __call__(self, value):
+        if value is None:
+            return None
+
+        position = bisect_right(self.lowers, value) - 1
+
+        for candidate_position in (position, position - 1):
+            if candidate_position >= 0:
+                candidate = self.ranges[candidate_position]
+            elif candidate_position == -1:
+                candidate = self.unbounded
+            else:
+                candidate = None
+
+            if candidate is not None and value in candidate[1]:
+                return candidate[0]
+
+        return None
+
+    def bucket(self, values) -> list:
+        """Labels for many values."""
+
+        return list(map(self, values))
@@ -0,0 +1,719 @@
+"""Bulk load workflows."""
+
+import warnings
+from collections import OrderedDict, namedtuple
+from contextlib import closing, contextmanager
+from functools import partial
+from time import perf_counter
+
+import psycopg2
+
+from postpy.admin import (get_dependent_views, get_foreign_key_dependencies,
+                          get_index_definitions, get_table_grants,
+                          reflect_indexes, table_exists)
+from postpy.base import Index, Table
+from postpy.connections import connect
+from postpy.ddl import (
+    compile_add_constraint, compile_add_constraint_using_index,
+    CreateTableAs, compile_analyze, compile_create_index,
+    compile_drop_constraint, compile_drop_index, compile_grant, compile_literal,
+    compile_qualified_name, compile_range_clauses, compile_rename_index,
+    compile_rename_table, compile_set_logged, compile_tid
+)
+from postpy.dml import CopyFrom, compile_truncate_table
+from postpy.instrumentation import execute
+from postpy.parallel import critical_path, execute_parallel, run_dag, run_parallel
+
+
+__all__ = ('DeferredIndex', 'ConstraintRestoreError', 'bulk_load',
+           'build_indexes', 'create_indexes', 'copy_replace', 'replace_table',
+           'create_table_as', 'LoadReport', 'load_tables')
+
+SHADOW_SUFFIX = '_shadow'
+RETIRED_SUFFIX = '_retired'
+MAX_IDENTIFIER_BYTES = 63
+
+
+_CONSTRAINT_TYPES = {'p': 'PRIMARY KEY', 'u': 'UNIQUE'}
+
+
+class ConstraintRestoreError(RuntimeError):
+    """Primary key or unique constraint dropped for a load not rebuilt."""
+
+
+class DeferredIndex(namedtuple('DeferredIndex',
+                               'name build_statement attach_statement '
+                               'drop_statement')):
+    """Index built after a load.
+
+    Attributes
+    ----------
+    name : index name.
+    build_statement : CREATE INDEX statement, safe to run concurrently
+        with other builds.
+    attach_statement : ALTER TABLE statement run serially after builds,
+        i.e. promoting a unique index to the primary key.
+    drop_statement : statement removing the index prior to a load.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, name, build_statement, attach_statement=None,
+                drop_statement=None):
+        return super(DeferredIndex, cls).__new__(cls, name, build_statement,
+                                                 attach_statement, drop_statement)
+
+
+def primary_key_index(table: Table) -> DeferredIndex:
+    """Primary key built as a unique index then attached as constraint."""
+
+    name = table.primary_key_name
+    build_statement = compile_create_index(name, table.qualified_name,
+                                           table.primary_key_columns,
+                                           unique=True)
+    attach_statement = compile_add_constraint_using_index(
+        table.qualified_name, name)
+    drop_statement = compile_drop_constraint(table.qualified_name, name)
+
+    return DeferredIndex(name, build_statement, attach_statement, drop_statement)
+
+
+def reflect_deferred_indexes(conn, table: Table):
+    """Existing table indexes as deferred index rebuilds."""
+
+    records = get_index_definitions(conn, table.name, schema=table.schema)
+
+    for record in records:
+        name = record['index_name']
+        constraint_type = record['constraint_type']
+        build_statement = record['index_definition'] + ';'
+        attach_statement = None
+        drop_statement = compile_drop_index(
+            compile_qualified_name(name, schema=table.schema))
+
+        if constraint_type is not None:
+            drop_statement = compile_drop_constraint(
+                table.qualified_name, record['constraint_name'])
+
+            if constraint_type in _CONSTRAINT_TYPES:
+                attach_statement = compile_add_constraint_using_index(
+                    table.qualified_name, record['constraint_name'],
+                    _CONSTRAINT_TYPES[constraint_type])
+            else:
+                build_statement = None
+                attach_statement = compile_add_constraint(
+                    table.qualified_name, record['constraint_name'],
+                    record['constraint_definition'])
+
+        yield DeferredIndex(name, build_statement, attach_statement,
+                            drop_statement)
+
+
+@contextmanager
+def bulk_load(conn, table: Table, index_statements=(), create=True, workers=1,
+              maintenance_work_mem=None, connection_factory=connect,
+              unlogged=False, max_parallel_maintenance_workers=None):
+    """Defer primary key and index builds until after a bulk load.
+
+    With ``create`` the table is created without its primary key.
+    Otherwise the existing indexes and index backed constraints are
+    captured from pg_indexes and dropped. On exit the primary key and
+    indexes are built, the table is analyzed and the load is committed.
+
+    With a single worker the workflow runs in one transaction on conn,
+    unless the load commits, as insert_many and copy_from_csv do. With
+    more workers the table and load are committed first and indexes are
+    built in parallel on connections from ``connection_factory``.
+
+    If the load or an index build fails the transaction is rolled back.
+    A created table that was committed is then dropped, and the indexes
+    of an existing table whose drop was committed are rebuilt where the
+    loaded rows allow. A primary key or unique index that cannot be
+    rebuilt raises ConstraintRestoreError, other indexes are warned
+    about.
+
+    Parameters
+    ----------
+    conn : database connection the load runs on.
+    table : table being loaded.
+    index_statements : additional CREATE INDEX statements or Index
+        objects to build.
+    create : create the table rather than load an existing one.
+    workers : number of concurrent index builds.
+    maintenance_work_mem : memory setting for index builds, i.e. '1GB'.
+    connection_factory : callable returning a new connection.
+    unlogged : create the table unlogged and set it logged after the
+        indexes are built. Only applies with ``create``.
+    max_parallel_maintenance_workers : parallel workers per index build.
+
+    Notes
+    -----
+    Existing tables whose primary key is referenced by foreign keys
+    cannot have it dropped.
+    """
+
+    extra_indexes = [DeferredIndex(None, _index_statement(statement))
+                     for statement in index_statements]
+    build_options = {
+        'workers': workers,
+        'maintenance_work_mem': maintenance_work_mem,
+        'max_parallel_maintenance_workers': max_parallel_maintenance_workers,
+        'connection_factory': connection_factory
+    }
+
+    if create:
+        indexes = [primary_key_index(table)] + extra_indexes
+        prepare_statements = [table.create_statement(primary_key=False,
+                                                     unlogged=unlogged)]
+        restore_statements = [table.drop_statement()]
+    else:
+        existing_indexes = list(reflect_deferred_indexes(conn, table))
+        indexes = existing_indexes + extra_indexes
+        prepare_statements = [index.drop_statement for index in existing_indexes]
+        restore_statements = None
+
+    with conn.cursor() as cursor:
+        for statement in prepare_statements:
+            execute(cursor, statement)
+
+    if workers > 1:
+        conn.commit()
+
+    finish_statements = [compile_analyze(table.qualified_name)]
+
+    if create and unlogged:
+        finish_statements.insert(0, compile_set_logged(table.qualified_name))
+
+    try:
+        yield
+
+        if workers > 1:
+            conn.commit()
+
+        build_indexes(conn, indexes, **build_options)
+        _execute_statements(conn, finish_statements)
+    except BaseException:
+        conn.rollback()
+        if restore_statements is None:
+            _restore_indexes(conn, table, existing_indexes)
+        elif table_exists(conn, table.name, schema=table.schema):
+            _execute_statements(conn, restore_statements)
+            conn.commit()
+        raise
+
+    conn.commit()
+
+
+def _restore_indexes(conn, table, indexes):
+    """Rebuild missing indexes one by one after a failed load.
+
+    Indexes may not rebuild over committed rows that violate them. Those
+    failing are warned about, and if a primary key or unique index is
+    among them ConstraintRestoreError is raised after the others are
+    rebuilt.
+    """
+
+    present = {record['index_name'] for record
+               in get_index_definitions(conn, table.name, schema=table.schema)}
+    conn.commit()
+    failed_constraints = []
+
+    for index in indexes:
+        if index.name in present:
+            continue
+
+        statements = [statement for statement
+                      in (index.build_statement, index.attach_statement)
+                      if statement]
+
+        try:
+            _execute_statements(conn, statements)
+        except psycopg2.Error as error:
+            conn.rollback()
+            if _is_constraint(index):
+                failed_constraints.append((index.name, str(error).strip()))
+            else:
+                warnings.warn('Index {} of {} could not be restored: {}'.format(
+                    index.name, table.qualified_name, error))
+        else:
+            conn.commit()
+
+    if failed_constraints:
+        raise ConstraintRestoreError('Constraints of {} could not be restored.'
+                                     .format(table.qualified_name),
+                                     failed_constraints)
+
+
+def _is_constraint(index):
+    unique = (index.build_statement or '').startswith('CREATE UNIQUE')
+
+    return unique or index.attach_statement is not None
+
+
+def copy_replace(conn, table: Table, file_object, unlogged=False,
+                 **copy_options):
+    """Replace a table's contents with a frozen COPY.
+
+    The table is truncated, or created when missing, and loaded with
+    COPY ... FREEZE in the same transaction. Tables referencing the table
+    by foreign key make the truncate fail rather than being emptied. Rows
+    are written already frozen, so later vacuums need not rewrite them for
+    hint bits, and with wal_level minimal the load skips the write-ahead
+    log.
+
+    Parameters
+    ----------
+    conn : database connection.
+    table : table to replace.
+    file_object : CSV file-like object.
+    unlogged : when creating the table, load it unlogged then set it
+        logged before committing.
+    copy_options : CopyFrom csv options, i.e. delimiter.
+    """
+
+    create = not table_exists(conn, table.name, schema=table.schema)
+
+    if create:
+        prepare_statements = [table.create_statement(unlogged=unlogged)]
+    else:
+        prepare_statements = [compile_truncate_table(table.qualified_name,
+                                                     cascade=False)]
+
+    copy_from = CopyFrom(table, freeze=True, **copy_options)
+
+    try:
+        _execute_statements(conn, prepare_statements)
+        copy_from(conn, file_object)
+
+        if create and unlogged:
+            _execute_statements(conn, [compile_set_logged(table.qualified_name)])
+    except BaseException:
+        conn.rollback()
+        raise
+
+    conn.commit()
+
+
+def replace_table(conn, table: Table, file_object, indexes=(), workers=1,
+                  maintenance_work_mem=None, lock_timeout=None,
+                  connection_factory=connect, **copy_options):
+    """Replace a table by loading a shadow copy and swapping names.
+
+    The shadow table is created unlogged without indexes and loaded with
+    COPY ... FREEZE. Its primary key and indexes are then built, it is
+    set logged, analyzed and given the table's grants. Readers keep using
+    the current table until one short transaction renames the shadow in
+    its place, recreates views selecting from the table so they bind to
+    the replacement, drops the current table and renames the shadow's
+    indexes. A missing table is simply created.
+
+    Parameters
+    ----------
+    conn : database connection.
+    table : table to replace.
+    file_object : CSV file-like object.
+    indexes : Index objects of the table besides its primary key,
+        defaults to the current table's indexes.
+    workers : number of concurrent index builds.
+    maintenance_work_mem : memory setting for index builds, i.e. '1GB'.
+    lock_timeout : limit on waiting for readers in the swap, i.e. '5s'.
+    connection_factory : callable returning a new connection.
+    copy_options : CopyFrom csv options, i.e. delimiter.
+
+    Raises
+    ------
+    ValueError when a shadow or retired table or index name would be
+    truncated by PostgreSQL.
+
+    Notes
+    -----
+    Constraints other than the primary key, materialized views and
+    foreign keys referencing the table are not carried over, and the
+    latter two make the swap fail.
+    """
+
+    shadow = table._replace(name=table.name + SHADOW_SUFFIX)
+    exists = table_exists(conn, table.name, schema=table.schema)
+    views = grants = []
+
+    if exists:
+        views = list(get_dependent_views(conn, table.name, schema=table.schema))
+        grants = [compile_grant(grant['privilege_type'], shadow.qualified_name,
+                                grant['grantee'], grant['is_grantable'])
+                  for grant in get_table_grants(conn, table.name,
+                                                schema=table.schema)]
+        if not indexes:
+            primary_keys = {record['index_name'] for record
+                            in get_index_definitions(conn, table.name,
+                                                     schema=table.schema)
+                            if record['constraint_type'] == 'p'}
+            indexes = [index for index in reflect_indexes(conn, table.name,
+                                                          schema=table.schema)
+                       if index.name not in primary_keys]
+
+    shadow_indexes = [index._replace(name=index.name + SHADOW_SUFFIX,
+                                     table_name=shadow.name)
+                      for index in indexes]
+    names = [shadow.name, shadow.primary_key_name, table.name + RETIRED_SUFFIX]
+    _check_identifier_lengths(names + [index.name for index in shadow_indexes])
+    deferred = [DeferredIndex(None, index.create_statement())
+                for index in shadow_indexes]
+    index_names = [(index.name, shadow_index.name)
+                   for index, shadow_index in zip(indexes, shadow_indexes)]
+
+    if table.primary_key_columns:
+        deferred.insert(0, primary_key_index(shadow))
+        index_names.insert(0, (table.primary_key_name, shadow.primary_key_name))
+
+    swap_statements = []
+
+    if lock_timeout is not None:
+        swap_statements.append("SET LOCAL lock_timeout = '{}';".format(lock_timeout))
+
+    if exists:
+        retired = table._replace(name=table.name + RETIRED_SUFFIX)
+        swap_statements.append(compile_rename_table(table.qualified_name,
+                                                    retired.name))
+
+    swap_statements.append(compile_rename_table(shadow.qualified_name, table.name))
+    swap_statements.extend('CREATE OR REPLACE VIEW {} AS {}'.format(
+        view['name'], view['definition']) for view in views)
+
+    if exists:
+        swap_statements.append('DROP TABLE {};'.format(retired.qualified_name))
+
+    swap_statements.extend(
+        compile_rename_index(compile_qualified_name(shadow_name, table.schema), name)
+        for name, shadow_name in index_names)
+
+    try:
+        _execute_statements(conn, [shadow.drop_statement(),
+                                   shadow.create_statement(primary_key=False,
+                                                           unlogged=True)])
+        CopyFrom(shadow, freeze=True, **copy_options)(conn, file_object)
+        conn.commit()
+
+        build_indexes(conn, deferred, workers=workers,
+                      maintenance_work_mem=maintenance_work_mem,
+                      connection_factory=connection_factory)
+        _execute_statements(conn, [compile_set_logged(shadow.qualified_name),
+                                   compile_analyze(shadow.qualified_name)] + grants)
+        conn.commit()
+
+        _execute_statements(conn, swap_statements)
+    except BaseException:
+        conn.rollback()
+        _execute_statements(conn, [shadow.drop_statement()])
+        conn.commit()
+        raise
+
+    conn.commit()
+
+
+def _check_identifier_lengths(names):
+    for name in names:
+        if len(name.encode('utf-8')) > MAX_IDENTIFIER_BYTES:
+            raise ValueError('Identifier longer than {} bytes.'.format(
+                MAX_IDENTIFIER_BYTES), name)
+
+
+class LoadReport(namedtuple('LoadReport', 'results critical_path duration')):
+    """Timing of a multi-table load.
+
+    Attributes
+    ----------
+    results : parallel.JobResult of each table load, named by qualified
+        table name with the loader's result, i.e. a row count.
+    critical_path : chain of dependent table loads taking longest.
+    duration : seconds the whole load took.
+    """
+
+    __slots__ = ()
+
+
+def load_tables(loads, loader=CopyFrom, workers=4, connection_factory=connect,
+                **copy_options) -> LoadReport:
+    """Load many tables concurrently, referenced tables first.
+
+    Foreign key dependencies between the tables are read from
+    pg_constraint. A table loads, in its own transaction, once the
+    tables it references have committed, and independent tables load at
+    the same time.
+
+    Parameters
+    ----------
+    loads : (Table, source) pairs, where a source is a CSV file-like
+        object or a path opened when its table loads.
+    loader : callable(table, **copy_options) returning a loader, i.e.
+        CopyFrom or CopyFromUpsert.
+    workers : number of concurrent loads.
+    connection_factory : callable returning a new connection.
+    copy_options : loader csv options, i.e. delimiter.
+
+    Raises
+    ------
+    ValueError when foreign keys between the tables form a cycle.
+    """
+
+    loads = list(loads)
+
+    with closing(connection_factory()) as conn:
+        dependencies = get_foreign_key_dependencies(conn)
+        conn.rollback()
+
+    jobs = [(table.qualified_name,
+             partial(_load_source, load=loader(table, **copy_options),
+                     source=source))
+            for table, source in loads]
+    start = perf_counter()
+    results = run_dag(jobs, dependencies, workers=workers,
+                      connection_factory=connection_factory)
+
+    return LoadReport(results, critical_path(results, dependencies),
+                      perf_counter() - start)
+
+
+def _load_source(conn, load, source):
+    if isinstance(source, str):
+        with open(source) as file_object:
+            return load(conn, file_object)
+
+    return load(conn, source)
+
+
+def create_table_as(conn, create: CreateTableAs, key_column=None, workers=4,
+                    partitions=None, index_statements=(),
+                    maintenance_work_mem=None, connection_factory=connect) -> list:
+    """Fill a CREATE TABLE AS target with concurrent range inserts.
+
+    The empty target is created and committed, then the parent is split
+    into ranges of ``key_column`` or, without one, of physical blocks by
+    ctid. Each range is copied by its own INSERT ... SELECT on a separate
+    connection. The ranges share a snapshot exported from ``conn``, so
+    the target is a consistent copy even while the parent is written to.
+    Indexes are built afterwards and the table is analyzed. If any step
+    fails the target is dropped.
+
+    Parameters
+    ----------
+    conn : database connection.
+    create : CreateTableAs statement formatter.
+    key_column : non-null parent column to split on, i.e. the primary key.
+    workers : number of concurrent inserts and index builds.
+    partitions : number of ranges, defaults to workers.
+    index_statements : CREATE INDEX statements or Index objects.
+    maintenance_work_mem : memory setting for index builds, i.e. '1GB'.
+    connection_factory : callable returning a new connection.
+
+    Returns
+    -------
+    parallel.JobResult timing for each range insert.
+
+    Notes
+    -----
+    ctid ranges are only scanned efficiently from PostgreSQL 14, earlier
+    versions read the whole parent for each range.
+    """
+
+    partitions = partitions or workers
+
+    _execute_statements(conn, [create.compile_create_empty()])
+    conn.commit()
+
+    try:
+        snapshot_statements = _export_snapshot(conn)
+
+        if key_column is None:
+            range_clauses = _block_range_clauses(conn, create.parent_table,
+                                                 partitions)
+        else:
+            range_clauses = _key_range_clauses(conn, create.parent_table,
+                                               key_column, partitions)
+
+        statements = [create.compile_insert(clause) for clause in range_clauses]
+        jobs = [(statement, partial(_execute_statements,
+                                    statements=snapshot_statements + [statement]))
+                for statement in statements]
+        results = run_parallel(jobs, workers=workers,
+                               connection_factory=connection_factory)
+        conn.commit()
+
+        indexes = [DeferredIndex(None, _index_statement(statement))
+                   for statement in index_statements]
+        build_indexes(conn, indexes, workers=workers,
+                      maintenance_work_mem=maintenance_work_mem,
+                      connection_factory=connection_factory)
+        _execute_statements(conn, [compile_analyze(create.table)])
+    except BaseException:
+        conn.rollback()
+        _execute_statements(conn, ['DROP TABLE IF EXISTS {};'.format(create.table)])
+        conn.commit()
+        raise
+
+    conn.commit()
+
+    return results
+
+
+def _export_snapshot(conn):
+    """Export the snapshot of a new repeatable read transaction on ``conn``.
+
+    The snapshot stays importable until the transaction ends. Returns the
+    statements that import it as the first of another transaction.
+    """
+
+    isolation = 'SET TRANSACTION ISOLATION LEVEL REPEATABLE READ;'
+
+    with conn.cursor() as cursor:
+        execute(cursor, isolation)
+        execute(cursor, 'SELECT pg_export_snapshot();')
+        snapshot_id = cursor.fetchone()[0]
+
+    return [isolation,
+            'SET TRANSACTION SNAPSHOT {};'.format(compile_literal(snapshot_id))]
+
+
+def _key_range_clauses(conn, parent_table, key_column, partitions):
+    query = 'SELECT min({0}), max({0}) FROM {1};'.format(key_column, parent_table)
+
+    with conn.cursor() as cursor:
+        execute(cursor, query)
+        lower, upper = cursor.fetchone()
+
+        if lower is None:
+            return ['TRUE']
+
+        if isinstance(lower, int):
+            step = (upper - lower) // partitions + 1
+            bounds = range(lower + step, upper + 1, step)
+        else:
+            fractions = ', '.join(str(i / partitions) for i in range(1, partitions))
+            execute(cursor, 'SELECT percentile_disc(ARRAY[{}]::float8[])'
+                            ' WITHIN GROUP (ORDER BY {}) FROM {};'.format(
+                                fractions, key_column, parent_table))
+            bounds = cursor.fetchone()[0] or []
+
+    literals = [compile_literal(bound) for bound in sorted(set(bounds))]
+
+    return compile_range_clauses(key_column, literals)
+
+
+def _block_range_clauses(conn, parent_table, partitions):
+    query = ("SELECT pg_relation_size(%s::regclass)"
+             " / current_setting('block_size')::int;")
+
+    with conn.cursor() as cursor:
+        execute(cursor, query, (parent_table,))
+        blocks = cursor.fetchone()[0]
+
+    bounds = sorted({blocks * i // partitions for i in range(1, partitions)} - {0})
+
+    return compile_range_clauses('ctid', [compile_tid(block) for block in bounds])
+
+
+def build_indexes(conn, indexes, workers=1, maintenance_work_mem=None,
+                  max_parallel_maintenance_workers=None,
+                  connection_factory=connect):
+    """Build deferred indexes, then attach their constraints on conn.
+
+    With more than one worker, builds run in parallel on separate
+    connections and must see committed table data.
+    """
+
+    indexes = list(indexes)
+    build_statements = [index.build_statement for index in indexes
+                        if index.build_statement]
+    attach_statements = [index.attach_statement for index in indexes
+                         if index.attach_statement]
+
+    if workers > 1 and len(build_statements) > 1:
+        session_statements = _maintenance_settings(
+            maintenance_work_mem, max_parallel_maintenance_workers)
+        execute_parallel(build_statements, workers=workers,
+                         connection_factory=connection_factory,
+                         session_statements=session_statements)
+    else:
+        local_statements = _maintenance_settings(
+            maintenance_work_mem, max_parallel_maintenance_workers, local=True)
+        _execute_statements(conn, local_statements + build_statements)
+
+    _execute_statements(conn, attach_statements)
+
+
+def create_indexes(indexes, workers=4, concurrently=False,
+                   maintenance_work_mem=None,
+                   max_parallel_maintenance_workers=None,
+                   connection_factory=connect) -> list:
+    """Build many indexes at once across separate connections.
+
+    Parameters
+    ----------
+    indexes : Index objects.
+    workers : number of indexes built at the same time.
+    concurrently : build with CREATE INDEX CONCURRENTLY, not blocking
+        writes. Connections run in autocommit mode as required, and
+        indexes of the same table are built one after another since
+        concurrent builds on one table wait on each other.
+    maintenance_work_mem : memory per index build, i.e. '1GB'.
+    max_parallel_maintenance_workers : parallel workers per index build.
+    connection_factory : callable returning a new connection.
+
+    Returns
+    -------
+    parallel.JobResult timing for each index build.
+    """
+
+    session_statements = _maintenance_settings(maintenance_work_mem,
+                                               max_parallel_maintenance_workers)
+
+    if not concurrently:
+        statements = [index.create_statement() for index in indexes]
+
+        return execute_parallel(statements, workers=workers,
+                                connection_factory=connection_factory,
+                                session_statements=session_statements)
+
+    table_statements = OrderedDict()
+
+    for index in indexes:
+        statements = table_statements.setdefault(index.qualified_table_name, [])
+        statements.append(index.create_statement(concurrently=True))
+
+    jobs = [(table_name, partial(_execute_statements, statements=statements))
+            for table_name, statements in table_statements.items()]
+
+    return run_parallel(jobs, workers=workers,
+                        connection_factory=connection_factory,
+                        session_statements=session_statements,
+                        autocommit=True)
+
+
+def _maintenance_settings(maintenance_work_mem, max_parallel_maintenance_workers,
+                          local=False):
+    """SET statements of index build settings, transaction scoped with local."""
+
+    command = 'SET LOCAL' if local else 'SET'
+    settings = []
+
+    if maintenance_work_mem:
+        settings.append("{} maintenance_work_mem = '{}';".format(
+            command, maintenance_work_mem))
+
+    if max_parallel_maintenance_workers is not None:
+        settings.append('{} max_parallel_maintenance_workers = {:d};'.format(
+            command, max_parallel_maintenance_workers))
+
+    return settings
+
+
+def _index_statement(index):
+    if isinstance(index, Index):
+        return index.create_statement()
+
+    return index
+
+
+def _execute_statements(conn, statements):
+    with conn.cursor() as cursor:
+        for statement in statements:
+            execute(cursor, statement)
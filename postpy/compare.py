@@ -0,0 +1,240 @@
+"""Verify two tables hold the same rows by comparing hashed key ranges.
+
+Both tables are split into ranges of the leading primary key column and
+each range is summarized server side as a row count and a sum of row
+hashes. Only ranges whose summaries differ are split further, like
+descending a Merkle tree, until they are small enough to compare row
+hashes by key. Matching tables exchange only the range summaries.
+"""
+
+from collections import namedtuple
+from functools import partial
+
+from postpy.base import Table
+from postpy.connections import connect
+from postpy.data_types import python_type
+from postpy.instrumentation import execute
+from postpy.parallel import run_parallel
+from postpy.sync import ROW_HASH_DIGITS, SEPARATOR, TableHasher
+
+
+__all__ = ('TableDiff', 'compare_tables')
+
+SAMPLE_KEYS_PER_PART = 100
+
+
+class TableDiff(namedtuple('TableDiff', 'only_a only_b changed ranges')):
+    """Differences between two tables by primary key.
+
+    Attributes
+    ----------
+    only_a : primary keys, as text tuples, of rows only in table a.
+    only_b : primary keys of rows only in table b.
+    changed : primary keys of rows whose values differ.
+    ranges : number of key ranges summarized.
+    """
+
+    __slots__ = ()
+
+    @property
+    def equal(self):
+        return not (self.only_a or self.only_b or self.changed)
+
+
+def compare_tables(conn, table_a: Table, table_b: Table, chunks=16, fanout=16,
+                   leaf_rows=1000, workers=4, connection_factory=connect) -> TableDiff:
+    """Compare the rows of two tables sharing columns and primary key.
+
+    Parameters
+    ----------
+    conn : database connection used to find range bounds.
+    table_a : first table, defining the compared columns.
+    table_b : second table.
+    chunks : number of top level key ranges.
+    fanout : number of sub ranges a differing range is split into.
+    leaf_rows : ranges with at most this many rows are compared by key.
+    workers : number of concurrent range summaries.
+    connection_factory : callable returning a new connection.
+
+    Notes
+    -----
+    Composite keys are split on their leading column only, so rows
+    sharing one leading value always fall in the same range.
+    """
+
+    hasher = TableHasher(table_a)
+    comparer = _RangeComparer(conn, table_a, table_b, hasher)
+    level = comparer.split((None, None), chunks)
+    leaves = []
+    summarized = 0
+
+    while level:
+        summaries = _run_jobs(
+            [partial(comparer.summarize, table=table, bounds=bounds)
+             for bounds in level for table in (table_a, table_b)],
+            workers, connection_factory)
+        summarized += len(level)
+        next_level = []
+
+        for position, bounds in enumerate(level):
+            summary_a, summary_b = summaries[2 * position:2 * position + 2]
+
+            if summary_a == summary_b:
+                continue
+
+            sub_ranges = []
+
+            if max(summary_a[0], summary_b[0]) > leaf_rows:
+                sub_ranges = comparer.split(bounds, fanout,
+                                            counts=(summary_a[0], summary_b[0]))
+
+            if len(sub_ranges) > 1:
+                next_level.extend(sub_ranges)
+            else:
+                leaves.append(bounds)
+
+        level = next_level
+
+    rows = _run_jobs([partial(comparer.row_hashes, table=table, bounds=bounds)
+                      for bounds in leaves for table in (table_a, table_b)],
+                     workers, connection_factory)
+    only_a, only_b, changed = [], [], []
+
+    for position in range(len(leaves)):
+        rows_a, rows_b = rows[2 * position:2 * position + 2]
+        only_a.extend(keys for key, (keys, _) in rows_a.items() if key not in rows_b)
+        only_b.extend(keys for key, (keys, _) in rows_b.items() if key not in rows_a)
+        changed.extend(keys for key, (keys, row_hash) in rows_a.items()
+                       if key in rows_b and rows_b[key][1] != row_hash)
+
+    return TableDiff(sorted(only_a), sorted(only_b), sorted(changed), summarized)
+
+
+class _RangeComparer:
+    def __init__(self, conn, table_a, table_b, hasher):
+        self.conn = conn
+        self.tables = (table_a, table_b)
+        self.hasher = hasher
+        self.column = table_a.primary_key_columns[0]
+        column_type = table_a.columns[
+            table_a.column_names.index(self.column)].data_type
+        self.integer_key = python_type(column_type) is int
+
+    def split(self, bounds, parts, counts=None):
+        """Sub ranges of a key range, keeping its outer bounds.
+
+        Integer keys are split evenly between the smallest and largest key
+        of either table. Other keys are split at quantiles of the keys of
+        the table with more rows in the range, sampled when scanning a
+        sample is cheaper than scanning the range. ``counts`` are the rows
+        of the range in each table, estimated from statistics when None.
+        """
+
+        clause, params = self.range_clause(bounds)
+
+        with self.conn.cursor() as cursor:
+            if self.integer_key:
+                union = ' UNION ALL '.join(
+                    'SELECT min({column}) AS lower, max({column}) AS upper'
+                    ' FROM {table} WHERE {clause}'.format(
+                        column=self.column, table=table.qualified_name,
+                        clause=clause)
+                    for table in self.tables)
+                execute(cursor, 'SELECT min(lower), max(upper) FROM ({}) AS keys'
+                                .format(union), params * 2)
+                lower, upper = cursor.fetchone()
+                if lower is None:
+                    inner = []
+                else:
+                    step = (upper - lower) // parts + 1
+                    inner = list(range(lower + step, upper + 1, step))
+            else:
+                inner = self._quantiles(cursor, clause, params, parts, counts)
+
+        lower, upper = bounds
+        inner = sorted(set(value for value in inner
+                           if lower is None or value > lower
+                           if upper is None or value < upper))
+        edges = [lower] + inner + [upper]
+
+        return list(zip(edges, edges[1:]))
+
+    def _quantiles(self, cursor, clause, params, parts, counts):
+        table_rows = []
+
+        for table in self.tables:
+            execute(cursor, 'SELECT reltuples FROM pg_catalog.pg_class'
+                            ' WHERE oid = %s::regclass', [table.qualified_name])
+            table_rows.append(cursor.fetchone()[0])
+
+        counts = counts or table_rows
+        position = 0 if counts[0] >= counts[1] else 1
+        table, rows = self.tables[position], counts[position]
+        fractions = ', '.join(str(i / parts) for i in range(1, parts))
+        statement = ('SELECT percentile_disc(ARRAY[{}]::float8[])'
+                     ' WITHIN GROUP (ORDER BY {}) FROM {}{} WHERE {}')
+        percent = 100. * SAMPLE_KEYS_PER_PART * parts / max(rows, 1)
+
+        if percent < 100 and 0 < table_rows[position] * percent / 100 < rows:
+            execute(cursor, statement.format(
+                fractions, self.column, table.qualified_name,
+                ' TABLESAMPLE SYSTEM (%s)', clause), [percent] + params)
+            inner = cursor.fetchone()[0]
+            if inner:
+                return inner
+
+        execute(cursor, statement.format(fractions, self.column,
+                                         table.qualified_name, '', clause), params)
+
+        return cursor.fetchone()[0] or []
+
+    def range_clause(self, bounds):
+        clauses, params = ['TRUE'], []
+        lower, upper = bounds
+
+        if lower is not None:
+            clauses.append('{} >= %s'.format(self.column))
+            params.append(lower)
+        if upper is not None:
+            clauses.append('{} < %s'.format(self.column))
+            params.append(upper)
+
+        return ' AND '.join(clauses), params
+
+    def summarize(self, conn, table, bounds):
+        clause, params = self.range_clause(bounds)
+        statement = (
+            "SELECT count(*),"
+            " coalesce(sum(('x' || substr(row_hash, 1, {digits:d}))"
+            "::bit({bits:d})::bigint), 0)\n"
+            "  FROM (SELECT {row_hash} AS row_hash FROM {table}\n"
+            "          WHERE {clause}) AS hashes".format(
+                digits=ROW_HASH_DIGITS, bits=4 * ROW_HASH_DIGITS,
+                row_hash=self.hasher.row_hash_expression,
+                table=table.qualified_name, clause=clause))
+
+        with conn.cursor() as cursor:
+            execute(cursor, statement, params)
+            count, total = cursor.fetchone()
+
+        return count, int(total)
+
+    def row_hashes(self, conn, table, bounds):
+        clause, params = self.range_clause(bounds)
+        key_columns = ', '.join('{}::text'.format(name)
+                                for name in table.primary_key_columns)
+        statement = 'SELECT {}, {} FROM {} WHERE {}'.format(
+            key_columns, self.hasher.row_hash_expression, table.qualified_name,
+            clause)
+
+        with conn.cursor() as cursor:
+            execute(cursor, statement, params)
+            return {SEPARATOR.join(row[:-1]): (row[:-1], row[-1])
+                    for row in cursor.fetchall()}
+
+
+def _run_jobs(jobs, workers, connection_factory):
+    results = run_parallel(list(enumerate(jobs)), workers=workers,
+                           connection_factory=connection_factory)
+
+    return [job.result for job in results]
@@ -1,6 +1,8 @@
-from datetime import date, datetime
+import re
+from datetime import date, datetime, timedelta, timezone
 from decimal import Decimal
 from types import MappingProxyType
+from uuid import UUID
 
 from foil.compose import create_quantiles
 from psycopg2.extras import NumericRange
@@ -23,9 +25,111 @@ TYPE_MAP = MappingProxyType({
     'varchar': str,
     'character varying': str,
     'date': date,
-    'timestamp': datetime
+    'timestamp': datetime,
+    'timestamp without time zone': datetime,
+    'timestamp with time zone': datetime,
+    'timestamptz': datetime,
+    'uuid': UUID
 })
 
+_TYPE_MODIFIER = re.compile(r'\(.*?\)')
+
+_DATE_FORMAT = '%Y-%m-%d'
+_TIMESTAMP_FORMATS = ('%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%d %H:%M:%S',
+                      '%Y-%m-%dT%H:%M:%S.%f', '%Y-%m-%dT%H:%M:%S')
+_UTC_OFFSET = re.compile(r'(?:([+-])(\d{2})(?::?(\d{2}))?(?::?(\d{2}))?|Z)$')
+
+
+def python_type(data_type: str):
+    """Python type of a postgres data type, i.e. VARCHAR(50) -> str."""
+
+    base_type = _TYPE_MODIFIER.sub('', data_type).strip().lower()
+
+    return TYPE_MAP[base_type]
+
+
+_TRUE_TEXT = frozenset(['t', 'true', 'y', 'yes', 'on', '1'])
+_FALSE_TEXT = frozenset(['f', 'false', 'n', 'no', 'off', '0'])
+
+
+def parse_bool(text: str) -> bool:
+    """Parse postgres boolean text, rejecting other values as the server does."""
+
+    value = text.strip().lower()
+
+    if value in _TRUE_TEXT:
+        return True
+    if value in _FALSE_TEXT:
+        return False
+
+    raise ValueError('Invalid boolean text.', text)
+
+
+def parse_date(text: str) -> date:
+    return datetime.strptime(text, _DATE_FORMAT).date()
+
+
+def parse_timestamp(text: str) -> datetime:
+    for timestamp_format in _TIMESTAMP_FORMATS:
+        try:
+            return datetime.strptime(text, timestamp_format)
+        except ValueError:
+            pass
+
+    raise ValueError('Unrecognized timestamp format.', text)
+
+
+def parse_timestamptz(text: str) -> datetime:
+    """Parse timestamp text with a UTC offset, i.e. '2016-01-02 03:04:05+00'.
+
+    Timestamps without an offset are returned naive.
+    """
+
+    match = _UTC_OFFSET.search(text)
+
+    if match is None:
+        return parse_timestamp(text)
+
+    timestamp = parse_timestamp(text[:match.start()])
+    sign, hours, minutes, seconds = match.groups()
+
+    if sign is None:
+        return timestamp.replace(tzinfo=timezone.utc)
+
+    offset = timedelta(hours=int(hours), minutes=int(minutes or 0),
+                       seconds=int(seconds or 0))
+
+    return timestamp.replace(tzinfo=timezone(-offset if sign == '-' else offset))
+
+
+TEXT_PARSERS = MappingProxyType({
+    bool: parse_bool,
+    int: int,
+    float: float,
+    Decimal: Decimal,
+    str: str,
+    date: parse_date,
+    datetime: parse_timestamp,
+    UUID: UUID
+})
+
+
+_BASE_TYPE_PARSERS = MappingProxyType({
+    'timestamp with time zone': parse_timestamptz,
+    'timestamptz': parse_timestamptz
+})
+
+
+def text_parser(data_type: str):
+    """Callable parsing postgres text output into the column's python type."""
+
+    base_type = _TYPE_MODIFIER.sub('', data_type).strip().lower()
+
+    if base_type in _BASE_TYPE_PARSERS:
+        return _BASE_TYPE_PARSERS[base_type]
+
+    return TEXT_PARSERS[python_type(data_type)]
+
 
 def generate_numeric_range(items, lower_bound, upper_bound):
     """Generate postgresql numeric range and label for insertion.
@@ -2,6 +2,9 @@
 ddl.py contains the Data Definition Language for Postgresql Server.
 """
 
+import re
+from decimal import Decimal
+
 from psycopg2.extensions import AsIs
 
 
@@ -12,14 +15,25 @@ def compile_qualified_name(table: str, schema='public') -> str:
 
 
 def compile_create_table(qualified_name: str, column_statement: str,
-                         primary_key_statement: str) -> str:
-    """Postgresql Create Table statement formatter."""
+                         primary_key_statement: str, unlogged=False,
+                         partition_statement='') -> str:
+    """Postgresql Create Table statement formatter.
+
+    An empty primary_key_statement creates the table without a primary key.
+    Unlogged tables skip the write-ahead log and are truncated on crash
+    recovery.
+    """
+
+    if partition_statement:
+        partition_statement = ' ' + partition_statement
 
     statement = """
-                CREATE TABLE {table} ({columns} {primary_keys});
-                """.format(table=qualified_name,
-                           columns=column_statement,
-                           primary_keys=primary_key_statement)
+                CREATE {unlogged}TABLE {table} ({definitions}){partition};
+                """.format(unlogged='UNLOGGED ' if unlogged else '',
+                           table=qualified_name,
+                           definitions=_table_definitions(column_statement,
+                                                          primary_key_statement),
+                           partition=partition_statement)
     return statement
 
 
@@ -29,13 +43,20 @@ def compile_create_temporary_table(table_name: str,
     """Postgresql Create Temporary Table statement formatter."""
 
     statement = """
-                CREATE TEMPORARY TABLE {table} ({columns} {primary_keys});
+                CREATE TEMPORARY TABLE {table} ({definitions});
                 """.format(table=table_name,
-                           columns=column_statement,
-                           primary_keys=primary_key_statement)
+                           definitions=_table_definitions(column_statement,
+                                                          primary_key_statement))
     return statement
 
 
+def _table_definitions(column_statement, primary_key_statement):
+    if not primary_key_statement:
+        return column_statement.rstrip(', ')
+
+    return '{} {}'.format(column_statement, primary_key_statement)
+
+
 def compile_column(name: str, data_type: str, nullable: bool) -> str:
     """Create column definition statement."""
 
@@ -50,6 +71,202 @@ def compile_primary_key(column_names):
     return 'PRIMARY KEY ({})'.format(', '.join(column_names))
 
 
+def compile_partition_by(method: str, column_names) -> str:
+    return 'PARTITION BY {method} ({columns})'.format(
+        method=method, columns=', '.join(column_names))
+
+
+def compile_create_partition(qualified_name: str, parent_qualified_name: str,
+                             bound_statement: str) -> str:
+    """Declare a table partition of a partitioned parent table."""
+
+    return 'CREATE TABLE {table} PARTITION OF {parent} {bound};'.format(
+        table=qualified_name, parent=parent_qualified_name,
+        bound=bound_statement)
+
+
+def compile_range_bound(lower, upper) -> str:
+    """Range partition bound, None bounds are unbounded."""
+
+    return 'FOR VALUES FROM ({lower}) TO ({upper})'.format(
+        lower=_compile_bound_values(lower, 'MINVALUE'),
+        upper=_compile_bound_values(upper, 'MAXVALUE'))
+
+
+def compile_list_bound(values) -> str:
+    return 'FOR VALUES IN ({})'.format(', '.join(map(compile_literal, values)))
+
+
+def compile_hash_bound(modulus: int, remainder: int) -> str:
+    return 'FOR VALUES WITH (MODULUS {}, REMAINDER {})'.format(modulus, remainder)
+
+
+def compile_default_bound() -> str:
+    return 'DEFAULT'
+
+
+def _compile_bound_values(values, unbounded):
+    if values is None:
+        return unbounded
+
+    return ', '.join(unbounded if value is None else compile_literal(value)
+                     for value in values)
+
+
+def compile_literal(value) -> str:
+    """Format a python value as a SQL literal for DDL statements."""
+
+    if value is None:
+        return 'NULL'
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, (int, float, Decimal)):
+        return str(value)
+
+    return "'{}'".format(str(value).replace("'", "''"))
+
+
+def compile_create_index(index_name: str, qualified_name: str, column_names,
+                         unique=False, method=None, include=(), where='',
+                         storage_parameters=None, concurrently=False) -> str:
+    """Postgresql Create Index statement formatter.
+
+    Parameters
+    ----------
+    index_name : unqualified index name, created in the table's schema.
+    qualified_name : indexed table.
+    column_names : key columns or expressions.
+    unique : create a unique index.
+    method : access method, i.e. btree, brin, gin, gist or hash.
+    include : non-key columns stored in the index.
+    where : predicate of a partial index.
+    storage_parameters : mapping of index storage parameters.
+    concurrently : build without blocking writes.
+    """
+
+    clauses = []
+
+    if method:
+        clauses.append('USING {}'.format(method))
+
+    elements = ', '.join(map(_compile_index_element, column_names))
+    clauses.append('({})'.format(elements))
+
+    if include:
+        clauses.append('INCLUDE ({})'.format(', '.join(include)))
+
+    if storage_parameters:
+        clauses.append('WITH ({})'.format(', '.join(
+            '{} = {}'.format(key, value)
+            for key, value in sorted(storage_parameters.items()))))
+
+    if where:
+        clauses.append('WHERE {}'.format(where))
+
+    return 'CREATE {unique}INDEX {concurrently}{name} ON {table} {clauses};'.format(
+        unique='UNIQUE ' if unique else '',
+        concurrently='CONCURRENTLY ' if concurrently else '',
+        name=index_name, table=qualified_name, clauses=' '.join(clauses))
+
+
+_NAME = r'(?:[A-Za-z_][A-Za-z0-9_$]*|"(?:[^"]|"")+")'
+_QUALIFIED_NAME = r'{name}(?:\.{name})?'.format(name=_NAME)
+_IDENTIFIER = re.compile(r'^{name}(?:\s+COLLATE\s+{qualified})?(?:\s+{qualified})?'
+                         r'(?:\s+(?:ASC|DESC))?(?:\s+NULLS\s+(?:FIRST|LAST))?$'
+                         .format(name=_NAME, qualified=_QUALIFIED_NAME),
+                         re.IGNORECASE)
+
+
+def _compile_index_element(element: str) -> str:
+    """Index columns pass through, expressions are parenthesized."""
+
+    if _IDENTIFIER.match(element) or element.startswith('('):
+        return element
+
+    return '({})'.format(element)
+
+
+def compile_drop_index(qualified_index_name: str, concurrently=False) -> str:
+    return 'DROP INDEX {concurrently}IF EXISTS {name};'.format(
+        concurrently='CONCURRENTLY ' if concurrently else '',
+        name=qualified_index_name)
+
+
+def compile_add_constraint_using_index(qualified_name: str, constraint_name: str,
+                                       constraint_type='PRIMARY KEY') -> str:
+    """Promote an existing unique index to a primary key or unique constraint."""
+
+    return 'ALTER TABLE {table} ADD CONSTRAINT {name} {type} USING INDEX {name};'.format(
+        table=qualified_name, name=constraint_name, type=constraint_type)
+
+
+def compile_add_constraint(qualified_name: str, constraint_name: str,
+                           constraint_definition: str) -> str:
+    return 'ALTER TABLE {table} ADD CONSTRAINT {name} {definition};'.format(
+        table=qualified_name, name=constraint_name,
+        definition=constraint_definition)
+
+
+def compile_drop_constraint(qualified_name: str, constraint_name: str) -> str:
+    return 'ALTER TABLE {table} DROP CONSTRAINT {name};'.format(
+        table=qualified_name, name=constraint_name)
+
+
+def compile_set_logged(qualified_name: str, logged=True) -> str:
+    """Switch a table between logged and unlogged persistence."""
+
+    persistence = 'LOGGED' if logged else 'UNLOGGED'
+
+    return 'ALTER TABLE {} SET {};'.format(qualified_name, persistence)
+
+
+def compile_rename_table(qualified_name: str, new_name: str) -> str:
+    return 'ALTER TABLE {} RENAME TO {};'.format(qualified_name, new_name)
+
+
+def compile_rename_index(qualified_index_name: str, new_name: str) -> str:
+    """Rename an index, along with the constraint it backs."""
+
+    return 'ALTER INDEX {} RENAME TO {};'.format(qualified_index_name, new_name)
+
+
+def compile_grant(privilege: str, qualified_name: str, grantee: str,
+                  grant_option=False) -> str:
+    return 'GRANT {} ON {} TO {}{};'.format(
+        privilege, qualified_name, grantee,
+        ' WITH GRANT OPTION' if grant_option else '')
+
+
+def compile_range_clauses(expression: str, bounds) -> list:
+    """Predicates splitting an expression at ascending bound literals.
+
+    The first and last ranges are open ended so together the predicates
+    cover every non-null value.
+    """
+
+    bounds = list(bounds)
+
+    if not bounds:
+        return ['{} IS NOT NULL'.format(expression)]
+
+    clauses = ['{} < {}'.format(expression, bounds[0])]
+
+    for lower, upper in zip(bounds, bounds[1:]):
+        clauses.append('{0} >= {1} AND {0} < {2}'.format(expression, lower, upper))
+
+    clauses.append('{} >= {}'.format(expression, bounds[-1]))
+
+    return clauses
+
+
+def compile_tid(block: int) -> str:
+    return "'({:d},0)'::tid".format(block)
+
+
+def compile_analyze(qualified_name: str) -> str:
+    return 'ANALYZE {};'.format(qualified_name)
+
+
 class CreateTableAs:
     def __init__(self, table, parent_table, columns=('*',), *, clause):
         self.table = table
@@ -75,6 +292,24 @@ class CreateTableAs:
 
         return statement
 
+    def compile_create_empty(self):
+        """Create the table without rows, typed by the select."""
+
+        return '{} WITH NO DATA'.format(self.compile())
+
+    def compile_insert(self, range_clause=''):
+        """Insert the selected rows, optionally within a key range."""
+
+        clause = self.clause
+
+        if range_clause:
+            clause = '({}) AND {}'.format(clause, range_clause)
+
+        return 'INSERT INTO {table} {select} {clause}'.format(
+            table=self.table,
+            select=self._select_statement(),
+            clause='\n  WHERE %s' % clause)
+
     def _create_statement(self):
         return 'CREATE TABLE {} AS'.format(self.table)
 
@@ -117,10 +352,23 @@ class MaterializedView:
 
         return '{} AS \n {}'.format(self.compile_create(), self.query)
 
-    def refresh(self):
-        """Refresh a materialized view."""
+    def refresh(self, concurrently=False):
+        """Refresh a materialized view.
+
+        Concurrent refreshes do not block readers, but require a populated
+        view with a unique index on plain columns and no WHERE clause.
+        """
+
+        concurrently_str = 'CONCURRENTLY ' if concurrently else ''
+
+        return 'REFRESH MATERIALIZED VIEW {}{}'.format(concurrently_str,
+                                                       AsIs(self.name))
+
+    def create_unique_index(self, index_name, column_names):
+        """Unique index enabling concurrent refreshes."""
 
-        return 'REFRESH MATERIALIZED VIEW {}'.format(AsIs(self.name))
+        return compile_create_index(index_name, self.name, column_names,
+                                    unique=True)
 
     def drop(self):
         return 'DROP MATERIALIZED VIEW {}'.format(AsIs(self.name))
@@ -1,14 +1,29 @@
 """Data Manipulation Language for Postgresql."""
 
+import codecs
+import csv
+import io
 import warnings
+from collections import Counter, defaultdict, deque, namedtuple
+from functools import partial
+from itertools import islice
 
 from foil.iteration import chunks
+from psycopg2 import DataError, IntegrityError
 from psycopg2.extras import NamedTupleCursor
 
 from postpy.base import make_delete_table
+from postpy.connections import connect
+from postpy.data_types import text_parser
+from postpy.ddl import compile_qualified_name
 from postpy.formatting import PARAM_STYLES, PYFORMAT
+from postpy.instrumentation import execute, copy_expert
+from postpy.ledger import Progress
+from postpy.parallel import run_parallel
+from postpy.pg_encodings import sniff_encoding
 from postpy.sql import execute_transaction
-from postpy.dml_copy import BulkDmlPrimaryKey, CopyFromCsvBase, copy_from_csv_sql
+from postpy.dml_copy import (BulkDmlPrimaryKey, CopyFromCsvBase, copy_from_csv_sql,
+                             iter_csv_records)
 
 
 def create_insert_statement(qualified_name, column_names, table_alias='',
@@ -35,29 +50,165 @@ def insert(conn, qualified_name: str, column_names, records):
     with conn:
         with conn.cursor(cursor_factory=NamedTupleCursor) as cursor:
             for record in records:
-                cursor.execute(query, record)
+                execute(cursor, query, record)
 
 
-def insert_many(conn, tablename, column_names, records, chunksize=2500):
+def insert_many(conn, tablename, column_names, records, chunksize=2500,
+                checkpoint=None, commit_every=10):
     """Insert many records by chunking data into insert statements.
 
+    Without a checkpoint all records are inserted in one transaction.
+    With a ledger.Checkpoint, a transaction is committed every
+    commit_every chunks along with the load's position, and a restarted
+    load skips the records already committed. The final commit clears the
+    position, so the checkpoint can be reused for the next load.
+
     Notes
     -----
     records should be Iterable collection of namedtuples or tuples.
+    A resumed load must be given the same records in the same order.
+
+    Returns
+    -------
+    Number of records committed by the load, including earlier runs.
     """
 
-    groups = chunks(records, chunksize)
     column_str = ','.join(column_names)
     insert_template = 'INSERT INTO {table} ({columns}) VALUES {values}'.format(
         table=tablename, columns=column_str, values='{0}')
 
+    if checkpoint is not None:
+        return _insert_many_checkpointed(conn, insert_template, records,
+                                         chunksize, checkpoint, commit_every)
+
+    groups = chunks(records, chunksize)
+    count = 0
+
     with conn:
         with conn.cursor() as cursor:
             for recs in groups:
                 record_group = list(recs)
                 records_template_str = ','.join(['%s'] * len(record_group))
                 insert_query = insert_template.format(records_template_str)
-                cursor.execute(insert_query, record_group)
+                execute(cursor, insert_query, record_group)
+                count += len(record_group)
+
+    return count
+
+
+def _insert_many_checkpointed(conn, insert_template, records, chunksize,
+                              checkpoint, commit_every):
+    chunk_index, offset = checkpoint.position(conn)
+    records = iter(records)
+    deque(islice(records, offset), 0)
+    uncommitted = 0
+
+    try:
+        with conn.cursor() as cursor:
+            for recs in chunks(records, chunksize):
+                record_group = list(recs)
+                records_template_str = ','.join(['%s'] * len(record_group))
+                insert_query = insert_template.format(records_template_str)
+                execute(cursor, insert_query, record_group)
+                chunk_index += 1
+                offset += len(record_group)
+                uncommitted += 1
+
+                if uncommitted == commit_every:
+                    checkpoint.save(cursor, Progress(chunk_index, offset))
+                    conn.commit()
+                    uncommitted = 0
+
+            checkpoint.discard(cursor)
+    except BaseException:
+        conn.rollback()
+        raise
+
+    conn.commit()
+
+    return offset
+
+
+def insert_many_partitions(conn, table, column_names, records, chunksize=2500,
+                           workers=4, connection_factory=connect):
+    """Insert records directly into the leaf partitions of a table.
+
+    Records are routed client side by the table's partitioning and
+    inserted in chunks into each partition, bypassing tuple routing
+    through the parent. With one worker all chunks are inserted in one
+    transaction on conn, committed once every chunk is in and rolled
+    back otherwise. With more workers, chunks are inserted concurrently
+    on separate connections, each committed on its own.
+
+    Returns
+    -------
+    Record counts by partition name.
+    """
+
+    route = table.partitioning.router()
+    key_positions = [column_names.index(name)
+                     for name in table.partitioning.column_names]
+
+    def partition_key(record):
+        return tuple(record[position] for position in key_positions)
+
+    groups = _route_chunks(records, route, partition_key, chunksize)
+    counts = Counter()
+
+    def insert_chunks():
+        for partition_name, record_group in groups:
+            counts[partition_name] += len(record_group)
+            qualified_name = compile_qualified_name(partition_name, table.schema)
+            yield partition_name, partial(_insert_chunk, tablename=qualified_name,
+                                          column_names=column_names,
+                                          records=record_group)
+
+    _run_partition_jobs(conn, insert_chunks(), workers, connection_factory)
+
+    return dict(counts)
+
+
+def _route_chunks(records, route, partition_key, chunksize):
+    """Group records by partition, yielding full chunks as they fill."""
+
+    buffers = defaultdict(list)
+
+    for record in records:
+        partition_name = route(partition_key(record))
+        buffer = buffers[partition_name]
+        buffer.append(record)
+
+        if len(buffer) >= chunksize:
+            yield partition_name, buffer
+            buffers[partition_name] = []
+
+    for partition_name, buffer in buffers.items():
+        if buffer:
+            yield partition_name, buffer
+
+
+def _insert_chunk(conn, tablename, column_names, records):
+    statement = 'INSERT INTO {table} ({columns}) VALUES {values}'.format(
+        table=tablename, columns=','.join(column_names),
+        values=','.join(['%s'] * len(records)))
+
+    with conn.cursor() as cursor:
+        execute(cursor, statement, records)
+
+
+def _run_partition_jobs(conn, jobs, workers, connection_factory):
+    if workers > 1:
+        run_parallel(jobs, workers=workers, connection_factory=connection_factory)
+        return
+
+    try:
+        for _, job in jobs:
+            job(conn)
+    except BaseException:
+        conn.rollback()
+        raise
+
+    conn.commit()
 
 
 def upsert_records(conn, records, upsert_statement):
@@ -66,7 +217,7 @@ def upsert_records(conn, records, upsert_statement):
     with conn:
         with conn.cursor() as cursor:
             for record in records:
-                cursor.execute(upsert_statement, record)
+                execute(cursor, upsert_statement, record)
 
 
 def format_upsert(qualified_name, column_names, constraint, clause='',
@@ -180,18 +331,215 @@ def delete_joined_table_sql(qualified_name, removing_qualified_name, primary_key
     return delete_statement
 
 
-def compile_truncate_table(qualfied_name):
-    """Delete all data in table and vacuum."""
+def compile_truncate_table(qualfied_name, cascade=True):
+    """Delete all data in table and vacuum.
+
+    With cascade, tables referencing the table by foreign key are
+    truncated as well, otherwise such references make TRUNCATE fail.
+    """
+
+    if not cascade:
+        return 'TRUNCATE %s;' % qualfied_name
 
     return 'TRUNCATE %s CASCADE;' % qualfied_name
 
 
 class CopyFrom(CopyFromCsvBase):
-    """Copy from CSV file object."""
+    """Copy from CSV file object, returning the number of rows copied."""
+
+    def __call__(self, conn, file_object):
+        with conn.cursor() as cursor:
+            copy_expert(cursor, self.copy_sql, file_object)
+            return cursor.rowcount
+
+
+class CopyFromPartitions:
+    """Copy from CSV file object directly into leaf partitions.
+
+    Records are routed client side by the table's partitioning and
+    copied in chunks into each partition, bypassing tuple routing
+    through the parent. Raw record text is forwarded untouched. With one
+    worker all chunks are copied in one transaction on conn, committed
+    once every chunk is in and rolled back otherwise. With more workers,
+    chunks are copied concurrently on separate connections, each
+    committed on its own.
+    """
+
+    def __init__(self, table, workers=4, connection_factory=connect,
+                 chunksize=100000, delimiter=',', encoding='utf8', null_str='',
+                 header=True, escape_str='\\', quote_char='"',
+                 force_not_null=None, force_null=None):
+        self.table = table
+        self.workers = workers
+        self.connection_factory = connection_factory
+        self.chunksize = chunksize
+        self.header = header
+        self.null_str = null_str
+        self.quote_char = quote_char
+        self.escape_str = escape_str
+        self.route = table.partitioning.router()
+        self.copiers = {
+            partition.name: CopyFrom(partition, delimiter=delimiter,
+                                     encoding=encoding, null_str=null_str,
+                                     header=False, escape_str=escape_str,
+                                     quote_char=quote_char,
+                                     force_not_null=force_not_null,
+                                     force_null=force_null)
+            for partition in table.partition_tables()
+        }
+        self.dialect = csv_dialect(delimiter, quote_char, escape_str)
+        self.key_fields = [
+            (table.column_names.index(name),
+             text_parser(table.columns[table.column_names.index(name)].data_type))
+            for name in table.partitioning.column_names
+        ]
 
     def __call__(self, conn, file_object):
+        """Load file object, returning record counts by partition name."""
+
+        records = iter_csv_records(file_object, self.quote_char, self.escape_str)
+
+        if self.header:
+            next(records, None)
+
+        groups = _route_chunks(records, self.route, self.partition_key,
+                               self.chunksize)
+        counts = Counter()
+
+        def copy_chunks():
+            for partition_name, record_group in groups:
+                counts[partition_name] += len(record_group)
+                chunk = io.StringIO(''.join(record_group))
+                yield partition_name, partial(self.copiers[partition_name],
+                                              file_object=chunk)
+
+        _run_partition_jobs(conn, copy_chunks(), self.workers,
+                            self.connection_factory)
+
+        return dict(counts)
+
+    def partition_key(self, record):
+        fields = next(csv.reader([record], self.dialect))
+        values = (fields[position] for position, _ in self.key_fields)
+
+        return tuple(None if value == self.null_str else parse(value)
+                     for value, (_, parse) in zip(values, self.key_fields))
+
+
+class TolerantCopyResult(namedtuple('TolerantCopyResult', 'rows rejects')):
+    """Outcome of an error tolerant copy.
+
+    Attributes
+    ----------
+    rows : rows copied.
+    rejects : records rejected.
+    """
+
+    __slots__ = ()
+
+
+class CopyFromTolerant:
+    """Copy from CSV file object, setting aside records COPY rejects.
+
+    Records are copied in chunks, each under a savepoint. A chunk that
+    fails is rolled back to its savepoint and bisected until the failing
+    records are isolated, so good records still load by COPY. Rejected
+    records are written to reject_file as CSV rows of record number,
+    Postgres error message and raw record. Errors other than data and
+    integrity errors abort the copy.
+
+    Rows are copied in the caller's transaction, which is left open.
+    """
+
+    SAVEPOINT = 'tolerant_copy'
+
+    def __init__(self, table, reject_file=None, chunksize=10000, delimiter=',',
+                 encoding='utf8', null_str='', header=True, escape_str='\\',
+                 quote_char='"', force_not_null=None, force_null=None):
+        self.table = table
+        self.reject_writer = None
+        self.chunksize = chunksize
+        self.header = header
+        self.quote_char = quote_char
+        self.escape_str = escape_str
+        self.copier = CopyFrom(table, delimiter=delimiter, encoding=encoding,
+                               null_str=null_str, header=False,
+                               escape_str=escape_str, quote_char=quote_char,
+                               force_not_null=force_not_null,
+                               force_null=force_null)
+
+        if reject_file is not None:
+            self.reject_writer = csv.writer(reject_file, lineterminator='\n')
+
+    def __call__(self, conn, file_object) -> TolerantCopyResult:
+        records = iter_csv_records(file_object, self.quote_char, self.escape_str)
+
+        if self.header:
+            next(records, None)
+
+        numbered = enumerate(records, start=1)
+        rows = rejects = 0
+
         with conn.cursor() as cursor:
-            cursor.copy_expert(self.copy_sql, file_object)
+            for group in chunks(numbered, self.chunksize):
+                chunk_rows, chunk_rejects = self._copy_chunk(conn, cursor,
+                                                             list(group))
+                rows += chunk_rows
+                rejects += chunk_rejects
+
+        return TolerantCopyResult(rows, rejects)
+
+    def _copy_chunk(self, conn, cursor, group):
+        execute(cursor, 'SAVEPOINT {}'.format(self.SAVEPOINT))
+
+        try:
+            rows = self.copier(conn, io.StringIO(''.join(record for _, record
+                                                         in group)))
+        except (DataError, IntegrityError) as error:
+            execute(cursor, 'ROLLBACK TO SAVEPOINT {}'.format(self.SAVEPOINT))
+            execute(cursor, 'RELEASE SAVEPOINT {}'.format(self.SAVEPOINT))
+
+            if len(group) == 1:
+                self._reject(group[0], error)
+                return 0, 1
+
+            middle = len(group) // 2
+            first_rows, first_rejects = self._copy_chunk(conn, cursor,
+                                                         group[:middle])
+            last_rows, last_rejects = self._copy_chunk(conn, cursor,
+                                                       group[middle:])
+
+            return first_rows + last_rows, first_rejects + last_rejects
+
+        execute(cursor, 'RELEASE SAVEPOINT {}'.format(self.SAVEPOINT))
+
+        return rows, 0
+
+    def _reject(self, numbered_record, error):
+        if self.reject_writer is None:
+            return
+
+        number, record = numbered_record
+        message = error.diag.message_primary or str(error).strip()
+        self.reject_writer.writerow([number, message, record.rstrip('\r\n')])
+
+
+def csv_dialect(delimiter, quote_char, escape_str):
+    """csv module dialect matching the CSV options of a COPY statement."""
+
+    doublequote = escape_str == quote_char
+
+    class Dialect(csv.Dialect):
+        lineterminator = '\n'
+        quoting = csv.QUOTE_MINIMAL
+        skipinitialspace = False
+
+    Dialect.delimiter = delimiter
+    Dialect.quotechar = quote_char
+    Dialect.doublequote = doublequote
+    Dialect.escapechar = None if doublequote else escape_str
+
+    return Dialect
 
 
 class CopyFromUpsert(BulkDmlPrimaryKey):
@@ -236,7 +584,7 @@ class CopyFromDelete(BulkDmlPrimaryKey):
 
 def copy_from_csv(conn, file, qualified_name: str, delimiter=',', encoding='utf8',
                   null_str='', header=True, escape_str='\\', quote_char='"',
-                  force_not_null=None, force_null=None):
+                  force_not_null=None, force_null=None, freeze=False):
     """Copy file-like object to database table.
 
     Notes
@@ -254,8 +602,96 @@ def copy_from_csv(conn, file, qualified_name: str, delimiter=',', encoding='utf8
                                  null_str=null_str, header=header,
                                  escape_str=escape_str, quote_char=quote_char,
                                  force_not_null=force_not_null,
-                                 force_null=force_null)
+                                 force_null=force_null, freeze=freeze)
+
+    with conn:
+        with conn.cursor() as cursor:
+            copy_expert(cursor, copy_sql, file)
+
+
+def copy_from_csv_bytes(conn, file, qualified_name: str, encoding=None,
+                        delimiter=',', null_str='', header=True, escape_str='\\',
+                        quote_char='"', force_not_null=None, force_null=None,
+                        freeze=False, sample_size=65536) -> str:
+    """Copy a binary file-like object to a table without decoding it.
+
+    Raw bytes are sent to COPY with the file's encoding declared, so the
+    server transcodes instead of python decoding and re-encoding. A
+    leading utf-8 byte order mark is dropped.
+
+    Parameters
+    ----------
+    file : file-like object opened in binary mode.
+    encoding : file encoding, sniffed from the leading bytes if None.
+    sample_size : number of leading bytes sniffed.
+
+    Returns
+    -------
+    Encoding the file was loaded as.
+
+    Raises
+    ------
+    pg_encodings.UnsupportedEncodingError when postgres cannot ingest the
+    encoding.
+    """
+
+    sample = file.read(sample_size)
+
+    if not isinstance(sample, bytes):
+        raise TypeError('Passthrough copy requires a file opened in binary mode.')
+
+    if encoding is None:
+        encoding = sniff_encoding(sample)
+
+    if sample.startswith(codecs.BOM_UTF8):
+        sample = sample[len(codecs.BOM_UTF8):]
+
+    copy_sql = copy_from_csv_sql(qualified_name, delimiter, encoding,
+                                 null_str=null_str, header=header,
+                                 escape_str=escape_str, quote_char=quote_char,
+                                 force_not_null=force_not_null,
+                                 force_null=force_null, freeze=freeze)
 
     with conn:
         with conn.cursor() as cursor:
-            cursor.copy_expert(copy_sql, file)
+            copy_expert(cursor, copy_sql, _PrefixedReader(sample, file))
+
+    return encoding
+
+
+class _PrefixedReader:
+    """Binary reader replaying already read leading bytes."""
+
+    def __init__(self, prefix, file_object):
+        self.prefix = prefix
+        self.file_object = file_object
+
+    def read(self, size=-1):
+        if not self.prefix:
+            return self.file_object.read(size)
+
+        if size < 0:
+            chunk = self.prefix + self.file_object.read()
+        else:
+            chunk = self.prefix[:size]
+            self.prefix = self.prefix[size:]
+            return chunk
+
+        self.prefix = b''
+
+        return chunk
+
+    def readline(self, size=-1):
+        if not self.prefix:
+            return self.file_object.readline(size)
+
+        line, separator, rest = self.prefix.partition(b'\n')
+
+        if not separator:
+            line += self.file_object.readline()
+            rest = b''
+
+        line += separator
+        self.prefix = rest
+
+        return line
@@ -4,13 +4,14 @@ from abc import ABC, abstractmethod
 from random import randint
 
 from postpy.base import Table
+from postpy.instrumentation import execute, copy_expert
 from postpy.pg_encodings import get_postgres_encoding
 
 
 class CopyFromCsvBase(ABC):
     def __init__(self, table, delimiter=',', encoding='utf8',
                  null_str='', header=True, escape_str='\\', quote_char='"',
-                 force_not_null=None, force_null=None):
+                 force_not_null=None, force_null=None, freeze=False):
         self.table = table
         self.copy_table, self.copy_name = self.get_copy_table(self.table)
         self.copy_sql = copy_from_csv_sql(self.copy_name,
@@ -19,7 +20,8 @@ class CopyFromCsvBase(ABC):
                                           escape_str=escape_str,
                                           quote_char=quote_char,
                                           force_not_null=force_not_null,
-                                          force_null=force_null)
+                                          force_null=force_null,
+                                          freeze=freeze)
 
     def get_copy_table(self, table):
         return table, table.qualified_name
@@ -42,11 +44,16 @@ class BulkDmlPrimaryKey(CopyFromCsvBase):
         self.dml_query = self.make_dml_query()
 
     def __call__(self, conn, file_object):
+        """Apply file rows, returning the number of rows changed."""
+
         with conn.cursor() as cursor:
-            cursor.execute(self.copy_table.create_temporary_statement())
-            cursor.copy_expert(self.copy_sql, file_object)
-            cursor.execute(self.dml_query)
-            cursor.execute(self.copy_table.drop_temporary_statement())
+            execute(cursor, self.copy_table.create_temporary_statement())
+            copy_expert(cursor, self.copy_sql, file_object)
+            execute(cursor, self.dml_query)
+            row_count = cursor.rowcount
+            execute(cursor, self.copy_table.drop_temporary_statement())
+
+        return row_count
 
     def get_copy_table(self, table):
         temp_table = self.make_temp_copy_table()
@@ -58,6 +65,7 @@ class BulkDmlPrimaryKey(CopyFromCsvBase):
         temp_table_name = self.generate_temp_table_name()
         table_attributes = self.table._asdict()
         table_attributes['name'] = temp_table_name
+        table_attributes['partitioning'] = None
 
         return Table(**table_attributes)
 
@@ -82,8 +90,14 @@ class BulkDmlPrimaryKey(CopyFromCsvBase):
 
 def copy_from_csv_sql(qualified_name: str, delimiter=',', encoding='utf8',
                       null_str='', header=True, escape_str='\\', quote_char='"',
-                      force_not_null=None, force_null=None):
-    """Generate copy from csv statement."""
+                      force_not_null=None, force_null=None, freeze=False):
+    """Generate copy from csv statement.
+
+    Notes
+    -----
+    FREEZE requires the table to be created or truncated in the
+    current transaction.
+    """
 
     options = []
     options.append("DELIMITER '%s'" % delimiter)
@@ -104,6 +118,9 @@ def copy_from_csv_sql(qualified_name: str, delimiter=',', encoding='utf8',
     postgres_encoding = get_postgres_encoding(encoding)
     options.append("ENCODING '%s'" % postgres_encoding)
 
+    if freeze:
+        options.append('FREEZE')
+
     copy_sql = _format_copy_csv_sql(qualified_name, copy_options=options)
 
     return copy_sql
@@ -131,3 +148,99 @@ def _format_force_null(column_names):
     column_str = ', '.join(column_names)
     force_null_str = 'FORCE_NULL ({})'.format(column_str)
     return force_null_str
+
+
+def iter_csv_records(file_object, quote_char='"', escape_str='\\'):
+    """Split a CSV stream into raw record strings.
+
+    Quoted fields may span several lines. Record text, including its
+    line terminator, is passed through untouched so that quoting and
+    null markers survive re-sending the record to COPY.
+    """
+
+    in_quotes = False
+    lines = []
+
+    for line in file_object:
+        if quote_char in line:
+            in_quotes = _scan_quotes(line, in_quotes, quote_char, escape_str)
+        lines.append(line)
+
+        if not in_quotes:
+            yield ''.join(lines)
+            lines = []
+
+    if lines:
+        yield ''.join(lines)
+
+
+def _scan_quotes(line, in_quotes, quote_char, escape_str):
+    """Quote state at the end of line, following Postgres CSV rules."""
+
+    index = 0
+    length = len(line)
+    escapes = escape_str != quote_char
+    escaped = (quote_char, escape_str)
+
+    while index < length:
+        char = line[index]
+
+        if in_quotes:
+            if escapes and char == escape_str:
+                if line[index + 1:index + 2] in escaped:
+                    index += 2
+                    continue
+            if char == quote_char:
+                in_quotes = False
+        elif char == quote_char:
+            in_quotes = True
+        index += 1
+
+    return in_quotes
+
+
+class RecordStream:
+    """Readable file-like object over an iterable of record strings.
+
+    Lets generated or rewritten records feed COPY without first
+    materializing the whole file.
+    """
+
+    def __init__(self, records):
+        self._records = iter(records)
+        self._buffer = ''
+
+    def read(self, size=-1):
+        parts = [self._buffer]
+        length = len(self._buffer)
+
+        while size < 0 or length < size:
+            record = next(self._records, None)
+            if record is None:
+                break
+            parts.append(record)
+            length += len(record)
+
+        text = ''.join(parts)
+
+        if size < 0:
+            self._buffer = ''
+            return text
+
+        self._buffer = text[size:]
+
+        return text[:size]
+
+    def readline(self, size=-1):
+        if not self._buffer:
+            self._buffer = next(self._records, '')
+
+        line, separator, rest = self._buffer.partition('\n')
+        line += separator
+
+        if 0 <= size < len(line):
+            line, rest = line[:size], line[size:] + rest
+
+        self._buffer = rest
+
+        return line
@@ -1,6 +1,8 @@
 import psycopg2
 from psycopg2._psycopg import AsIs
 
+from postpy.instrumentation import execute
+
 
 def install_extension(conn, extension: str):
     """Install Postgres extension."""
@@ -8,7 +10,7 @@ def install_extension(conn, extension: str):
     query = 'CREATE EXTENSION IF NOT EXISTS "%s";'
 
     with conn.cursor() as cursor:
-        cursor.execute(query, (AsIs(extension),))
+        execute(cursor, query, (AsIs(extension),))
 
     installed = check_extension(conn, extension)
 
@@ -24,7 +26,7 @@ def check_extension(conn, extension: str) -> bool:
     query = 'SELECT installed_version FROM pg_available_extensions WHERE name=%s;'
 
     with conn.cursor() as cursor:
-        cursor.execute(query, (extension,))
+        execute(cursor, query, (extension,))
         result = cursor.fetchone()
 
     if result is None:
@@ -1,12 +1,18 @@
+import os
 from unittest.util import safe_repr
 from functools import wraps
 
+from psycopg2.extensions import connection
 from psycopg2.extras import NamedTupleCursor
 
+from postpy.base import Database
 from postpy.connections import connect
 
 
 PG_UPSERT_VERSION = (9, 5)
+TEST_SAVEPOINT = 'postpy_test'
+
+_WORKER_DATABASES = set()
 
 
 class PostgreSQLFixture(object):
@@ -40,6 +46,109 @@ class PostgresDmlFixture(PostgreSQLFixture):
         self.conn.commit()
 
 
+class RollbackConnection(connection):
+    """Connection confining a test's work to a transaction rolled back after it.
+
+    Between begin_test and end_test, commit only moves a savepoint and
+    rollback returns to the last such commit, so code under test may
+    commit as usual. Work is invisible to other connections and
+    autocommit or statements refusing transactions, i.e. VACUUM, fail.
+    """
+
+    def begin_test(self):
+        super().rollback()
+        self._in_test = True
+        self._savepoint()
+
+    def end_test(self):
+        self._in_test = False
+        super().rollback()
+
+    def commit(self):
+        if getattr(self, '_in_test', False):
+            with self.cursor() as cursor:
+                cursor.execute('RELEASE SAVEPOINT {}'.format(TEST_SAVEPOINT))
+            self._savepoint()
+        else:
+            super().commit()
+
+    def rollback(self):
+        if getattr(self, '_in_test', False):
+            with self.cursor() as cursor:
+                cursor.execute('ROLLBACK TO SAVEPOINT {}'.format(TEST_SAVEPOINT))
+        else:
+            super().rollback()
+
+    def _savepoint(self):
+        with self.cursor() as cursor:
+            cursor.execute('SAVEPOINT {}'.format(TEST_SAVEPOINT))
+
+
+def worker_database_name(name=None) -> str:
+    """Database name of the current pytest-xdist worker.
+
+    Worker databases are named after the test database and the
+    PYTEST_XDIST_WORKER id, or "main" when tests are not distributed.
+    """
+
+    name = name or os.environ['PGDATABASE']
+    worker = os.environ.get('PYTEST_XDIST_WORKER', 'main')
+
+    return '{}_{}'.format(name, worker)
+
+
+def create_database(name, template=None, **connection_parameters):
+    """Drop and create a database, copied from template when given.
+
+    Notes
+    -----
+    The template may not have other connections while it is copied.
+    """
+
+    conn = connect(database='postgres', **connection_parameters)
+    conn.autocommit = True
+    database = Database(name, template=template)
+
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(database.drop_statement())
+            cursor.execute(database.create_statement())
+    finally:
+        conn.close()
+
+
+class TemplateDatabaseFixture(PostgreSQLFixture):
+    """Run each test in a rolled back transaction of a worker database.
+
+    A database per pytest-xdist worker is copied from the template once
+    per process, avoiding DDL to set up and clean up each test. Objects
+    the tests share belong in the template, PGTEMPLATE by default, and
+    objects a test creates vanish with its rollback. Tests relying on
+    other connections seeing their commits need PostgreSQLFixture.
+    """
+
+    template = None
+
+    @classmethod
+    def setUpClass(cls):
+        template = cls.template or os.environ.get('PGTEMPLATE', 'template1')
+        database = worker_database_name()
+
+        if database not in _WORKER_DATABASES:
+            create_database(database, template=template)
+            _WORKER_DATABASES.add(database)
+
+        cls.conn = connect(database=database,
+                           connection_factory=RollbackConnection)
+        cls._prep()
+
+    def setUp(self):
+        self.conn.begin_test()
+
+    def tearDown(self):
+        self.conn.end_test()
+
+
 class PostgresStatementFixture(object):
     maxDiff = True
 
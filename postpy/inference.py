@@ -0,0 +1,206 @@
+"""Infer compact column types from delimited text.
+
+Each column keeps the candidate types its values still fit along with
+running bounds, so a whole stream is inferred in one pass with memory
+proportional to the number of columns.
+"""
+
+import csv
+import re
+from itertools import islice
+from uuid import UUID
+
+from postpy.base import Column, PrimaryKey, Table
+from postpy.data_types import parse_date, parse_timestamp
+
+
+__all__ = ('ColumnInference', 'TableInference', 'infer_table')
+
+BOOLEAN = 'boolean'
+INTEGER = 'integer'
+NUMERIC = 'numeric'
+DOUBLE = 'double precision'
+DATE = 'date'
+TIMESTAMP = 'timestamp'
+UUID_TYPE = 'uuid'
+TEXT = 'text'
+
+CANDIDATES = (BOOLEAN, INTEGER, NUMERIC, DOUBLE, DATE, TIMESTAMP, UUID_TYPE)
+INTEGER_TYPES = (('smallint', 2 ** 15), ('integer', 2 ** 31), ('bigint', 2 ** 63))
+MAX_NUMERIC_PRECISION = 1000
+
+_BOOLEANS = frozenset(['t', 'f', 'true', 'false', 'y', 'n', 'yes', 'no'])
+_INTEGER = re.compile(r'^[+-]?(0|[1-9]\d*)$')
+_DECIMAL = re.compile(r'^[+-]?(0|[1-9]\d*)(?:\.(\d*))?$')
+_FLOAT = re.compile(r'^[+-]?(?:(?:0|[1-9]\d*)(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?$|'
+                    r'^(?:[+-]?Infinity|NaN)$')
+
+
+class ColumnInference:
+    """Narrowest type of a column's text values.
+
+    Candidate types are discarded as values fail them. Integers with
+    leading zeros are kept as text, preserving codes such as zip codes.
+    """
+
+    def __init__(self, name: str, null_str=''):
+        self.name = name
+        self.null_str = null_str
+        self.candidates = list(CANDIDATES)
+        self.nullable = False
+        self.count = 0
+        self.min_integer = 0
+        self.max_integer = 0
+        self.integer_digits = 0
+        self.scale = 0
+
+    def update(self, value: str):
+        if value == self.null_str:
+            self.nullable = True
+            return
+
+        self.count += 1
+        self.candidates = [candidate for candidate in self.candidates
+                           if self._fits(candidate, value)]
+
+    @property
+    def data_type(self) -> str:
+        if not self.count or not self.candidates:
+            return TEXT
+
+        candidate = self.candidates[0]
+
+        if candidate == INTEGER:
+            for data_type, limit in INTEGER_TYPES:
+                if -limit <= self.min_integer and self.max_integer < limit:
+                    return data_type
+            candidate = NUMERIC
+
+        if candidate == NUMERIC:
+            precision = max(self.integer_digits + self.scale, 1)
+
+            if precision > MAX_NUMERIC_PRECISION:
+                return NUMERIC
+
+            return '{}({:d}, {:d})'.format(NUMERIC, precision, self.scale)
+
+        return candidate
+
+    def column(self, nullable=None) -> Column:
+        if nullable is None:
+            nullable = self.nullable
+
+        return Column(self.name, self.data_type, nullable)
+
+    def _fits(self, candidate, value):
+        if candidate == BOOLEAN:
+            return value.lower() in _BOOLEANS
+
+        if candidate == INTEGER:
+            if not _INTEGER.match(value):
+                return False
+            number = int(value)
+            self.min_integer = min(self.min_integer, number)
+            self.max_integer = max(self.max_integer, number)
+            return True
+
+        if candidate == NUMERIC:
+            match = _DECIMAL.match(value)
+            if not match:
+                return False
+            integer_part, fraction = match.groups()
+            self.integer_digits = max(self.integer_digits,
+                                      len(integer_part.lstrip('0')))
+            self.scale = max(self.scale, len(fraction or ''))
+            return True
+
+        if candidate == DOUBLE:
+            return bool(_FLOAT.match(value))
+
+        parse = _PARSERS[candidate]
+
+        try:
+            parse(value)
+        except ValueError:
+            return False
+
+        return True
+
+    def __repr__(self):
+        return '<ColumnInference {} {}>'.format(self.name, self.data_type)
+
+
+def _parse_timestamp(value):
+    try:
+        return parse_date(value)
+    except ValueError:
+        return parse_timestamp(value)
+
+
+_PARSERS = {DATE: parse_date, TIMESTAMP: _parse_timestamp, UUID_TYPE: UUID}
+
+
+class TableInference:
+    """Accumulate column types over records of text fields."""
+
+    def __init__(self, column_names, null_str=''):
+        self.columns = [ColumnInference(name, null_str=null_str)
+                        for name in column_names]
+        self.complete = True
+
+    def update(self, record):
+        for column, value in zip(self.columns, record):
+            column.update(value)
+
+    def table(self, name: str, primary_key=(), schema='public') -> Table:
+        """Table declaration from the inferred columns.
+
+        Columns are nullable when nulls were seen or when only a sample of
+        the records was inspected, except for primary key columns.
+        """
+
+        columns = []
+
+        for column in self.columns:
+            nullable = column.name not in primary_key and (
+                column.nullable or not self.complete)
+            columns.append(column.column(nullable=nullable))
+
+        return Table(name, columns, PrimaryKey(list(primary_key)), schema=schema)
+
+
+def infer_table(name: str, file_object, sample_size=None, primary_key=(),
+                schema='public', header=True, column_names=None, null_str='',
+                delimiter=',', quote_char='"') -> Table:
+    """Infer a table declaration from a CSV file object.
+
+    Parameters
+    ----------
+    name : table name.
+    file_object : CSV file-like object, read as a stream.
+    sample_size : number of records inspected, the whole stream if None.
+    primary_key : primary key column names.
+    schema : table schema.
+    header : first record holds the column names.
+    column_names : column names when the file has no header.
+    null_str : text representing NULL.
+    delimiter : field delimiter.
+    quote_char : field quote character.
+    """
+
+    reader = csv.reader(file_object, delimiter=delimiter, quotechar=quote_char)
+
+    if header:
+        header_names = next(reader)
+        column_names = column_names or header_names
+
+    inference = TableInference(column_names, null_str=null_str)
+    records = reader if sample_size is None else islice(reader, sample_size)
+
+    for record in records:
+        inference.update(record)
+
+    if sample_size is not None:
+        inference.complete = next(reader, None) is None
+
+    return inference.table(name, primary_key=primary_key, schema=schema)
@@ -0,0 +1,259 @@
+"""Statement execution hooks for timing and profiling.
+
+Hooks are plain callables. Before hooks receive ``(cursor, statement,
+params)`` prior to execution, after hooks receive a ``StatementRecord``
+once the statement completes. With no hooks registered, statements are
+executed directly on the cursor without any timing overhead.
+"""
+
+import hashlib
+import json
+import re
+import threading
+from bisect import bisect_left
+from collections import namedtuple
+from contextlib import contextmanager
+from time import perf_counter
+
+
+__all__ = ('StatementRecord', 'StatementHistogram', 'execute', 'copy_expert',
+           'register_before_execute', 'register_after_execute',
+           'remove_hook', 'clear_hooks', 'registered_hooks', 'fingerprint',
+           'normalize_statement')
+
+
+_BEFORE_EXECUTE = []
+_AFTER_EXECUTE = []
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'(?<![A-Za-z])\d+(?:\.\d+)?')
+_PARAMETER_TUPLE = r'\((?:\s*%s\s*,)*\s*%s\s*\)'
+_PARAMETER_GROUP = re.compile(
+    r'{0}(?:\s*,\s*{0})+'.format(_PARAMETER_TUPLE))
+_PARAMETER_LIST = re.compile(r'%s(?:\s*,\s*%s)+')
+_WHITESPACE = re.compile(r'\s+')
+
+
+class StatementRecord(namedtuple('StatementRecord',
+                                 'fingerprint statement params rows bytes '
+                                 'duration connection')):
+    """Timing record of a single executed statement.
+
+    Attributes
+    ----------
+    fingerprint : hash of the normalized statement shape.
+    statement : statement as sent to the cursor.
+    params : statement parameters.
+    rows : cursor row count, -1 when unknown.
+    bytes : query bytes sent, or stream bytes read for COPY.
+    duration : wall time in seconds.
+    connection : connection the statement ran on.
+    """
+
+    __slots__ = ()
+
+
+def register_before_execute(hook):
+    """Register ``hook(cursor, statement, params)`` before each statement."""
+
+    _BEFORE_EXECUTE.append(hook)
+
+    return hook
+
+
+def register_after_execute(hook):
+    """Register ``hook(record)`` after each statement completes."""
+
+    _AFTER_EXECUTE.append(hook)
+
+    return hook
+
+
+def remove_hook(hook):
+    """Unregister a before or after hook."""
+
+    for hooks in (_BEFORE_EXECUTE, _AFTER_EXECUTE):
+        while hook in hooks:
+            hooks.remove(hook)
+
+
+def clear_hooks():
+    """Unregister all hooks."""
+
+    del _BEFORE_EXECUTE[:]
+    del _AFTER_EXECUTE[:]
+
+
+@contextmanager
+def registered_hooks(before=(), after=()):
+    """Register hooks for the duration of a block."""
+
+    for hook in before:
+        register_before_execute(hook)
+    for hook in after:
+        register_after_execute(hook)
+    try:
+        yield
+    finally:
+        for hook in (*before, *after):
+            remove_hook(hook)
+
+
+def execute(cursor, statement, params=None):
+    """Execute a statement on cursor, notifying registered hooks."""
+
+    if not (_BEFORE_EXECUTE or _AFTER_EXECUTE):
+        cursor.execute(statement, params)
+        return
+
+    _run_before_hooks(cursor, statement, params)
+    start = perf_counter()
+    cursor.execute(statement, params)
+    duration = perf_counter() - start
+    query_bytes = len(cursor.query) if cursor.query else 0
+    _run_after_hooks(cursor, statement, params, query_bytes, duration)
+
+
+def copy_expert(cursor, statement, file_object, size=8192):
+    """Run a COPY statement on cursor, notifying registered hooks."""
+
+    if not (_BEFORE_EXECUTE or _AFTER_EXECUTE):
+        cursor.copy_expert(statement, file_object, size)
+        return
+
+    _run_before_hooks(cursor, statement, None)
+    counting_file = _CountingReader(file_object)
+    start = perf_counter()
+    cursor.copy_expert(statement, counting_file, size)
+    duration = perf_counter() - start
+    _run_after_hooks(cursor, statement, None, counting_file.bytes_read, duration)
+
+
+def _run_before_hooks(cursor, statement, params):
+    for hook in tuple(_BEFORE_EXECUTE):
+        hook(cursor, statement, params)
+
+
+def _run_after_hooks(cursor, statement, params, query_bytes, duration):
+    if not _AFTER_EXECUTE:
+        return
+
+    record = StatementRecord(fingerprint(statement), statement, params,
+                             cursor.rowcount, query_bytes, duration,
+                             cursor.connection)
+
+    for hook in tuple(_AFTER_EXECUTE):
+        hook(record)
+
+
+class _CountingReader:
+    """File wrapper tallying bytes read by COPY."""
+
+    def __init__(self, file_object):
+        self.file_object = file_object
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        return self._count(self.file_object.read(size))
+
+    def readline(self, size=-1):
+        return self._count(self.file_object.readline(size))
+
+    def _count(self, chunk):
+        if isinstance(chunk, str):
+            self.bytes_read += len(chunk.encode())
+        else:
+            self.bytes_read += len(chunk)
+        return chunk
+
+
+def normalize_statement(statement) -> str:
+    """Reduce a statement to its shape.
+
+    Literals become ``?``, runs of parameter placeholders collapse into a
+    single placeholder, and whitespace is squeezed, so that statements
+    differing only by values or batch size share a shape.
+    """
+
+    if isinstance(statement, bytes):
+        statement = statement.decode()
+    statement = str(statement)
+    statement = _STRING_LITERAL.sub('?', statement)
+    statement = _NUMBER_LITERAL.sub('?', statement)
+    statement = _PARAMETER_GROUP.sub('(%s)', statement)
+    statement = _PARAMETER_LIST.sub('%s', statement)
+    statement = _WHITESPACE.sub(' ', statement).strip()
+
+    return statement
+
+
+def fingerprint(statement) -> str:
+    """Short stable hash of the normalized statement."""
+
+    normalized = normalize_statement(statement)
+
+    return hashlib.md5(normalized.encode()).hexdigest()[:16]
+
+
+class StatementHistogram:
+    """In-memory duration histogram aggregated by statement fingerprint.
+
+    Register an instance as an after hook::
+
+        histogram = StatementHistogram()
+        register_after_execute(histogram)
+
+    Attributes
+    ----------
+    bounds : upper bucket bounds in seconds, with an overflow bucket.
+    statistics : per fingerprint aggregates.
+    """
+
+    BOUNDS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1., 5., 10., 60.)
+
+    def __init__(self, bounds=BOUNDS):
+        self.bounds = tuple(bounds)
+        self.statistics = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, record: StatementRecord):
+        bucket = bisect_left(self.bounds, record.duration)
+
+        with self._lock:
+            stats = self.statistics.get(record.fingerprint)
+
+            if stats is None:
+                stats = self.statistics[record.fingerprint] = {
+                    'statement': normalize_statement(record.statement),
+                    'calls': 0,
+                    'rows': 0,
+                    'bytes': 0,
+                    'total_time': 0.,
+                    'min_time': record.duration,
+                    'max_time': record.duration,
+                    'histogram': [0] * (len(self.bounds) + 1)
+                }
+            stats['calls'] += 1
+            stats['rows'] += max(record.rows, 0)
+            stats['bytes'] += record.bytes
+            stats['total_time'] += record.duration
+            stats['min_time'] = min(stats['min_time'], record.duration)
+            stats['max_time'] = max(stats['max_time'], record.duration)
+            stats['histogram'][bucket] += 1
+
+    def reset(self):
+        with self._lock:
+            self.statistics.clear()
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            statements = {key: dict(value, histogram=list(value['histogram']))
+                          for key, value in self.statistics.items()}
+
+        return {'bounds': list(self.bounds), 'statements': statements}
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def dump(self, file_object, **kwargs):
+        json.dump(self.to_dict(), file_object, **kwargs)
@@ -0,0 +1,249 @@
+"""Ledger of loaded files to make loads idempotent.
+
+Files are identified by a hash of their content, computed while COPY
+reads them, and recorded in the same transaction as the load. A file
+whose hash is already recorded for the table is not loaded again.
+
+Long chunked loads record their progress as checkpoints, committed with
+the chunks they cover, so a restarted load resumes after the last
+committed chunk. A completed load clears its checkpoint.
+"""
+
+import hashlib
+from collections import namedtuple
+from time import perf_counter
+
+from postpy.instrumentation import execute
+
+
+__all__ = ('LoadRecord', 'HashingReader', 'create_ledger', 'is_loaded',
+           'load_once', 'Progress', 'Checkpoint')
+
+LEDGER_TABLE = 'public.load_ledger'
+PROGRESS_TABLE = 'public.load_progress'
+
+
+class LoadRecord(namedtuple('LoadRecord', 'table_name content_hash rows duration '
+                                          'skipped')):
+    """Outcome of a ledgered load.
+
+    Attributes
+    ----------
+    table_name : loaded table.
+    content_hash : hex digest of the file content.
+    rows : rows reported by the loader, None when unknown.
+    duration : seconds spent loading.
+    skipped : file was already recorded and not loaded again.
+    """
+
+    __slots__ = ()
+
+
+class HashingReader:
+    """File wrapper hashing content as it is read.
+
+    Text is hashed as utf-8 bytes.
+    """
+
+    def __init__(self, file_object, algorithm='sha256'):
+        self.file_object = file_object
+        self.hash = hashlib.new(algorithm)
+
+    def read(self, size=-1):
+        return self._update(self.file_object.read(size))
+
+    def readline(self, size=-1):
+        return self._update(self.file_object.readline(size))
+
+    def hexdigest(self, drain=False) -> str:
+        """Digest of the content read, or of the whole file with drain."""
+
+        if drain:
+            while self.read(65536):
+                pass
+
+        return self.hash.hexdigest()
+
+    def _update(self, chunk):
+        if isinstance(chunk, str):
+            self.hash.update(chunk.encode('utf-8'))
+        else:
+            self.hash.update(chunk)
+        return chunk
+
+
+def create_ledger(conn, ledger=LEDGER_TABLE):
+    """Create the ledger table if missing."""
+
+    statement = (
+        'CREATE TABLE IF NOT EXISTS {} (\n'
+        '  table_name TEXT NOT NULL,\n'
+        '  content_hash TEXT NOT NULL,\n'
+        '  rows BIGINT,\n'
+        '  duration DOUBLE PRECISION NOT NULL,\n'
+        '  loaded_at TIMESTAMP NOT NULL DEFAULT now(),\n'
+        '  PRIMARY KEY (table_name, content_hash)\n'
+        ');'.format(ledger))
+
+    with conn.cursor() as cursor:
+        execute(cursor, statement)
+    conn.commit()
+
+
+def is_loaded(conn, table_name: str, content_hash: str, ledger=LEDGER_TABLE) -> bool:
+    """Whether a file's content is recorded as loaded into a table."""
+
+    statement = ('SELECT EXISTS (SELECT 1 FROM {} WHERE table_name = %s'
+                 ' AND content_hash = %s)'.format(ledger))
+
+    with conn.cursor() as cursor:
+        execute(cursor, statement, (table_name, content_hash))
+        return cursor.fetchone()[0]
+
+
+def load_once(conn, loader, file_object, table_name=None, content_hash=None,
+              ledger=LEDGER_TABLE, algorithm='sha256') -> LoadRecord:
+    """Load a file unless its content was already loaded into the table.
+
+    The file is hashed while the loader reads it. The ledger row is then
+    inserted in the load's transaction, and if the content turns out to
+    be recorded already, including by a concurrent load, the load is
+    rolled back. Loads that fail, i.e. on duplicate keys, are skipped
+    when the rest of the file hashes to recorded content. A known content
+    hash short-circuits before loading.
+
+    Parameters
+    ----------
+    conn : database connection.
+    loader : callable(conn, file_object) reading the whole file, i.e.
+        CopyFrom or CopyFromUpsert, optionally returning a row count.
+    file_object : file-like object to load.
+    table_name : ledger table key, defaults to the loader's table.
+    content_hash : precomputed digest of the file content.
+    ledger : qualified name of the ledger table.
+    algorithm : hashlib algorithm of the content hash.
+    """
+
+    if table_name is None:
+        table_name = loader.table.qualified_name
+
+    if content_hash is not None and is_loaded(conn, table_name, content_hash,
+                                              ledger=ledger):
+        conn.rollback()
+        return LoadRecord(table_name, content_hash, None, 0., True)
+
+    reader = HashingReader(file_object, algorithm=algorithm)
+    start = perf_counter()
+    statement = ('INSERT INTO {} (table_name, content_hash, rows, duration)'
+                 ' VALUES (%s, %s, %s, %s)'
+                 ' ON CONFLICT (table_name, content_hash) DO NOTHING'
+                 ' RETURNING content_hash'.format(ledger))
+
+    try:
+        rows = loader(conn, reader)
+    except Exception:
+        conn.rollback()
+        if content_hash is None:
+            content_hash = reader.hexdigest(drain=True)
+            if is_loaded(conn, table_name, content_hash, ledger=ledger):
+                conn.rollback()
+                return LoadRecord(table_name, content_hash, None,
+                                  perf_counter() - start, True)
+        raise
+
+    try:
+        rows = rows if isinstance(rows, int) else None
+        content_hash = content_hash or reader.hexdigest()
+        duration = perf_counter() - start
+
+        with conn.cursor() as cursor:
+            execute(cursor, statement, (table_name, content_hash, rows, duration))
+            recorded = cursor.fetchone() is not None
+    except BaseException:
+        conn.rollback()
+        raise
+
+    if not recorded:
+        conn.rollback()
+        return LoadRecord(table_name, content_hash, None, duration, True)
+
+    conn.commit()
+
+    return LoadRecord(table_name, content_hash, rows, duration, False)
+
+
+class Progress(namedtuple('Progress', 'chunk_index offset')):
+    """Committed position of a chunked load.
+
+    Attributes
+    ----------
+    chunk_index : number of chunks committed.
+    offset : number of source records committed.
+    """
+
+    __slots__ = ()
+
+
+class Checkpoint:
+    """Named progress marker of a chunked load.
+
+    Markers are saved in the load's transaction, so they never run ahead
+    of the committed rows.
+    """
+
+    def __init__(self, name: str, progress_table=PROGRESS_TABLE):
+        self.name = name
+        self.progress_table = progress_table
+
+    def create(self, conn):
+        """Create the progress table if missing."""
+
+        statement = (
+            'CREATE TABLE IF NOT EXISTS {} (\n'
+            '  name TEXT PRIMARY KEY,\n'
+            '  chunk_index BIGINT NOT NULL,\n'
+            '  record_offset BIGINT NOT NULL,\n'
+            '  updated_at TIMESTAMP NOT NULL DEFAULT now()\n'
+            ');'.format(self.progress_table))
+
+        with conn.cursor() as cursor:
+            execute(cursor, statement)
+        conn.commit()
+
+    def position(self, conn) -> Progress:
+        """Last committed position, the start when none was saved."""
+
+        statement = ('SELECT chunk_index, record_offset FROM {}'
+                     ' WHERE name = %s'.format(self.progress_table))
+
+        with conn.cursor() as cursor:
+            execute(cursor, statement, (self.name,))
+            row = cursor.fetchone()
+
+        return Progress(*row) if row else Progress(0, 0)
+
+    def save(self, cursor, progress: Progress):
+        """Save a position within the current transaction."""
+
+        statement = (
+            'INSERT INTO {} (name, chunk_index, record_offset)'
+            ' VALUES (%s, %s, %s)'
+            ' ON CONFLICT (name) DO UPDATE SET chunk_index = EXCLUDED.chunk_index,'
+            ' record_offset = EXCLUDED.record_offset, updated_at = now()'.format(
+                self.progress_table))
+
+        execute(cursor, statement, (self.name,) + tuple(progress))
+
+    def discard(self, cursor):
+        """Forget the position within the current transaction."""
+
+        statement = 'DELETE FROM {} WHERE name = %s'.format(self.progress_table)
+
+        execute(cursor, statement, (self.name,))
+
+    def clear(self, conn):
+        """Forget the position so the load runs again from the start."""
+
+        with conn.cursor() as cursor:
+            self.discard(cursor)
+        conn.commit()
@@ -0,0 +1,290 @@
+"""Run database jobs concurrently, one connection per worker thread."""
+
+import threading
+from collections import OrderedDict, defaultdict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from functools import partial
+from time import perf_counter
+
+from postpy.connections import connect
+from postpy.instrumentation import execute
+
+
+__all__ = ('JobResult', 'run_parallel', 'execute_parallel', 'run_dag',
+           'critical_path')
+
+
+class JobResult(namedtuple('JobResult', 'name result duration')):
+    __slots__ = ()
+
+
+def run_parallel(jobs, workers=4, connection_factory=connect,
+                 session_statements=(), autocommit=False) -> list:
+    """Run ``job(conn)`` callables concurrently.
+
+    Each worker thread opens its own connection, runs the session
+    statements once, then takes jobs until none remain. Jobs are drawn
+    lazily, so a generator can stream work without materializing it.
+    Job collections with a length open at most one connection per job.
+    Without autocommit each job is committed on success and rolled back
+    on error. Remaining jobs are abandoned after the first error, which
+    is re-raised.
+
+    Parameters
+    ----------
+    jobs : iterable of (name, callable) pairs.
+    workers : number of concurrent connections.
+    connection_factory : callable returning a new connection.
+    session_statements : statements run on each connection, i.e. SET.
+    autocommit : run worker connections in autocommit mode.
+
+    Returns
+    -------
+    JobResult for each job, in submission order.
+    """
+
+    if hasattr(jobs, '__len__'):
+        workers = min(workers, len(jobs))
+
+    workers = max(workers, 1)
+    pending = enumerate(jobs)
+    pending_lock = threading.Lock()
+    results = {}
+    failed = threading.Event()
+
+    def next_job():
+        with pending_lock:
+            return next(pending, None)
+
+    def work():
+        with closing(_open_session(connection_factory, session_statements,
+                                   autocommit)) as conn:
+            while not failed.is_set():
+                try:
+                    item = next_job()
+                except BaseException:
+                    failed.set()
+                    raise
+                if item is None:
+                    return
+                position, (name, job) = item
+                results[position] = _run_job(conn, name, job, failed)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(work) for _ in range(workers)]
+
+    for future in futures:
+        future.result()
+
+    return [results[position] for position in sorted(results)]
+
+
+def _open_session(connection_factory, session_statements, autocommit):
+    conn = connection_factory()
+
+    try:
+        conn.autocommit = autocommit
+
+        with conn.cursor() as cursor:
+            for statement in session_statements:
+                execute(cursor, statement)
+        if not autocommit:
+            conn.commit()
+    except BaseException:
+        conn.close()
+        raise
+
+    return conn
+
+
+def _run_job(conn, name, job, failed):
+    start = perf_counter()
+
+    try:
+        result = job(conn)
+        if not conn.autocommit:
+            conn.commit()
+    except BaseException:
+        failed.set()
+        if not conn.closed and not conn.autocommit:
+            conn.rollback()
+        raise
+
+    return JobResult(name, result, perf_counter() - start)
+
+
+def execute_parallel(statements, workers=4, connection_factory=connect,
+                     session_statements=(), autocommit=False) -> list:
+    """Execute statements concurrently, each in its own transaction."""
+
+    jobs = ((statement, partial(_execute_statement, statement=statement))
+            for statement in statements)
+
+    if hasattr(statements, '__len__'):
+        jobs = list(jobs)
+
+    return run_parallel(jobs, workers=workers,
+                        connection_factory=connection_factory,
+                        session_statements=session_statements,
+                        autocommit=autocommit)
+
+
+def _execute_statement(conn, statement):
+    with conn.cursor() as cursor:
+        execute(cursor, statement)
+
+
+def run_dag(jobs, dependencies, workers=4, connection_factory=connect,
+            session_statements=(), autocommit=False) -> list:
+    """Run ``job(conn)`` callables concurrently in dependency order.
+
+    A job starts once every job it depends on has finished. Independent
+    jobs run at the same time, up to ``workers`` connections. Remaining
+    jobs are abandoned after the first error, which is re-raised.
+
+    Parameters
+    ----------
+    jobs : iterable of (name, callable) pairs.
+    dependencies : mapping of job name to the names it depends on.
+        Names without a job are ignored.
+    workers : number of concurrent connections.
+    connection_factory : callable returning a new connection.
+    session_statements : statements run on each connection, i.e. SET.
+    autocommit : run worker connections in autocommit mode.
+
+    Returns
+    -------
+    JobResult for each job run, in submission order.
+    """
+
+    jobs = OrderedDict(jobs)
+    graph = {name: set(dependencies.get(name, ())) & set(jobs) for name in jobs}
+    failed = threading.Event()
+    scheduler = _DagScheduler(graph, topological_order(graph), failed)
+    results = {}
+
+    def work():
+        with closing(_open_session(connection_factory, session_statements,
+                                   autocommit)) as conn:
+            for name in iter(scheduler.next_ready, None):
+                try:
+                    results[name] = _run_job(conn, name, jobs[name], failed)
+                finally:
+                    scheduler.finish(name)
+
+    worker_count = max(min(workers, len(jobs)), 1)
+
+    with ThreadPoolExecutor(max_workers=worker_count) as executor:
+        futures = [executor.submit(work) for _ in range(worker_count)]
+
+    for future in futures:
+        future.result()
+
+    return [results[name] for name in jobs if name in results]
+
+
+class _DagScheduler:
+    """Hands out job names once the jobs they depend on have finished."""
+
+    def __init__(self, graph, order, failed):
+        self.dependents = defaultdict(list)
+
+        for name in order:
+            for dependency in graph[name]:
+                self.dependents[dependency].append(name)
+
+        self.remaining = {name: len(graph[name]) for name in graph}
+        self.ready = deque(name for name in order if not self.remaining[name])
+        self.failed = failed
+        self.condition = threading.Condition()
+        self.running = 0
+
+    def next_ready(self):
+        """Wait for a ready job, None once all ran or a job failed."""
+
+        with self.condition:
+            while not self.failed.is_set():
+                if self.ready:
+                    self.running += 1
+                    return self.ready.popleft()
+                if not self.running:
+                    return None
+                self.condition.wait()
+
+    def finish(self, name):
+        with self.condition:
+            self.running -= 1
+            for dependent in self.dependents[name]:
+                self.remaining[dependent] -= 1
+                if not self.remaining[dependent]:
+                    self.ready.append(dependent)
+            self.condition.notify_all()
+
+
+def critical_path(results, dependencies) -> list:
+    """Chain of dependent jobs with the longest total duration.
+
+    Parameters
+    ----------
+    results : JobResult of each job run, i.e. from run_dag.
+    dependencies : mapping of job name to the names it depends on.
+
+    Returns
+    -------
+    Job names of the chain, dependencies first.
+    """
+
+    durations = {result.name: result.duration for result in results}
+    graph = {name: set(dependencies.get(name, ())) & set(durations)
+             for name in durations}
+    finish = {}
+    previous = {}
+
+    for name in topological_order(graph):
+        before = max(sorted(graph[name]), key=finish.get, default=None)
+        previous[name] = before
+        finish[name] = durations[name] + (finish[before] if before else 0.)
+
+    name = max(sorted(finish), key=finish.get, default=None)
+    path = []
+
+    while name is not None:
+        path.append(name)
+        name = previous[name]
+
+    return path[::-1]
+
+
+def topological_order(graph) -> list:
+    """Order names so each follows its dependencies.
+
+    Parameters
+    ----------
+    graph : mapping of name to the names it depends on.
+
+    Raises
+    ------
+    ValueError when the dependencies contain a cycle.
+    """
+
+    remaining = {name: set(dependencies) for name, dependencies in graph.items()}
+    order = []
+    ready = deque(name for name, dependencies in remaining.items()
+                  if not dependencies)
+
+    while ready:
+        name = ready.popleft()
+        order.append(name)
+
+        for dependent, dependencies in remaining.items():
+            if name in dependencies:
+                dependencies.remove(name)
+                if not dependencies:
+                    ready.append(dependent)
+
+    if len(order) != len(remaining):
+        cycle = sorted(set(remaining) - set(order))
+        raise ValueError('Dependency cycle detected.', cycle)
+
+    return order
@@ -1,4 +1,5 @@
-from encodings import normalize_encoding, aliases
+import codecs
+from functools import lru_cache
 from types import MappingProxyType
 
 from psycopg2.extensions import encodings as _PG_ENCODING_MAP
@@ -6,17 +7,108 @@ from psycopg2.extensions import encodings as _PG_ENCODING_MAP
 
 PG_ENCODING_MAP = MappingProxyType(_PG_ENCODING_MAP)
 
-# python to postgres encoding map
+# python codec to canonical postgres encoding name
 _PYTHON_ENCODING_MAP = {
-    v: k for k, v in PG_ENCODING_MAP.items()
+    'ascii': 'SQL_ASCII',
+    'big5': 'BIG5',
+    'cp866': 'WIN866',
+    'cp874': 'WIN874',
+    'cp932': 'SJIS',
+    'cp949': 'UHC',
+    'cp950': 'BIG5',
+    'cp1250': 'WIN1250',
+    'cp1251': 'WIN1251',
+    'cp1252': 'WIN1252',
+    'cp1253': 'WIN1253',
+    'cp1254': 'WIN1254',
+    'cp1255': 'WIN1255',
+    'cp1256': 'WIN1256',
+    'cp1257': 'WIN1257',
+    'cp1258': 'WIN1258',
+    'euc_jis_2004': 'EUC_JIS_2004',
+    'euc_jp': 'EUC_JP',
+    'euc_kr': 'EUC_KR',
+    'gb18030': 'GB18030',
+    'gb2312': 'EUC_CN',
+    'gbk': 'GBK',
+    'iso8859_1': 'LATIN1',
+    'iso8859_2': 'LATIN2',
+    'iso8859_3': 'LATIN3',
+    'iso8859_4': 'LATIN4',
+    'iso8859_5': 'ISO_8859_5',
+    'iso8859_6': 'ISO_8859_6',
+    'iso8859_7': 'ISO_8859_7',
+    'iso8859_8': 'ISO_8859_8',
+    'iso8859_9': 'LATIN5',
+    'iso8859_10': 'LATIN6',
+    'iso8859_13': 'LATIN7',
+    'iso8859_14': 'LATIN8',
+    'iso8859_15': 'LATIN9',
+    'iso8859_16': 'LATIN10',
+    'johab': 'JOHAB',
+    'koi8_r': 'KOI8R',
+    'koi8_u': 'KOI8U',
+    'shift_jis': 'SJIS',
+    'shift_jis_2004': 'SHIFT_JIS_2004',
+    'utf_8': 'UTF8',
+    'utf_8_sig': 'UTF8',
 }
 
+# byte order marks of encodings postgres cannot ingest
+_UNSUPPORTED_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf_32_le'),
+    (codecs.BOM_UTF32_BE, 'utf_32_be'),
+    (codecs.BOM_UTF16_LE, 'utf_16_le'),
+    (codecs.BOM_UTF16_BE, 'utf_16_be')
+)
 
+_UNSUPPORTED_MESSAGE = ('Encoding is not supported by postgres, convert the file'
+                        ' to utf-8 or another server supported encoding first.')
+
+
+class UnsupportedEncodingError(LookupError):
+    """Encoding unknown to python or not accepted by postgres."""
+
+
+@lru_cache(maxsize=None)
 def get_postgres_encoding(python_encoding: str) -> str:
-    """Python to postgres encoding map."""
+    """Postgres name of a python encoding, i.e. UTF8 for utf-8.
+
+    Raises
+    ------
+    UnsupportedEncodingError when postgres cannot ingest the encoding,
+    i.e. utf-16.
+    """
+
+    try:
+        codec_name = codecs.lookup(python_encoding).name.replace('-', '_')
+    except LookupError:
+        raise UnsupportedEncodingError('Unknown encoding.', python_encoding)
+
+    try:
+        return _PYTHON_ENCODING_MAP[codec_name]
+    except KeyError:
+        raise UnsupportedEncodingError(_UNSUPPORTED_MESSAGE, python_encoding)
+
+
+def sniff_encoding(sample: bytes, fallback='cp1252') -> str:
+    """Guess the encoding of the leading bytes of a file.
+
+    Byte order marks are honored, otherwise a sample that decodes as
+    utf-8 is taken to be utf-8, and anything else the fallback.
+
+    Raises
+    ------
+    UnsupportedEncodingError for utf-16 and utf-32 byte order marks.
+    """
+
+    for bom, encoding in _UNSUPPORTED_BOMS:
+        if sample.startswith(bom):
+            raise UnsupportedEncodingError(_UNSUPPORTED_MESSAGE, encoding)
 
-    encoding = normalize_encoding(python_encoding.lower())
-    encoding_ = aliases.aliases[encoding.replace('_', '', 1)].upper()
-    pg_encoding = PG_ENCODING_MAP[encoding_.replace('_', '')]
+    try:
+        codecs.getincrementaldecoder('utf_8')().decode(sample, final=False)
+    except UnicodeDecodeError:
+        return fallback
 
-    return pg_encoding
+    return 'utf_8'
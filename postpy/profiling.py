@@ -0,0 +1,187 @@
+"""Slow statement plan capture using EXPLAIN (ANALYZE, BUFFERS).
+
+Plans are captured inside a savepoint that is always rolled back, so
+profiling never changes table contents. Statements are only explained
+when the connection is inside a transaction block; autocommit
+connections are skipped.
+"""
+
+import random
+import re
+import threading
+from collections import deque, namedtuple
+
+import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_INERROR
+
+from postpy.instrumentation import (register_before_execute,
+                                    register_after_execute, remove_hook)
+
+
+__all__ = ('SlowStatementProfiler', 'StatementProfile', 'HotNode',
+           'explain_analyze', 'summarize_plan')
+
+
+EXPLAIN_TEMPLATE = 'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {}'
+EXPLAIN_SAVEPOINT = 'postpy_explain'
+
+_DML_STATEMENT = re.compile(r'^\s*(?:WITH\b.*?\)\s*)?(?:INSERT|UPDATE|DELETE)\b',
+                            re.IGNORECASE | re.DOTALL)
+
+
+class StatementProfile(namedtuple('StatementProfile', 'record plan hot_nodes')):
+    """Timing record paired with its captured plan.
+
+    Attributes
+    ----------
+    record : instrumentation.StatementRecord of the profiled execution.
+    plan : EXPLAIN JSON output.
+    hot_nodes : HotNode summary of plan nodes worth inspecting.
+    """
+
+    __slots__ = ()
+
+
+class HotNode(namedtuple('HotNode', 'node_type relation_name reason total_time')):
+    __slots__ = ()
+
+
+class SlowStatementProfiler:
+    """Capture plans of DML statements that are slow or sampled.
+
+    Statements exceeding ``threshold`` seconds are re-run under
+    ``EXPLAIN ANALYZE`` once they complete. Sampled statements are
+    explained before they run, so the plan reflects the table state the
+    real statement sees.
+
+    Parameters
+    ----------
+    threshold : duration in seconds above which statements are re-run.
+        ``None`` disables threshold profiling.
+    sample_rate : fraction of DML statements to pre-run.
+    max_profiles : number of most recent profiles retained.
+    """
+
+    def __init__(self, threshold=1., sample_rate=0., max_profiles=100):
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self.profiles = deque(maxlen=max_profiles)
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def register(self):
+        register_before_execute(self.before_execute)
+        register_after_execute(self.after_execute)
+
+        return self
+
+    def unregister(self):
+        remove_hook(self.before_execute)
+        remove_hook(self.after_execute)
+
+    def __enter__(self):
+        return self.register()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.unregister()
+
+    def before_execute(self, cursor, statement, params):
+        if not self.sample_rate or not is_dml(statement):
+            return
+        if random.random() >= self.sample_rate:
+            return
+
+        plan = explain_analyze(cursor.connection, statement, params)
+
+        if plan is not None:
+            with self._lock:
+                self._pending[(id(cursor.connection), statement)] = plan
+
+    def after_execute(self, record):
+        with self._lock:
+            plan = self._pending.pop((id(record.connection), record.statement),
+                                     None)
+
+        if plan is None and self._is_slow(record):
+            plan = explain_analyze(record.connection, record.statement,
+                                   record.params)
+
+        if plan is not None:
+            profile = StatementProfile(record, plan, summarize_plan(plan))
+            with self._lock:
+                self.profiles.append(profile)
+
+    def _is_slow(self, record):
+        if self.threshold is None:
+            return False
+
+        return record.duration >= self.threshold and is_dml(record.statement)
+
+
+def is_dml(statement) -> bool:
+    return isinstance(statement, str) and bool(_DML_STATEMENT.match(statement))
+
+
+def explain_analyze(conn, statement: str, params=None):
+    """Explain a statement inside a rolled back savepoint.
+
+    Returns the JSON plan, or None when the connection cannot host a
+    savepoint or the statement fails.
+    """
+
+    if conn.autocommit:
+        return None
+    if conn.get_transaction_status() == TRANSACTION_STATUS_INERROR:
+        return None
+
+    with conn.cursor() as cursor:
+        cursor.execute('SAVEPOINT %s;' % EXPLAIN_SAVEPOINT)
+        try:
+            cursor.execute(EXPLAIN_TEMPLATE.format(statement), params)
+            plan = cursor.fetchone()[0]
+        except psycopg2.Error:
+            plan = None
+        finally:
+            cursor.execute('ROLLBACK TO SAVEPOINT %s;' % EXPLAIN_SAVEPOINT)
+            cursor.execute('RELEASE SAVEPOINT %s;' % EXPLAIN_SAVEPOINT)
+
+    return plan
+
+
+def summarize_plan(plan) -> list:
+    """Flag sequential scans and spills to disk in an EXPLAIN JSON plan."""
+
+    root = plan[0]['Plan']
+    target = root.get('Relation Name') if root['Node Type'] == 'ModifyTable' else None
+
+    return [hot_node for node in _walk_plan(root)
+            for hot_node in _inspect_node(node, target)]
+
+
+def _walk_plan(node):
+    yield node
+
+    for child in node.get('Plans', ()):
+        yield from _walk_plan(child)
+
+
+def _inspect_node(node, target):
+    node_type = node['Node Type']
+    relation_name = node.get('Relation Name')
+    total_time = node.get('Actual Total Time')
+
+    if node_type == 'Seq Scan':
+        if relation_name == target:
+            reason = 'seq scan on target table'
+        else:
+            reason = 'seq scan'
+        yield HotNode(node_type, relation_name, reason, total_time)
+
+    batches = max(node.get('Hash Batches', 1), node.get('Original Hash Batches', 1))
+    if node_type == 'Hash' and batches > 1:
+        reason = 'hash spilled to {} batches'.format(batches)
+        yield HotNode(node_type, relation_name, reason, total_time)
+
+    if node.get('Sort Space Type') == 'Disk':
+        reason = 'sort spilled {}kB to disk'.format(node.get('Sort Space Used'))
+        yield HotNode(node_type, relation_name, reason, total_time)
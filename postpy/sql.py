@@ -1,10 +1,13 @@
+from collections import namedtuple
 from contextlib import closing
 from typing import Iterable
 
 import psycopg2
+from foil.iteration import chunks
 from psycopg2.extras import NamedTupleCursor, RealDictCursor
 
 from postpy import connect
+from postpy.instrumentation import execute
 
 
 def execute_transaction(conn, statements: Iterable):
@@ -13,20 +16,111 @@ def execute_transaction(conn, statements: Iterable):
     with conn:
         with conn.cursor() as cursor:
             for statement in statements:
-                cursor.execute(statement)
+                execute(cursor, statement)
         conn.commit()
 
 
-def execute_transactions(conn, statements: Iterable):
-    """Execute several statements each as a single DB transaction."""
+STATEMENT_SAVEPOINT = 'postpy_statement'
+
+
+class StatementFailure(namedtuple('StatementFailure',
+                                  'index statement pgcode message')):
+    """Statement skipped by a transaction executor and its error."""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_error(cls, index, statement, error):
+        return cls(index, statement, error.pgcode, str(error).strip())
+
+
+def execute_transactions(conn, statements: Iterable) -> list:
+    """Execute several statements each as a single DB transaction.
+
+    Returns StatementFailure for each statement rolled back.
+    """
+
+    failures = []
 
     with conn.cursor() as cursor:
-        for statement in statements:
+        for index, statement in enumerate(statements):
             try:
-                cursor.execute(statement)
+                execute(cursor, statement)
                 conn.commit()
-            except psycopg2.ProgrammingError:
+            except psycopg2.ProgrammingError as error:
+                conn.rollback()
+                failures.append(StatementFailure.from_error(index, statement, error))
+
+    return failures
+
+
+def execute_batched_transactions(conn, statements: Iterable,
+                                 batch_size=100) -> list:
+    """Execute statements in batched round trips, skipping failures.
+
+    Each batch is sent as one multi-statement query and committed as a
+    single transaction. A failing batch is rolled back and replayed one
+    statement at a time under savepoints, so only the failing statements
+    are skipped.
+
+    Notes
+    -----
+    Statements that cannot run inside a transaction block,
+    such as VACUUM or CREATE INDEX CONCURRENTLY, are not supported.
+
+    Returns
+    -------
+    StatementFailure for each skipped statement.
+    """
+
+    failures = []
+
+    with conn.cursor() as cursor:
+        for batch in chunks(enumerate(statements), batch_size):
+            batch = list(batch)
+            batch_sql = '\n'.join(_terminate_statement(statement)
+                                  for _, statement in batch)
+            try:
+                execute(cursor, batch_sql)
+            except psycopg2.DatabaseError:
+                if conn.closed:
+                    raise
                 conn.rollback()
+                failures.extend(_replay_batch(conn, cursor, batch))
+            conn.commit()
+
+    return failures
+
+
+def _replay_batch(conn, cursor, batch):
+    for index, statement in batch:
+        if conn.autocommit:
+            try:
+                execute(cursor, statement)
+            except psycopg2.DatabaseError as error:
+                if conn.closed:
+                    raise
+                yield StatementFailure.from_error(index, statement, error)
+            continue
+
+        cursor.execute('SAVEPOINT %s;' % STATEMENT_SAVEPOINT)
+        try:
+            execute(cursor, statement)
+        except psycopg2.DatabaseError as error:
+            if conn.closed:
+                raise
+            cursor.execute('ROLLBACK TO SAVEPOINT %s;' % STATEMENT_SAVEPOINT)
+            yield StatementFailure.from_error(index, statement, error)
+        cursor.execute('RELEASE SAVEPOINT %s;' % STATEMENT_SAVEPOINT)
+
+
+def _terminate_statement(statement: str) -> str:
+    statement = statement.strip()
+
+    if not statement.endswith(';'):
+        statement += ';'
+
+    return statement
 
 
 def execute_closing_transaction(statements: Iterable):
@@ -35,7 +129,7 @@ def execute_closing_transaction(statements: Iterable):
     with closing(connect()) as conn:
         with conn.cursor() as cursor:
             for statement in statements:
-                cursor.execute(statement)
+                execute(cursor, statement)
 
 
 def select(conn, query: str, params=None, name=None, itersize=5000):
@@ -52,7 +146,7 @@ def select(conn, query: str, params=None, name=None, itersize=5000):
 
     with conn.cursor(name, cursor_factory=NamedTupleCursor) as cursor:
         cursor.itersize = itersize
-        cursor.execute(query, params)
+        execute(cursor, query, params)
 
         for result in cursor:
             yield result
@@ -72,7 +166,7 @@ def select_dict(conn, query: str, params=None, name=None, itersize=5000):
 
     with conn.cursor(name, cursor_factory=RealDictCursor) as cursor:
         cursor.itersize = itersize
-        cursor.execute(query, params)
+        execute(cursor, query, params)
 
         for result in cursor:
             yield result
@@ -84,7 +178,7 @@ def select_each(conn, query: str, parameter_groups, name=None):
     with conn:
         with conn.cursor(name=name) as cursor:
             for parameters in parameter_groups:
-                cursor.execute(query, parameters)
+                execute(cursor, query, parameters)
                 yield cursor.fetchone()
 
 
@@ -98,7 +192,7 @@ def query_columns(conn, query, name=None):
 
     with conn.cursor(name) as cursor:
         cursor.itersize = 1
-        cursor.execute(query)
+        execute(cursor, query)
         cursor.fetchmany(0)
         column_names = [column.name for column in cursor.description]
 
@@ -0,0 +1,360 @@
+"""Incrementally maintained aggregate summary tables.
+
+A summary table holds sum, count, min and max aggregates of a base table
+by group. Statement level triggers capture changed base rows into a delta
+table, and applying the deltas updates only the groups that changed, so
+maintenance cost follows the volume of change rather than the size of
+the base table.
+"""
+
+from collections import namedtuple
+
+from postpy.base import Table
+from postpy.ddl import compile_qualified_name
+from postpy.instrumentation import execute
+
+
+__all__ = ('Aggregate', 'SummaryTable', 'create_summary', 'apply_deltas',
+           'drop_summary')
+
+AGGREGATE_FUNCTIONS = ('sum', 'count', 'min', 'max')
+SIGN_COLUMN = '_sign'
+ROW_COUNT_COLUMN = '_row_count'
+DELETED_COLUMN = '_deleted'
+TARGET_ALIAS = 'target'
+SOURCE_ALIAS = 'source'
+
+
+class Aggregate(namedtuple('Aggregate', 'name function column')):
+    """Aggregate column of a summary table.
+
+    Attributes
+    ----------
+    name : summary column name.
+    function : sum, count, min or max.
+    column : aggregated base table column, None for count(*).
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, name: str, function: str, column=None):
+        function = function.lower()
+
+        if function not in AGGREGATE_FUNCTIONS:
+            raise ValueError('Unsupported aggregate function.', function)
+
+        if column is None and function != 'count':
+            raise ValueError('Aggregate requires a column.', name)
+
+        return super(Aggregate, cls).__new__(cls, name, function, column)
+
+    @property
+    def expression(self):
+        """Aggregate over base table rows."""
+
+        return '{}({}) AS {}'.format(self.function, self.column or '*', self.name)
+
+    @property
+    def delta_expression(self):
+        """Aggregate over signed delta rows.
+
+        Sums and counts net out inserted and deleted rows, while min and
+        max only consider inserted rows. Groups losing rows have min and
+        max recomputed from the base table.
+        """
+
+        if self.function == 'sum':
+            expression = 'sum({} * {})'.format(SIGN_COLUMN, self.column)
+        elif self.function == 'count' and self.column is None:
+            expression = 'sum({})'.format(SIGN_COLUMN)
+        elif self.function == 'count':
+            expression = 'sum(CASE WHEN {} IS NOT NULL THEN {} ELSE 0 END)'.format(
+                self.column, SIGN_COLUMN)
+        else:
+            expression = '{}({}) FILTER (WHERE {} > 0)'.format(
+                self.function, self.column, SIGN_COLUMN)
+
+        return '{} AS {}'.format(expression, self.name)
+
+    @property
+    def merge_expression(self):
+        """Combine a summary value with an applied delta."""
+
+        current = '{}.{}'.format(TARGET_ALIAS, self.name)
+        change = 'EXCLUDED.{}'.format(self.name)
+
+        if self.function == 'min':
+            expression = 'LEAST({}, {})'.format(current, change)
+        elif self.function == 'max':
+            expression = 'GREATEST({}, {})'.format(current, change)
+        elif self.function == 'count':
+            expression = '{} + {}'.format(current, change)
+        else:
+            expression = 'coalesce({}, 0) + coalesce({}, 0)'.format(current, change)
+
+        return '{} = {}'.format(self.name, expression)
+
+    @property
+    def is_extremum(self):
+        return self.function in ('min', 'max')
+
+
+class SummaryTable(namedtuple('SummaryTable', 'name base_table group_by '
+                                              'aggregates schema')):
+    """Aggregate summary of a base table maintained from deltas.
+
+    Attributes
+    ----------
+    name : summary table name.
+    base_table : summarized Table.
+    group_by : base table columns grouped on, which must not be NULL.
+    aggregates : Aggregate columns.
+    schema : schema of the summary, delta table and capture function.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, name: str, base_table: Table, group_by, aggregates,
+                schema='public'):
+        return super(SummaryTable, cls).__new__(cls, name, base_table,
+                                                list(group_by), list(aggregates),
+                                                schema)
+
+    @property
+    def qualified_name(self):
+        return compile_qualified_name(self.name, schema=self.schema)
+
+    @property
+    def delta_name(self):
+        return compile_qualified_name(self.name + '_delta', schema=self.schema)
+
+    @property
+    def changes_name(self):
+        return self.name + '_changes'
+
+    @property
+    def capture_function_name(self):
+        return compile_qualified_name(self.name + '_capture', schema=self.schema)
+
+    @property
+    def delta_columns(self):
+        columns = list(self.group_by)
+
+        for aggregate in self.aggregates:
+            if aggregate.column is not None and aggregate.column not in columns:
+                columns.append(aggregate.column)
+
+        return columns
+
+    def create_statements(self):
+        """Summary and delta tables, capture function and triggers.
+
+        Capture triggers are statement level and copy transition tables
+        into the delta table, so bulk statements such as CopyFromUpsert
+        and CopyFromDelete record their changes set-wise.
+        """
+
+        group_str = ', '.join(self.group_by)
+        delta_str = ', '.join(self.delta_columns)
+        base_name = self.base_table.qualified_name
+        function_name = self.capture_function_name
+
+        statements = [
+            'CREATE TABLE {} AS {} WITH NO DATA;'.format(
+                self.qualified_name, self._summary_query()),
+            'ALTER TABLE {} ADD PRIMARY KEY ({});'.format(self.qualified_name,
+                                                          group_str),
+            'CREATE TABLE {} AS SELECT {}, 1::smallint AS {} FROM {}'
+            ' WITH NO DATA;'.format(self.delta_name, delta_str, SIGN_COLUMN,
+                                    base_name),
+            'CREATE FUNCTION {function}() RETURNS trigger LANGUAGE plpgsql AS $$\n'
+            'BEGIN\n'
+            "  IF TG_OP IN ('INSERT', 'UPDATE') THEN\n"
+            '    INSERT INTO {delta} SELECT {columns}, 1 FROM new_rows;\n'
+            '  END IF;\n'
+            "  IF TG_OP IN ('UPDATE', 'DELETE') THEN\n"
+            '    INSERT INTO {delta} SELECT {columns}, -1 FROM old_rows;\n'
+            '  END IF;\n'
+            '  RETURN NULL;\n'
+            'END\n'
+            '$$;'.format(function=function_name, delta=self.delta_name,
+                         columns=delta_str)
+        ]
+
+        transitions = [('insert', 'NEW TABLE AS new_rows'),
+                       ('update', 'OLD TABLE AS old_rows NEW TABLE AS new_rows'),
+                       ('delete', 'OLD TABLE AS old_rows')]
+
+        for event, referencing in transitions:
+            statements.append(
+                'CREATE TRIGGER {name}_{event} AFTER {upper_event} ON {base}'
+                ' REFERENCING {referencing} FOR EACH STATEMENT'
+                ' EXECUTE PROCEDURE {function}();'.format(
+                    name=self.name, event=event, upper_event=event.upper(),
+                    base=base_name, referencing=referencing,
+                    function=function_name))
+
+        return statements
+
+    def populate_statement(self):
+        """Fill the summary from the whole base table."""
+
+        return 'INSERT INTO {} {};'.format(self.qualified_name,
+                                           self._summary_query())
+
+    def apply_statements(self):
+        """Consume captured deltas and merge them into the summary.
+
+        Deltas are deleted and aggregated by group into a temporary
+        changes table, which is upserted into the summary. Groups that
+        lost rows have min and max recomputed from their base rows, and
+        groups left without rows are removed.
+        """
+
+        group_str = ', '.join(self.group_by)
+        delta_aggregates = [aggregate.delta_expression
+                            for aggregate in self.aggregates]
+        changes_query = 'SELECT {}, {}, sum({}) AS {}, bool_or({} < 0) AS {}' \
+                        ' FROM {{}} GROUP BY {}'.format(
+                            group_str, ', '.join(delta_aggregates), SIGN_COLUMN,
+                            ROW_COUNT_COLUMN, SIGN_COLUMN, DELETED_COLUMN,
+                            group_str)
+        summary_columns = self.group_by + [aggregate.name for aggregate
+                                           in self.aggregates] + [ROW_COUNT_COLUMN]
+        summary_str = ', '.join(summary_columns)
+        merges = [aggregate.merge_expression for aggregate in self.aggregates]
+        merges.append('{0} = {1}.{0} + EXCLUDED.{0}'.format(
+            ROW_COUNT_COLUMN, TARGET_ALIAS))
+
+        statements = [
+            'CREATE TEMPORARY TABLE {} AS {} WITH NO DATA;'.format(
+                self.changes_name, changes_query.format(self.delta_name)),
+            'WITH consumed AS (DELETE FROM {} RETURNING *)\n'
+            'INSERT INTO {}\n{};'.format(self.delta_name, self.changes_name,
+                                         changes_query.format('consumed')),
+            'INSERT INTO {} AS {} ({})\n'
+            'SELECT {} FROM {}\n'
+            'ON CONFLICT ({}) DO UPDATE SET {};'.format(
+                self.qualified_name, TARGET_ALIAS, summary_str, summary_str,
+                self.changes_name, group_str, ', '.join(merges))
+        ]
+
+        extrema = [aggregate for aggregate in self.aggregates
+                   if aggregate.is_extremum]
+
+        if extrema:
+            statements.append(self._recompute_statement(extrema))
+
+        statements.extend([
+            'DELETE FROM {} AS {} USING {} WHERE {} AND {}.{} <= 0;'.format(
+                self.qualified_name, TARGET_ALIAS, self.changes_name,
+                self._group_join(TARGET_ALIAS, self.changes_name),
+                TARGET_ALIAS, ROW_COUNT_COLUMN),
+            'DROP TABLE {};'.format(self.changes_name)
+        ])
+
+        return statements
+
+    def drop_statements(self):
+        return [
+            'DROP FUNCTION IF EXISTS {}() CASCADE;'.format(
+                self.capture_function_name),
+            'DROP TABLE IF EXISTS {};'.format(self.delta_name),
+            'DROP TABLE IF EXISTS {};'.format(self.qualified_name)
+        ]
+
+    def _summary_query(self):
+        group_str = ', '.join(self.group_by)
+        aggregate_str = ', '.join(aggregate.expression
+                                  for aggregate in self.aggregates)
+
+        return 'SELECT {}, {}, count(*) AS {} FROM {} GROUP BY {}'.format(
+            group_str, aggregate_str, ROW_COUNT_COLUMN,
+            self.base_table.qualified_name, group_str)
+
+    def _recompute_statement(self, extrema):
+        group_str = ', '.join(self.group_by)
+        recomputed = ', '.join(
+            '{}({}.{}) AS {}'.format(aggregate.function, SOURCE_ALIAS,
+                                     aggregate.column, aggregate.name)
+            for aggregate in extrema)
+        assignments = ', '.join('{0} = recomputed.{0}'.format(aggregate.name)
+                                for aggregate in extrema)
+
+        return (
+            'UPDATE {summary} AS {target} SET {assignments}\n'
+            'FROM (SELECT {groups}, {recomputed}\n'
+            '      FROM {base} AS {source} JOIN {changes} USING ({groups})\n'
+            '      WHERE {changes}.{deleted}\n'
+            '      GROUP BY {groups}) AS recomputed\n'
+            'WHERE {join};'.format(
+                summary=self.qualified_name, target=TARGET_ALIAS,
+                assignments=assignments, groups=group_str, recomputed=recomputed,
+                base=self.base_table.qualified_name, source=SOURCE_ALIAS,
+                changes=self.changes_name, deleted=DELETED_COLUMN,
+                join=self._group_join(TARGET_ALIAS, 'recomputed')))
+
+    def _group_join(self, left, right):
+        return ' AND '.join('{0}.{2} = {1}.{2}'.format(left, right, column)
+                            for column in self.group_by)
+
+
+def create_summary(conn, summary: SummaryTable):
+    """Create, populate and start capturing changes for a summary.
+
+    Creating the capture triggers locks the base table against writes
+    until commit, so the initial population and captured deltas do not
+    overlap.
+    """
+
+    try:
+        statements = summary.create_statements() + [summary.populate_statement()]
+        _execute_statements(conn, statements)
+    except BaseException:
+        conn.rollback()
+        raise
+
+    conn.commit()
+
+
+def apply_deltas(conn, summary: SummaryTable) -> int:
+    """Merge captured base table changes into a summary.
+
+    Deltas committed while the changes are applied remain for the next
+    call. Truncating the base table is not captured.
+
+    Returns
+    -------
+    Number of summary groups changed.
+    """
+
+    statements = summary.apply_statements()
+
+    try:
+        with conn.cursor() as cursor:
+            execute(cursor, statements[0])
+            execute(cursor, statements[1])
+            changed = cursor.rowcount
+
+            for statement in statements[2:]:
+                execute(cursor, statement)
+    except BaseException:
+        conn.rollback()
+        raise
+
+    conn.commit()
+
+    return changed
+
+
+def drop_summary(conn, summary: SummaryTable):
+    """Drop the summary, its delta table and capture triggers."""
+
+    _execute_statements(conn, summary.drop_statements())
+    conn.commit()
+
+
+def _execute_statements(conn, statements):
+    with conn.cursor() as cursor:
+        for statement in statements:
+            execute(cursor, statement)
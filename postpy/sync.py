@@ -0,0 +1,331 @@
+"""Synchronize a table with a CSV snapshot by shipping only differences.
+
+Rows are hashed server side as the md5 of their text columns, and the
+snapshot's rows are hashed identically client side after rendering
+each field the way Postgres prints it. Primary keys are hashed into
+buckets whose row hash sums are compared first, so only rows of
+differing buckets are fetched and compared by key. New and changed rows
+then go through CopyFromUpsert and removed keys through CopyFromDelete.
+"""
+
+import csv
+import hashlib
+import io
+import re
+from collections import defaultdict, namedtuple
+from datetime import datetime, timezone
+from decimal import Decimal
+from functools import partial
+
+from postpy.base import Table
+from postpy.data_types import python_type, text_parser
+from postpy.dml import CopyFromDelete, CopyFromUpsert, csv_dialect
+from postpy.dml_copy import RecordStream, iter_csv_records
+from postpy.instrumentation import execute
+
+
+__all__ = ('SyncResult', 'TableHasher', 'sync_table')
+
+NULL_MARKER = '\\N'
+SEPARATOR = '\x1f'
+ROW_HASH_DIGITS = 15
+BUCKET_HASH_DIGITS = 8
+
+_TYPE_MODIFIER = re.compile(r'\(.*?\)')
+_TIMESTAMPTZ_TYPES = ('timestamp with time zone', 'timestamptz')
+_UTC_TEXT_FORMAT = 'YYYY-MM-DD HH24:MI:SS.US"+00"'
+_UTC_STRFTIME_FORMAT = '%Y-%m-%d %H:%M:%S.%f+00'
+
+
+class SyncResult(namedtuple('SyncResult', 'new changed deleted buckets')):
+    """Row counts shipped by a sync.
+
+    Attributes
+    ----------
+    new : rows inserted.
+    changed : rows updated.
+    deleted : rows deleted.
+    buckets : key buckets whose hashes differed.
+    """
+
+    __slots__ = ()
+
+
+class TableHasher:
+    """Matching server and client side row and key hashes of a table.
+
+    Client side fields are parsed by column type and rendered as Postgres
+    casts them to text, i.e. booleans as true/false and numerics at the
+    column's scale. Timestamps with time zone are hashed in UTC on both
+    sides, independent of the session time zone, and taken as UTC when
+    the snapshot gives no offset. Values rendered differently, such as
+    real columns, only cause unchanged rows to be shipped again.
+    """
+
+    def __init__(self, table: Table, buckets=4096, null_str=''):
+        self.table = table
+        self.buckets = buckets
+        self.null_str = null_str
+        self.key_positions = [table.column_names.index(name)
+                              for name in table.primary_key_columns]
+        self.renderers = [_text_renderer(column.data_type)
+                          for column in table.columns]
+        self.text_expressions = [_text_expression(column.name, column.data_type)
+                                 for column in table.columns]
+        self.key_expressions = [self.text_expressions[position]
+                                for position in self.key_positions]
+
+    @property
+    def row_hash_expression(self) -> str:
+        values = ', '.join("coalesce({}, '{}')".format(expression, NULL_MARKER)
+                           for expression in self.text_expressions)
+
+        return 'md5(concat_ws(chr(31), {}))'.format(values)
+
+    @property
+    def key_text_expression(self) -> str:
+        return 'concat_ws(chr(31), {})'.format(', '.join(self.key_expressions))
+
+    @property
+    def bucket_expression(self) -> str:
+        return "mod(('x' || substr(md5({}), 1, {:d}))::bit({:d})::bigint, {:d})".format(
+            self.key_text_expression, BUCKET_HASH_DIGITS, 4 * BUCKET_HASH_DIGITS,
+            self.buckets)
+
+    def bucket_digest_query(self) -> str:
+        """Row count and row hash sum by key bucket."""
+
+        return (
+            "SELECT bucket, count(*),"
+            " sum(('x' || substr(row_hash, 1, {digits:d}))::bit({bits:d})::bigint)\n"
+            "  FROM (SELECT {bucket} AS bucket, {row_hash} AS row_hash\n"
+            "          FROM {table}) AS hashes\n"
+            "  GROUP BY bucket".format(
+                digits=ROW_HASH_DIGITS, bits=4 * ROW_HASH_DIGITS,
+                bucket=self.bucket_expression, row_hash=self.row_hash_expression,
+                table=self.table.qualified_name))
+
+    def row_hash_query(self) -> str:
+        """Primary key text and row hash of rows in the given buckets."""
+
+        key_columns = ', '.join(self.key_expressions)
+
+        return ('SELECT {keys}, {row_hash} FROM {table}\n'
+                '  WHERE {bucket} = ANY(%s)'.format(
+                    keys=key_columns, row_hash=self.row_hash_expression,
+                    table=self.table.qualified_name,
+                    bucket=self.bucket_expression))
+
+    def hash_fields(self, fields):
+        """Key text, bucket and row hash of a record's text fields."""
+
+        texts = [NULL_MARKER if value == self.null_str else render(value)
+                 for value, render in zip(fields, self.renderers)]
+        key_text = SEPARATOR.join(texts[position]
+                                  for position in self.key_positions)
+        row_hash = _md5(SEPARATOR.join(texts))
+
+        return key_text, self.bucket(key_text), row_hash
+
+    def bucket(self, key_text: str) -> int:
+        return int(_md5(key_text)[:BUCKET_HASH_DIGITS], 16) % self.buckets
+
+
+def sync_table(conn, table: Table, file_object, buckets=4096, delimiter=',',
+               null_str='', header=True, escape_str='\\',
+               quote_char='"') -> SyncResult:
+    """Make a table match a CSV snapshot, shipping only differences.
+
+    The snapshot is read twice, first to compare bucket digests with the
+    table and then to collect rows of differing buckets, so file_object
+    must be seekable. Deletes and upserts are applied in one transaction,
+    in the UTC time zone so that timestamps with time zone lacking an
+    offset load as they are hashed.
+
+    Parameters
+    ----------
+    conn : database connection.
+    table : table with a primary key, columns in snapshot field order.
+    file_object : seekable CSV file-like object.
+    buckets : number of key buckets compared.
+    """
+
+    hasher = TableHasher(table, buckets=buckets, null_str=null_str)
+    dialect = csv_dialect(delimiter, quote_char, escape_str)
+    start = file_object.tell()
+    read_records = partial(_read_records, file_object, start, dialect, header,
+                           quote_char, escape_str)
+
+    with conn.cursor() as cursor:
+        execute(cursor, hasher.bucket_digest_query())
+        server_digests = {bucket: (count, int(total))
+                          for bucket, count, total in cursor.fetchall()}
+
+    client_digests = defaultdict(lambda: [0, 0])
+
+    for _, fields in read_records():
+        _, bucket, row_hash = hasher.hash_fields(fields)
+        digest = client_digests[bucket]
+        digest[0] += 1
+        digest[1] += int(row_hash[:ROW_HASH_DIGITS], 16)
+
+    differing = sorted(
+        bucket for bucket in set(server_digests) | set(client_digests)
+        if server_digests.get(bucket) != tuple(client_digests.get(bucket, (0, 0))))
+
+    if not differing:
+        return SyncResult(0, 0, 0, 0)
+
+    server_hashes = {}
+
+    with conn.cursor() as cursor:
+        execute(cursor, hasher.row_hash_query(), (differing,))
+        for row in cursor.fetchall():
+            server_hashes[SEPARATOR.join(row[:-1])] = (row[:-1], row[-1])
+
+    differing = set(differing)
+    upserts = []
+    new = changed = 0
+    seen = set()
+
+    for record, fields in read_records():
+        key_text, bucket, row_hash = hasher.hash_fields(fields)
+
+        if bucket not in differing:
+            continue
+
+        seen.add(key_text)
+        server = server_hashes.get(key_text)
+
+        if server is None:
+            new += 1
+        elif server[1] != row_hash:
+            changed += 1
+        else:
+            continue
+
+        upserts.append(record)
+
+    deleted_keys = [keys for key_text, (keys, _) in server_hashes.items()
+                    if key_text not in seen]
+
+    try:
+        with conn.cursor() as cursor:
+            execute(cursor, "SET LOCAL TIME ZONE 'UTC';")
+        if deleted_keys:
+            _delete_keys(conn, table, deleted_keys)
+        if upserts:
+            upsert = CopyFromUpsert(table, delimiter=delimiter, null_str=null_str,
+                                    header=False, escape_str=escape_str,
+                                    quote_char=quote_char)
+            upsert(conn, RecordStream(upserts))
+    except BaseException:
+        conn.rollback()
+        raise
+
+    conn.commit()
+
+    return SyncResult(new, changed, len(deleted_keys), len(differing))
+
+
+def _read_records(file_object, start, dialect, header, quote_char, escape_str):
+    file_object.seek(start)
+    records = iter_csv_records(file_object, quote_char, escape_str)
+
+    if header:
+        next(records, None)
+
+    for record in records:
+        if record.strip():
+            yield record, next(csv.reader([record], dialect))
+
+
+def _delete_keys(conn, table, keys):
+    key_columns = [table.columns[table.column_names.index(name)]
+                   for name in table.primary_key_columns]
+    key_table = Table(table.name, key_columns, table.primary_key,
+                      schema=table.schema)
+    key_file = io.StringIO()
+    csv.writer(key_file, csv_dialect(',', '"', '"'),
+               quoting=csv.QUOTE_ALL).writerows(keys)
+    key_file.seek(0)
+
+    CopyFromDelete(key_table, header=False, escape_str='"')(conn, key_file)
+
+
+def _md5(text):
+    return hashlib.md5(text.encode('utf-8')).hexdigest()
+
+
+def _text_expression(name, data_type):
+    """Server side text of a column, as rendered by _text_renderer."""
+
+    if _base_type(data_type) in _TIMESTAMPTZ_TYPES:
+        return "to_char({} AT TIME ZONE 'UTC', '{}')".format(name, _UTC_TEXT_FORMAT)
+
+    return '{}::text'.format(name)
+
+
+def _text_renderer(data_type):
+    """Callable rendering a field as Postgres casts the column to text."""
+
+    field_type = python_type(data_type)
+    base_type = _base_type(data_type)
+
+    if field_type is str:
+        if base_type in ('char', 'character'):
+            return str.rstrip
+        return str
+
+    parse = text_parser(data_type)
+
+    if field_type is bool:
+        return lambda value: 'true' if parse(value) else 'false'
+
+    if field_type is float:
+        return _render_float
+
+    if base_type in _TIMESTAMPTZ_TYPES:
+        return partial(_render_utc_timestamp, parse=parse)
+
+    if field_type is datetime:
+        return partial(_render_timestamp, parse=parse)
+
+    if field_type is Decimal and '(' in data_type and ',' in data_type:
+        scale = int(data_type.split(',')[1].rstrip(') '))
+        exponent = Decimal(1).scaleb(-scale)
+        return lambda value: str(Decimal(value).quantize(exponent))
+
+    return lambda value: str(parse(value))
+
+
+def _render_float(value):
+    number = float(value)
+
+    if number != number:
+        return 'NaN'
+    if number in (float('inf'), float('-inf')):
+        return 'Infinity' if number > 0 else '-Infinity'
+
+    text = repr(number)
+
+    return text[:-2] if text.endswith('.0') else text
+
+
+def _render_timestamp(value, parse):
+    text = str(parse(value))
+
+    return text.rstrip('0') if '.' in text else text
+
+
+def _render_utc_timestamp(value, parse):
+    timestamp = parse(value)
+
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+
+    return timestamp.astimezone(timezone.utc).strftime(_UTC_STRFTIME_FORMAT)
+
+
+def _base_type(data_type):
+    return _TYPE_MODIFIER.sub('', data_type).strip().lower()
@@ -1,8 +1,17 @@
 """Configure psycopg2 to support UUID conversion."""
 
+import os
+import struct
+import threading
+import time
+from itertools import islice
+from random import randrange
+from uuid import UUID
+
 import psycopg2.extras
 
 from postpy.admin import install_extensions
+from postpy.dml_copy import RecordStream, iter_csv_records
 
 
 CRYPTO_EXTENSION = 'pgcrypto'
@@ -61,5 +70,144 @@ def uuid_sequence_function(schema=None):
     return '{}uuid_generate_v1mc()'.format(_format_schema(schema))
 
 
+class UUID7Generator:
+    """Client side time ordered UUIDs in the version 7 layout.
+
+    UUIDs lead with a 48 bit millisecond timestamp followed by a 12 bit
+    counter seeded randomly each millisecond and 62 random bits. Keys
+    from one generator increase monotonically, so primary key inserts
+    land at the right edge of the B-tree, and keys are known before
+    records are sent to the server.
+    """
+
+    _VERSION = 0x7000
+    _VARIANT = 0x8000000000000000
+    _RANDOM_MASK = 0x3FFFFFFFFFFFFFFF
+    _MAX_COUNTER = 0xFFF
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._counter = 0
+
+    def __call__(self) -> UUID:
+        buffer = bytearray(16)
+        self.fill(buffer)
+
+        return UUID(bytes=bytes(buffer))
+
+    def fill(self, buffer, count=None, offset=0) -> int:
+        """Write consecutive UUIDs into a preallocated writable buffer.
+
+        Parameters
+        ----------
+        buffer : bytearray or writable memoryview, 16 bytes per UUID.
+        count : number of UUIDs, defaults to filling the buffer.
+        offset : byte offset of the first UUID.
+
+        Returns
+        -------
+        Number of UUIDs written.
+        """
+
+        if count is None:
+            count = (len(buffer) - offset) // 16
+
+        randoms = struct.unpack('>{:d}Q'.format(count), os.urandom(8 * count))
+        pack_into = struct.pack_into
+
+        with self._lock:
+            now = int(self.clock() * 1000)
+            last_ms = self._last_ms
+            counter = self._counter
+
+            for position, random_bits in enumerate(randoms):
+                if now > last_ms:
+                    last_ms = now
+                    counter = randrange(self._MAX_COUNTER // 2)
+                else:
+                    counter += 1
+                    if counter > self._MAX_COUNTER:
+                        last_ms += 1
+                        counter = randrange(self._MAX_COUNTER // 2)
+
+                pack_into('>QQ', buffer, offset + 16 * position,
+                          (last_ms << 16) | self._VERSION | counter,
+                          self._VARIANT | (random_bits & self._RANDOM_MASK))
+
+            self._last_ms = last_ms
+            self._counter = counter
+
+        return count
+
+    def batch(self, count: int) -> list:
+        """List of consecutive UUIDs."""
+
+        buffer = bytearray(16 * count)
+        self.fill(buffer)
+
+        return [UUID(bytes=bytes(buffer[start:start + 16]))
+                for start in range(0, len(buffer), 16)]
+
+
+_GENERATOR = UUID7Generator()
+
+
+def uuid7() -> UUID:
+    """Time ordered UUID from the shared generator."""
+
+    return _GENERATOR()
+
+
+def uuid7_batch(count: int) -> list:
+    """Consecutive time ordered UUIDs from the shared generator."""
+
+    return _GENERATOR.batch(count)
+
+
+def keyed_records(records, batch_size=1000, generator=_GENERATOR):
+    """Prefix each record with a new time ordered UUID key.
+
+    Pair with register_client so psycopg2 adapts the keys on insert.
+    """
+
+    records = iter(records)
+
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            return
+
+        for key, record in zip(generator.batch(len(batch)), batch):
+            yield (key,) + tuple(record)
+
+
+def keyed_csv(file_object, key_column='id', header=True, delimiter=',',
+              quote_char='"', escape_str='\\', batch_size=1000,
+              generator=_GENERATOR) -> RecordStream:
+    """CSV stream with a leading time ordered UUID key field.
+
+    Records are rewritten lazily, so the result can be handed to COPY,
+    i.e. CopyFrom, for a table whose first column is the key.
+    """
+
+    records = iter_csv_records(file_object, quote_char, escape_str)
+
+    def keyed():
+        if header:
+            first = next(records, None)
+            if first is not None:
+                yield key_column + delimiter + first
+
+        pairs = keyed_records(((record,) for record in records),
+                              batch_size=batch_size, generator=generator)
+
+        for key, record in pairs:
+            yield str(key) + delimiter + record
+
+    return RecordStream(keyed())
+
+
 def _format_schema(schema):
     return '{}.'.format(schema) if schema else ''
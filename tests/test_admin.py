@@ -1,10 +1,18 @@
 import unittest
 
+import psycopg2
+
 from postpy.admin import (get_user_tables, get_primary_keys,
                           get_column_metadata, install_extensions,
-                          reflect_table, reset)
+                          reflect_table, reset, get_table_health,
+                          recommend_vacuum, vacuum_tables, classify_statement,
+                          get_top_statements, summarize_statement_shapes,
+                          StatementShape, get_index_definitions,
+                          reflect_indexes)
 from postpy.base import Database, Column, PrimaryKey, Table
 from postpy.connections import connect
+from postpy.dml import CopyFrom, CopyFromDelete, CopyFromUpsert
+from postpy.extensions import check_extension
 from postpy.fixtures import PostgreSQLFixture
 
 
@@ -114,3 +122,174 @@ class TestExtensions(PostgreSQLFixture, unittest.TestCase):
 
         with cls.conn.cursor() as cursor:
             cursor.execute(statement)
+
+
+class TestVacuumAdvisor(PostgreSQLFixture, unittest.TestCase):
+
+    def setUp(self):
+        self.table = 'public.vacuum_advisor_test'
+        with self.conn.cursor() as cursor:
+            cursor.execute('CREATE TABLE {} (id INT PRIMARY KEY, name TEXT);'.format(
+                self.table))
+            cursor.execute("INSERT INTO {} SELECT i, 'name ' || i"
+                           " FROM generate_series(1, 5000) AS i;".format(self.table))
+            cursor.execute('DELETE FROM {} WHERE id > 1000;'.format(self.table))
+        self.conn.commit()
+        self._flush_stats()
+
+    def test_vacuum_advice(self):
+        health, = get_table_health(self.conn, tables=[self.table])
+
+        self.assertEqual(('public', 'vacuum_advisor_test', 1000, 4000),
+                         (health['schema'], health['table_name'],
+                          health['live_tuples'], health['dead_tuples']))
+        self.assertAlmostEqual(0.8, health['dead_ratio'])
+        self.assertIsNone(health['last_vacuum'])
+
+        advice, = recommend_vacuum(self.conn, tables=[self.table])
+
+        self.assertEqual(self.table, advice.qualified_name)
+        self.assertTrue(advice.vacuum)
+        self.assertEqual(['dead tuples 80%', 'never analyzed'], advice.reasons)
+        self.assertEqual('VACUUM (ANALYZE) public.vacuum_advisor_test;',
+                         advice.statement)
+
+        result = vacuum_tables(self.conn, tables=[self.table])
+        self._flush_stats()
+        health, = get_table_health(self.conn, tables=[self.table])
+
+        self.assertEqual([advice], result)
+        self.assertEqual(0, health['dead_tuples'])
+        self.assertIsNotNone(health['last_vacuum'])
+        self.assertEqual([], recommend_vacuum(self.conn, tables=[self.table]))
+
+    def test_no_tables(self):
+        self.assertEqual([], list(get_table_health(self.conn, tables=[])))
+        self.assertEqual([], recommend_vacuum(self.conn, tables=iter([])))
+        self.assertEqual([], vacuum_tables(self.conn, tables=[]))
+
+    def _flush_stats(self):
+        with self.conn.cursor() as cursor:
+            if self.conn.server_version >= 150000:
+                cursor.execute('SELECT pg_stat_force_next_flush();')
+            self.conn.commit()
+            cursor.execute('SELECT pg_stat_clear_snapshot();')
+
+    def tearDown(self):
+        self.conn.rollback()
+        with self.conn.cursor() as cursor:
+            cursor.execute('DROP TABLE {};'.format(self.table))
+        self.conn.commit()
+
+
+class TestReflectIndexes(PostgreSQLFixture, unittest.TestCase):
+
+    def setUp(self):
+        self.table = 'reflect_index_test'
+        self.definitions = [
+            'CREATE INDEX reflect_index_lower ON {} ((lower(name)) COLLATE "C"'
+            ' DESC)',
+            'CREATE INDEX reflect_index_pattern ON {} (name text_pattern_ops'
+            ' DESC NULLS LAST, id NULLS FIRST) INCLUDE (code)',
+        ]
+        with self.conn.cursor() as cursor:
+            cursor.execute('CREATE TABLE {} (id INT, name TEXT, code TEXT);'.format(
+                self.table))
+            for definition in self.definitions:
+                cursor.execute(definition.format(self.table))
+        self.conn.commit()
+
+    def test_round_trip(self):
+        expected = self._definitions()
+        indexes = list(reflect_indexes(self.conn, self.table))
+
+        self.assertEqual(['name text_pattern_ops DESC NULLS LAST', 'id NULLS FIRST'],
+                         indexes[1].columns)
+        self.assertEqual(['code'], indexes[1].include)
+
+        with self.conn.cursor() as cursor:
+            for index in indexes:
+                cursor.execute(index.drop_statement())
+                cursor.execute(index.create_statement())
+        self.conn.commit()
+
+        self.assertEqual(expected, self._definitions())
+
+    def _definitions(self):
+        return {record['index_name']: record['index_definition'] for record
+                in get_index_definitions(self.conn, self.table)}
+
+    def tearDown(self):
+        self.conn.rollback()
+        with self.conn.cursor() as cursor:
+            cursor.execute('DROP TABLE {};'.format(self.table))
+        self.conn.commit()
+
+
+class TestStatementShapes(unittest.TestCase):
+
+    def setUp(self):
+        self.table = Table('cities', [Column('city', 'TEXT'), Column('state', 'TEXT'),
+                                      Column('country', 'TEXT')],
+                           PrimaryKey(['city']))
+
+    def test_classify_statement(self):
+        upsert = CopyFromUpsert(self.table)
+        delete = CopyFromDelete(self.table)
+        staging = StatementShape('copy staging', 'cities')
+        statements = [
+            (upsert.copy_table.create_temporary_statement(), staging),
+            (upsert.copy_sql, staging),
+            (upsert.dml_query, StatementShape('upsert', 'public.cities')),
+            (upsert.copy_table.drop_temporary_statement(), staging),
+            (delete.copy_sql, staging),
+            (delete.dml_query, StatementShape('delete using', 'public.cities')),
+            (CopyFrom(self.table).copy_sql, StatementShape('copy', 'public.cities')),
+            ('INSERT INTO cities (city) VALUES ($1), ($2)',
+             StatementShape('insert', 'cities')),
+            ('SELECT city FROM cities', StatementShape('other', None))
+        ]
+
+        for statement, expected in statements:
+            self.assertEqual(expected, classify_statement(statement))
+
+    def test_summarize_statement_shapes(self):
+        def record(query, total_time):
+            shape, table_name = classify_statement(query)
+            return {'query': query, 'shape': shape, 'table_name': table_name,
+                    'calls': 1, 'total_time': total_time, 'rows': 10,
+                    'shared_blks_read': 2}
+
+        statements = [record('COPY tmp_bulk_upsert_1_cities FROM STDIN', 5.),
+                      record('COPY tmp_bulk_upsert_2_cities FROM STDIN', 7.),
+                      record('SELECT 1', 20.)]
+        expected = [
+            {'shape': 'other', 'table_name': None, 'calls': 1, 'total_time': 20.,
+             'rows': 10, 'shared_blks_read': 2},
+            {'shape': 'copy staging', 'table_name': 'cities', 'calls': 2,
+             'total_time': 12., 'rows': 20, 'shared_blks_read': 4}
+        ]
+
+        self.assertEqual(expected, summarize_statement_shapes(statements))
+
+
+class TestTopStatements(PostgreSQLFixture, unittest.TestCase):
+
+    def test_get_top_statements(self):
+        try:
+            installed = check_extension(self.conn, 'pg_stat_statements')
+        except psycopg2.ProgrammingError:
+            installed = False
+
+        if not installed:
+            self.skipTest('pg_stat_statements is not installed')
+
+        statements = get_top_statements(self.conn, order_by='calls', limit=5)
+        calls = [statement['calls'] for statement in statements]
+
+        self.assertLessEqual(len(statements), 5)
+        self.assertEqual(sorted(calls, reverse=True), calls)
+
+    def test_unknown_order(self):
+        with self.assertRaises(ValueError):
+            get_top_statements(self.conn, order_by='latency')
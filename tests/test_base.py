@@ -1,8 +1,11 @@
 import unittest
 
+from datetime import date
+
 from postpy.base import (Schema, Column, Table, PrimaryKey, View,
                          make_delete_table, order_table_columns,
-                         split_qualified_name)
+                         split_qualified_name, Partitioning, RangePartition,
+                         ListPartition, HashPartition, DefaultPartition, Index)
 from postpy.fixtures import PostgreSQLFixture, PostgresStatementFixture
 
 
@@ -123,6 +126,15 @@ class TestTableDDL(PostgresStatementFixture, unittest.TestCase):
 
         self.assertSQLStatementEqual(expected, result)
 
+    def test_create_statement_without_primary_key(self):
+        expected = ('CREATE TABLE ddl_schema.create_table_test ('
+                    'city VARCHAR(50) NOT NULL, '
+                    'state CHAR(2) NOT NULL, '
+                    'population INTEGER NULL);')
+        result = self.table.create_statement(primary_key=False)
+
+        self.assertSQLStatementEqual(expected, result)
+
     def test_create_temporary_statement(self):
         temp_table = Table(self.tablename, self.columns, self.primary_keys)
 
@@ -135,6 +147,17 @@ class TestTableDDL(PostgresStatementFixture, unittest.TestCase):
 
         self.assertSQLStatementEqual(expected, result)
 
+    def test_create_temporary_statement_without_primary_key(self):
+        table = Table(self.tablename, self.columns, PrimaryKey([]))
+
+        expected = ('CREATE TEMPORARY TABLE create_table_test ('
+                    'city VARCHAR(50) NOT NULL, '
+                    'state CHAR(2) NOT NULL, '
+                    'population INTEGER NULL);')
+        result = table.create_temporary_statement()
+
+        self.assertSQLStatementEqual(expected, result)
+
     def test_split_qualified_name(self):
         expected = self.schema, self.tablename
         result = split_qualified_name(self.qualified_name)
@@ -147,6 +170,117 @@ class TestTableDDL(PostgresStatementFixture, unittest.TestCase):
         self.assertEqual(expected, result)
 
 
+class TestIndexStatements(PostgresStatementFixture, unittest.TestCase):
+    def setUp(self):
+        self.index = Index('city_state_idx', 'cities', ['lower(city)', 'state'],
+                           include=['population'], where='population > 0',
+                           storage_parameters={'fillfactor': 90}, schema='geo')
+
+    def test_create_statement(self):
+        expected = ('CREATE INDEX city_state_idx ON geo.cities USING btree'
+                    ' ((lower(city)), state) INCLUDE (population)'
+                    ' WITH (fillfactor = 90) WHERE population > 0;')
+        result = self.index.create_statement()
+
+        self.assertSQLStatementEqual(expected, result)
+
+    def test_create_concurrently_statement(self):
+        index = Index('brin_idx', 'events', ['created_at'], method='brin',
+                      unique=False)
+
+        expected = ('CREATE INDEX CONCURRENTLY brin_idx ON public.events'
+                    ' USING brin (created_at);')
+        result = index.create_statement(concurrently=True)
+
+        self.assertSQLStatementEqual(expected, result)
+
+    def test_drop_statement(self):
+        expected = 'DROP INDEX CONCURRENTLY IF EXISTS geo.city_state_idx;'
+        result = self.index.drop_statement(concurrently=True)
+
+        self.assertSQLStatementEqual(expected, result)
+
+
+class TestPartitionedTableDDL(PostgresStatementFixture, unittest.TestCase):
+    def setUp(self):
+        columns = [Column('report_date', 'DATE'), Column('value', 'INTEGER')]
+        partitions = [
+            RangePartition('facts_2016', date(2016, 1, 1), date(2017, 1, 1)),
+            RangePartition('facts_old', None, date(2016, 1, 1)),
+            DefaultPartition('facts_default')
+        ]
+        partitioning = Partitioning('range', ['report_date'], partitions)
+        self.table = Table('facts', columns, PrimaryKey(['report_date']),
+                           partitioning=partitioning)
+
+    def test_create_statement(self):
+        expected = ('CREATE TABLE public.facts ('
+                    'report_date DATE NOT NULL, value INTEGER NOT NULL, '
+                    'PRIMARY KEY (report_date)) PARTITION BY RANGE (report_date);')
+        result = self.table.create_statement()
+
+        self.assertSQLStatementEqual(expected, result)
+
+    def test_create_partition_statements(self):
+        expected = [
+            ("CREATE TABLE public.facts_2016 PARTITION OF public.facts"
+             " FOR VALUES FROM ('2016-01-01') TO ('2017-01-01');"),
+            ("CREATE TABLE public.facts_old PARTITION OF public.facts"
+             " FOR VALUES FROM (MINVALUE) TO ('2016-01-01');"),
+            'CREATE TABLE public.facts_default PARTITION OF public.facts DEFAULT;'
+        ]
+        result = self.table.create_partition_statements()
+
+        self.assertEqual(len(expected), len(result))
+        for expected_statement, statement in zip(expected, result):
+            self.assertSQLStatementEqual(expected_statement, statement)
+
+    def test_list_and_hash_bounds(self):
+        self.assertSQLStatementEqual(
+            "FOR VALUES IN ('IL', 'NY')",
+            ListPartition('east', ['IL', 'NY']).bound_statement())
+        self.assertSQLStatementEqual(
+            'FOR VALUES WITH (MODULUS 4, REMAINDER 1)',
+            HashPartition('h1', 4, 1).bound_statement())
+
+    def test_range_router(self):
+        route = self.table.partitioning.router()
+
+        self.assertEqual('facts_2016', route((date(2016, 5, 1),)))
+        self.assertEqual('facts_old', route((date(1999, 5, 1),)))
+        self.assertEqual('facts_default', route((date(2017, 1, 1),)))
+        self.assertEqual('facts_default', route((None,)))
+
+    def test_range_router_unbounded_columns(self):
+        partitioning = Partitioning('RANGE', ['a', 'b'],
+                                    [RangePartition('low', (1, None), (2, None)),
+                                     RangePartition('high', (2, None), (3, 5))])
+        route = partitioning.router()
+
+        self.assertEqual('low', route((1, 5)))
+        self.assertEqual('high', route((2, -100)))
+        self.assertEqual('high', route((3, 4)))
+        with self.assertRaises(KeyError):
+            route((3, 5))
+        with self.assertRaises(KeyError):
+            route((0, 1))
+
+    def test_list_router_without_default(self):
+        partitioning = Partitioning('LIST', ['state'],
+                                    [ListPartition('east', ['NY'])])
+        route = partitioning.router()
+
+        self.assertEqual('east', route(('NY',)))
+        with self.assertRaises(KeyError):
+            route(('CA',))
+
+    def test_hash_router_unsupported(self):
+        partitioning = Partitioning('HASH', ['id'], [HashPartition('h0', 2, 0)])
+
+        with self.assertRaises(ValueError):
+            partitioning.router()
+
+
 class TestCreateTableEvent(PostgreSQLFixture, unittest.TestCase):
     def setUp(self):
         self.tablename = 'create_table_event'
@@ -0,0 +1,82 @@
+import unittest
+
+import psycopg2
+
+from postpy.buckets import (RangeBuckets, assign_buckets, compile_bucket_select,
+                            create_range_table)
+from postpy.data_types import NumericRange, generate_numeric_range
+from postpy.fixtures import PostgreSQLFixture
+
+
+def make_ranges():
+    items = ('freezing', 'cold', 'cool', 'hot')
+
+    return list(generate_numeric_range(items, 0., 100.))
+
+
+class TestRangeBuckets(unittest.TestCase):
+
+    def test_bucket(self):
+        buckets = RangeBuckets(make_ranges())
+
+        expected = ['freezing', 'cold', 'cool', 'hot', None, None, None]
+        result = buckets.bucket([0, 25, 74.9, 99, 100, -1, None])
+
+        self.assertEqual(expected, result)
+
+    def test_bounds(self):
+        ranges = [('low', NumericRange(None, 0, '(]')),
+                  ('mid', NumericRange(0, 10, '()')),
+                  ('high', NumericRange(10, None, '[)'))]
+        buckets = RangeBuckets(ranges)
+
+        expected = ['low', 'low', 'mid', 'high']
+        result = buckets.bucket([-50, 0, 5, 10])
+
+        self.assertEqual(expected, result)
+
+
+class TestServerBuckets(PostgreSQLFixture, unittest.TestCase):
+
+    def setUp(self):
+        create_range_table(self.conn, 'temperature_ranges', make_ranges())
+        with self.conn.cursor() as cursor:
+            cursor.execute('CREATE TEMPORARY TABLE readings'
+                           ' (reading INTEGER, label TEXT);')
+            cursor.execute('INSERT INTO readings (reading)'
+                           ' VALUES (10), (30), (99), (150);')
+
+    def test_assign_buckets(self):
+        count = assign_buckets(self.conn, 'readings', 'reading', 'label',
+                               'temperature_ranges')
+
+        self.assertEqual(3, count)
+        self.assertEqual([(10, 'freezing'), (30, 'cold'), (99, 'hot'),
+                          (150, None)], self._fetch_all(
+            'SELECT * FROM readings ORDER BY reading'))
+
+    def test_select(self):
+        query = compile_bucket_select('readings', 'reading', 'temperature_ranges',
+                                      columns=['reading'])
+
+        result = self._fetch_all(query + ' ORDER BY reading')
+
+        self.assertEqual([(10, 'freezing'), (30, 'cold'), (99, 'hot'),
+                          (150, None)], result)
+
+    def test_overlap_rejected(self):
+        with self.assertRaises(psycopg2.IntegrityError):
+            create_range_table(self.conn, 'overlapping_ranges',
+                               [('a', NumericRange(0, 10)),
+                                ('b', NumericRange(5, 15))])
+
+    def _fetch_all(self, query):
+        with self.conn.cursor() as cursor:
+            cursor.execute(query)
+            return cursor.fetchall()
+
+    def tearDown(self):
+        self.conn.rollback()
+        with self.conn.cursor() as cursor:
+            cursor.execute('DROP TABLE temperature_ranges;')
+        self.conn.commit()
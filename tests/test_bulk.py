@@ -0,0 +1,442 @@
+import io
+import unittest
+
+import psycopg2
+
+from postpy import bulk
+from postpy.admin import (get_index_definitions, get_primary_keys,
+                          get_table_grants, reflect_indexes, table_exists)
+from postpy.base import Column, Index, PrimaryKey, Table
+from postpy.connections import connect
+from postpy.ddl import CreateTableAs
+from postpy.dml import insert_many
+from postpy.fixtures import (PostgreSQLFixture, PostgresStatementFixture,
+                             fetch_one_result)
+
+
+def make_table():
+    columns = [Column('city', 'VARCHAR(50)'),
+               Column('state', 'CHAR(2)', nullable=True)]
+
+    return Table('bulk_load_table', columns, PrimaryKey(['city']))
+
+
+def make_records():
+    return [('Chicago', 'IL'), ('New York', 'NY'), ('Miami', 'FL')]
+
+
+class TestDeferredIndexStatements(PostgresStatementFixture, unittest.TestCase):
+
+    def test_primary_key_index(self):
+        result = bulk.primary_key_index(make_table())
+
+        self.assertSQLStatementEqual(
+            'CREATE UNIQUE INDEX bulk_load_table_pkey'
+            ' ON public.bulk_load_table (city);',
+            result.build_statement)
+        self.assertSQLStatementEqual(
+            'ALTER TABLE public.bulk_load_table'
+            ' ADD CONSTRAINT bulk_load_table_pkey PRIMARY KEY'
+            ' USING INDEX bulk_load_table_pkey;',
+            result.attach_statement)
+
+
+class TestMaintenanceSettings(unittest.TestCase):
+
+    def test_local_settings(self):
+        expected = ["SET LOCAL maintenance_work_mem = '64MB';",
+                    'SET LOCAL max_parallel_maintenance_workers = 2;']
+
+        result = bulk._maintenance_settings('64MB', 2, local=True)
+
+        self.assertEqual(expected, result)
+
+
+class TestBulkLoad(PostgreSQLFixture, unittest.TestCase):
+
+    def setUp(self):
+        self.table = make_table()
+        self.records = make_records()
+        self.index_statement = (
+            'CREATE INDEX bulk_load_state ON public.bulk_load_table (state);')
+
+    def test_create_serial(self):
+        with bulk.bulk_load(self.conn, self.table,
+                            index_statements=[self.index_statement],
+                            maintenance_work_mem='64MB'):
+            self._assert_no_indexes()
+            self._insert()
+
+        self._assert_loaded()
+
+    def test_create_parallel(self):
+        with bulk.bulk_load(self.conn, self.table,
+                            index_statements=[self.index_statement],
+                            workers=2, maintenance_work_mem='64MB'):
+            self._insert()
+
+        self._assert_loaded()
+
+    def test_existing_table(self):
+        with self.conn.cursor() as cursor:
+            cursor.execute(self.table.create_statement())
+            cursor.execute(self.index_statement)
+        self.conn.commit()
+
+        with bulk.bulk_load(self.conn, self.table, create=False, workers=2):
+            self._assert_no_indexes()
+            self._insert()
+
+        self._assert_loaded()
+
+    def test_existing_table_restored_on_error(self):
+        with self.conn.cursor() as cursor:
+            cursor.execute(self.table.create_statement())
+        self.conn.commit()
+
+        with self.assertRaises(ValueError):
+            with bulk.bulk_load(self.conn, self.table, create=False, workers=2):
+                raise ValueError
+
+        result = list(get_primary_keys(self.conn, self.table.name))
+
+        self.assertEqual(['city'], result)
+
+    def test_duplicate_keys_serial(self):
+        with self.assertRaises(psycopg2.errors.UniqueViolation):
+            with bulk.bulk_load(self.conn, self.table):
+                self._insert_duplicates()
+
+        self.assertFalse(table_exists(self.conn, self.table.name))
+
+    def test_duplicate_keys_parallel(self):
+        with self.assertRaises(psycopg2.errors.UniqueViolation):
+            with bulk.bulk_load(self.conn, self.table, workers=2):
+                self._insert_duplicates()
+
+        self.assertFalse(table_exists(self.conn, self.table.name))
+
+    def test_duplicate_keys_existing_table(self):
+        with self.conn.cursor() as cursor:
+            cursor.execute(self.table.create_statement())
+            cursor.execute(self.index_statement)
+        self.conn.commit()
+
+        with self.assertRaises(bulk.ConstraintRestoreError):
+            with bulk.bulk_load(self.conn, self.table, create=False,
+                                workers=2):
+                self._insert_duplicates()
+
+        result = {record['index_name'] for record in
+                  get_index_definitions(self.conn, self.table.name)}
+
+        self.assertEqual({'bulk_load_state'}, result)
+
+    def test_committed_duplicates_serial(self):
+        with self.assertRaises(psycopg2.errors.UniqueViolation):
+            with bulk.bulk_load(self.conn, self.table):
+                insert_many(self.conn, self.table.qualified_name,
+                            self.table.column_names,
+                            self.records + self.records[:1])
+
+        self.assertFalse(table_exists(self.conn, self.table.name))
+
+    def test_committed_duplicates_existing_table_serial(self):
+        with self.conn.cursor() as cursor:
+            cursor.execute(self.table.create_statement())
+            cursor.execute(self.index_statement)
+        self.conn.commit()
+
+        with self.assertRaises(bulk.ConstraintRestoreError):
+            with bulk.bulk_load(self.conn, self.table, create=False):
+                insert_many(self.conn, self.table.qualified_name,
+                            self.table.column_names,
+                            self.records + self.records[:1])
+
+        result = {record['index_name'] for record in
+                  get_index_definitions(self.conn, self.table.name)}
+
+        self.assertEqual({'bulk_load_state'}, result)
+
+    def _insert_duplicates(self):
+        with self.conn.cursor() as cursor:
+            cursor.executemany('INSERT INTO bulk_load_table VALUES (%s, %s);',
+                               self.records + self.records[:1])
+
+    def test_create_unlogged(self):
+        with bulk.bulk_load(self.conn, self.table, unlogged=True):
+            self.assertEqual('u', self._persistence())
+            self._insert()
+
+        self.assertEqual('p', self._persistence())
+
+    def test_copy_replace(self):
+        text = 'city,state\nChicago,IL\nNew York,NY\nMiami,FL\n'
+
+        bulk.copy_replace(self.conn, self.table, io.StringIO(text),
+                          unlogged=True)
+        bulk.copy_replace(self.conn, self.table, io.StringIO(text))
+
+        self._assert_loaded(indexes={'bulk_load_table_pkey'})
+        self.assertEqual('p', self._persistence())
+
+    def test_copy_replace_referenced(self):
+        text = 'city,state\nChicago,IL\n'
+        bulk.copy_replace(self.conn, self.table, io.StringIO(text))
+
+        with self.conn.cursor() as cursor:
+            cursor.execute('CREATE TABLE bulk_load_teams (team TEXT,'
+                           ' city VARCHAR(50) REFERENCES bulk_load_table (city));')
+            cursor.execute("INSERT INTO bulk_load_teams VALUES ('Cubs', 'Chicago');")
+        self.conn.commit()
+
+        try:
+            with self.assertRaises(psycopg2.errors.FeatureNotSupported):
+                bulk.copy_replace(self.conn, self.table, io.StringIO(text))
+
+            self.assertEqual((1,), fetch_one_result(
+                self.conn, 'SELECT count(*) FROM bulk_load_teams'))
+        finally:
+            self.conn.rollback()
+            with self.conn.cursor() as cursor:
+                cursor.execute('DROP TABLE bulk_load_teams;')
+            self.conn.commit()
+
+    def test_create_indexes_concurrently(self):
+        with self.conn.cursor() as cursor:
+            cursor.execute(self.table.create_statement())
+        self.conn.commit()
+        indexes = [
+            Index('bulk_load_state', self.table.name, ['state'],
+                  include=['city'], where="state <> 'XX'",
+                  storage_parameters={'fillfactor': '70'}),
+            Index('bulk_load_lower', self.table.name, ['lower(city)'],
+                  method='hash')
+        ]
+
+        results = bulk.create_indexes(indexes, workers=2, concurrently=True,
+                                      max_parallel_maintenance_workers=0)
+        reflected = [index for index in reflect_indexes(self.conn, self.table.name)
+                     if index.name != self.table.primary_key_name]
+
+        self.assertEqual(1, len(results))
+        self.assertEqual(['bulk_load_lower', 'bulk_load_state'],
+                         [index.name for index in reflected])
+        self.assertEqual('hash', reflected[0].method)
+        self.assertEqual('lower(city::text)', reflected[0].columns[0])
+        self.assertEqual(indexes[0], reflected[1]._replace(
+            where=indexes[0].where))
+        self.assertIn("'XX'", reflected[1].where)
+
+    def _persistence(self):
+        query = "SELECT relpersistence FROM pg_class WHERE relname='bulk_load_table'"
+
+        return fetch_one_result(self.conn, query)[0]
+
+    def _insert(self):
+        insert_many(self.conn, self.table.qualified_name,
+                    self.table.column_names, self.records)
+
+    def _assert_no_indexes(self):
+        self.assertEqual([], list(get_index_definitions(self.conn,
+                                                        self.table.name)))
+
+    def _assert_loaded(self, indexes=('bulk_load_table_pkey', 'bulk_load_state')):
+        result = {record['index_name'] for record in
+                  get_index_definitions(self.conn, self.table.name)}
+        primary_key = list(get_primary_keys(self.conn, self.table.name))
+        count = fetch_one_result(self.conn,
+                                 'SELECT count(*) FROM bulk_load_table')
+
+        self.assertEqual(set(indexes), result)
+        self.assertEqual(['city'], primary_key)
+        self.assertEqual((len(self.records),), count)
+
+    def tearDown(self):
+        self.conn.rollback()
+        with self.conn.cursor() as cursor:
+            cursor.execute(self.table.drop_statement())
+        self.conn.commit()
+
+
+class TestReplaceTable(PostgreSQLFixture, unittest.TestCase):
+
+    def setUp(self):
+        self.table = make_table()
+        self.text = 'city,state\nChicago,IL\nNew York,NY\nMiami,FL\n'
+
+    def test_replace_table(self):
+        bulk.replace_table(self.conn, self.table, io.StringIO(self.text),
+                           indexes=[Index('bulk_load_state', self.table.name,
+                                          ['state'])])
+        with self.conn.cursor() as cursor:
+            cursor.execute('CREATE VIEW bulk_load_view AS'
+                           ' SELECT city FROM bulk_load_table;')
+            cursor.execute('GRANT SELECT ON bulk_load_table TO PUBLIC;')
+        self.conn.commit()
+
+        bulk.replace_table(self.conn, self.table,
+                           io.StringIO('city,state\nBoston,MA\n'), workers=2,
+                           lock_timeout='5s')
+
+        indexes = {record['index_name'] for record in
+                   get_index_definitions(self.conn, self.table.name)}
+        grants = list(get_table_grants(self.conn, self.table.name))
+
+        self.assertEqual({'bulk_load_table_pkey', 'bulk_load_state'}, indexes)
+        self.assertEqual(['city'], list(get_primary_keys(self.conn,
+                                                         self.table.name)))
+        self.assertEqual((['Boston'],), fetch_one_result(
+            self.conn, 'SELECT array_agg(city) FROM bulk_load_view'))
+        self.assertEqual([('PUBLIC', 'SELECT')],
+                         [(grant['grantee'], grant['privilege_type'])
+                          for grant in grants])
+        self.assertEqual(('p',), fetch_one_result(
+            self.conn, "SELECT relpersistence FROM pg_class"
+                       " WHERE relname = 'bulk_load_table'"))
+        self.assertFalse(table_exists(self.conn, 'bulk_load_table_shadow'))
+
+    def test_named_primary_key(self):
+        with self.conn.cursor() as cursor:
+            cursor.execute('CREATE TABLE bulk_load_table (city TEXT,'
+                           ' state CHAR(2), CONSTRAINT bulk_load_city'
+                           ' PRIMARY KEY (city));')
+            cursor.execute('CREATE INDEX bulk_load_state ON bulk_load_table (state);')
+        self.conn.commit()
+
+        bulk.replace_table(self.conn, self.table, io.StringIO(self.text))
+
+        indexes = {record['index_name'] for record in
+                   get_index_definitions(self.conn, self.table.name)}
+
+        self.assertEqual({'bulk_load_table_pkey', 'bulk_load_state'}, indexes)
+
+    def test_long_names(self):
+        index = Index('i' * 60, self.table.name, ['state'])
+
+        with self.assertRaises(ValueError):
+            bulk.replace_table(self.conn, self.table, io.StringIO(self.text),
+                               indexes=[index])
+
+        self.assertFalse(table_exists(self.conn, 'bulk_load_table_shadow'))
+
+    def test_failed_load(self):
+        with self.assertRaises(Exception):
+            bulk.replace_table(self.conn, self.table,
+                               io.StringIO('city,state\nChicago,IL,extra\n'))
+
+        self.assertFalse(table_exists(self.conn, 'bulk_load_table'))
+        self.assertFalse(table_exists(self.conn, 'bulk_load_table_shadow'))
+
+    def tearDown(self):
+        self.conn.rollback()
+        with self.conn.cursor() as cursor:
+            cursor.execute('DROP VIEW IF EXISTS bulk_load_view;')
+            cursor.execute(self.table.drop_statement())
+        self.conn.commit()
+
+
+class TestLoadTables(PostgreSQLFixture, unittest.TestCase):
+
+    def setUp(self):
+        self.states = Table('load_states', [Column('state', 'CHAR(2)')],
+                            PrimaryKey(['state']))
+        self.cities = Table('load_cities', [Column('city', 'TEXT'),
+                                            Column('state', 'CHAR(2)')],
+                            PrimaryKey(['city']))
+        self.teams = Table('load_teams', [Column('team', 'TEXT')],
+                           PrimaryKey(['team']))
+        with self.conn.cursor() as cursor:
+            for table in (self.states, self.cities, self.teams):
+                cursor.execute(table.create_statement())
+            cursor.execute('ALTER TABLE load_cities ADD FOREIGN KEY (state)'
+                           ' REFERENCES load_states (state);')
+        self.conn.commit()
+
+    def test_load_tables(self):
+        loads = [(self.cities, io.StringIO('city,state\nChicago,IL\nMiami,FL\n')),
+                 (self.teams, io.StringIO('team\nCubs\n')),
+                 (self.states, io.StringIO('state\nIL\nFL\n'))]
+
+        result = bulk.load_tables(loads, workers=3)
+
+        self.assertEqual([('public.load_cities', 2), ('public.load_teams', 1),
+                          ('public.load_states', 2)],
+                         [(job.name, job.result) for job in result.results])
+        self.assertIn(result.critical_path,
+                      [['public.load_states', 'public.load_cities'],
+                       ['public.load_teams']])
+        self.assertGreaterEqual(result.duration,
+                                sum(job.duration for job in result.results
+                                    if job.name in result.critical_path))
+
+    def tearDown(self):
+        self.conn.rollback()
+        with self.conn.cursor() as cursor:
+            for table in (self.cities, self.states, self.teams):
+                cursor.execute(table.drop_statement())
+        self.conn.commit()
+
+
+class TestCreateTableAs(PostgreSQLFixture, unittest.TestCase):
+
+    def setUp(self):
+        with self.conn.cursor() as cursor:
+            cursor.execute('CREATE TABLE ctas_parent AS'
+                           ' SELECT generate_series(1, 1000) AS id;')
+        self.conn.commit()
+        self.create = CreateTableAs('ctas_child', 'ctas_parent', ['id'],
+                                    clause='id % 2 = 0')
+        self.index = Index('ctas_child_id', 'ctas_child', ['id'])
+
+    def test_key_ranges(self):
+        results = bulk.create_table_as(self.conn, self.create, key_column='id',
+                                       workers=3, index_statements=[self.index])
+
+        self.assertEqual(3, len(results))
+        self._assert_created()
+
+    def test_block_ranges(self):
+        results = bulk.create_table_as(self.conn, self.create, workers=2,
+                                       partitions=4, index_statements=[self.index])
+
+        self.assertEqual(4, len(results))
+        self._assert_created()
+
+    def test_shared_snapshot(self):
+        def connection_factory():
+            with connect() as writer:
+                with writer.cursor() as cursor:
+                    cursor.execute('INSERT INTO ctas_parent VALUES (2000);')
+            writer.close()
+            return connect()
+
+        bulk.create_table_as(self.conn, self.create, key_column='id', workers=2,
+                             index_statements=[self.index],
+                             connection_factory=connection_factory)
+
+        self._assert_created()
+
+    def test_failure_drops_table(self):
+        create = CreateTableAs('ctas_child', 'ctas_parent', ['id'],
+                               clause='1 / (id - 500) > 0')
+
+        with self.assertRaises(Exception):
+            bulk.create_table_as(self.conn, create, key_column='id', workers=2)
+
+        self.assertFalse(table_exists(self.conn, 'ctas_child'))
+
+    def _assert_created(self):
+        result = fetch_one_result(self.conn,
+                                  'SELECT count(*), sum(id) FROM ctas_child')
+        indexes = [index.name for index in reflect_indexes(self.conn, 'ctas_child')]
+
+        self.assertEqual((500, 250500), result)
+        self.assertEqual(['ctas_child_id'], indexes)
+
+    def tearDown(self):
+        self.conn.rollback()
+        with self.conn.cursor() as cursor:
+            cursor.execute('DROP TABLE IF EXISTS ctas_child;')
+            cursor.execute('DROP TABLE ctas_parent;')
+        self.conn.commit()
@@ -0,0 +1,102 @@
+import unittest
+
+from postpy.base import Column, PrimaryKey, Table
+from postpy.compare import compare_tables
+from postpy.fixtures import PostgreSQLFixture
+
+
+def make_table(name, key_type='INTEGER'):
+    columns = [Column('id', key_type, False), Column('value', 'TEXT', True)]
+
+    return Table(name, columns, PrimaryKey(['id']))
+
+
+class TestCompareTables(PostgreSQLFixture, unittest.TestCase):
+
+    def setUp(self):
+        self.table_a = make_table('compare_a')
+        self.table_b = make_table('compare_b')
+
+        with self.conn.cursor() as cursor:
+            for table in (self.table_a, self.table_b):
+                cursor.execute(table.create_statement())
+                cursor.execute('INSERT INTO {} SELECT i, md5(i::text)'
+                               ' FROM generate_series(1, 5000) AS i;'.format(
+                                   table.qualified_name))
+        self.conn.commit()
+
+    def test_equal(self):
+        result = compare_tables(self.conn, self.table_a, self.table_b, chunks=4)
+
+        self.assertTrue(result.equal)
+        self.assertEqual(4, result.ranges)
+
+    def test_differences(self):
+        with self.conn.cursor() as cursor:
+            cursor.execute('DELETE FROM compare_b WHERE id = 17;')
+            cursor.execute("UPDATE compare_b SET value = NULL WHERE id = 2500;")
+            cursor.execute("INSERT INTO compare_b VALUES (6000, 'extra');")
+        self.conn.commit()
+
+        result = compare_tables(self.conn, self.table_a, self.table_b, chunks=4,
+                                fanout=4, leaf_rows=50, workers=2)
+
+        self.assertEqual([('17',)], result.only_a)
+        self.assertEqual([('6000',)], result.only_b)
+        self.assertEqual([('2500',)], result.changed)
+        self.assertGreater(result.ranges, 4)
+
+    def tearDown(self):
+        self.conn.rollback()
+        with self.conn.cursor() as cursor:
+            cursor.execute(self.table_a.drop_statement())
+            cursor.execute(self.table_b.drop_statement())
+        self.conn.commit()
+
+
+class TestCompareTextKeys(PostgreSQLFixture, unittest.TestCase):
+
+    def setUp(self):
+        self.table_a = make_table('compare_text_a', 'TEXT')
+        self.table_b = make_table('compare_text_b', 'TEXT')
+
+        with self.conn.cursor() as cursor:
+            for table in (self.table_a, self.table_b):
+                cursor.execute(table.create_statement())
+                cursor.execute("INSERT INTO {} SELECT 'key' || i, i::text"
+                               " FROM generate_series(1, 500) AS i;".format(
+                                   table.qualified_name))
+            cursor.execute("UPDATE compare_text_b SET value = 'x'"
+                           " WHERE id = 'key250';")
+        self.conn.commit()
+
+    def test_differences(self):
+        result = compare_tables(self.conn, self.table_a, self.table_b, chunks=4,
+                                fanout=4, leaf_rows=20)
+
+        self.assertEqual([('key250',)], result.changed)
+        self.assertEqual([], result.only_a + result.only_b)
+
+    def test_sampled_bounds(self):
+        with self.conn.cursor() as cursor:
+            for table in (self.table_a, self.table_b):
+                cursor.execute("INSERT INTO {} SELECT 'more' || i, i::text"
+                               " FROM generate_series(1, 20000) AS i;".format(
+                                   table.qualified_name))
+                cursor.execute('ANALYZE {};'.format(table.qualified_name))
+            cursor.execute("DELETE FROM compare_text_a WHERE id = 'more12345';")
+        self.conn.commit()
+
+        result = compare_tables(self.conn, self.table_a, self.table_b, chunks=4,
+                                fanout=4, leaf_rows=100)
+
+        self.assertEqual([('key250',)], result.changed)
+        self.assertEqual([('more12345',)], result.only_b)
+        self.assertGreater(result.ranges, 4)
+
+    def tearDown(self):
+        self.conn.rollback()
+        with self.conn.cursor() as cursor:
+            cursor.execute(self.table_a.drop_statement())
+            cursor.execute(self.table_b.drop_statement())
+        self.conn.commit()
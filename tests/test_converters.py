@@ -0,0 +1,85 @@
+import unittest
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+from postpy.base import Column, PrimaryKey, Table
+from postpy.converters import (compile_converter, convert_records, converter,
+                               parse_iso_date, table_fingerprint)
+
+
+def make_table(name='converted'):
+    columns = [Column('id', 'INTEGER', nullable=False),
+               Column('name', 'VARCHAR(10)', nullable=False),
+               Column('price', 'NUMERIC(10, 2)', nullable=True),
+               Column('listed', 'DATE', nullable=True),
+               Column('updated', 'TIMESTAMP', nullable=True),
+               Column('active', 'BOOLEAN', nullable=True)]
+
+    return Table(name, columns, PrimaryKey(['id']))
+
+
+class TestConverters(unittest.TestCase):
+
+    def setUp(self):
+        self.table = make_table()
+
+    def test_convert(self):
+        row = ('1', '', '2.50', '2017-03-04', '2017-03-04 10:11:12', 't')
+        expected = (1, '', Decimal('2.50'), date(2017, 3, 4),
+                    datetime(2017, 3, 4, 10, 11, 12), True)
+
+        result = compile_converter(self.table)(row)
+
+        self.assertEqual(expected, result)
+
+    def test_null_str(self):
+        row = ('1', 'NA', 'NA', 'NA', 'NA', 'NA')
+        expected = (1, 'NA', None, None, None, None)
+
+        result = compile_converter(self.table, null_str='NA')(row)
+
+        self.assertEqual(expected, result)
+
+    def test_unmapped_types(self):
+        table = Table('reflected', [Column('payload', 'jsonb'),
+                                    Column('seen', 'timestamp with time zone'),
+                                    Column('at', 'time without time zone')],
+                      PrimaryKey([]))
+        row = ('{"a": 1}', '2017-03-04 10:11:12.5+05:30', '10:11')
+        expected = ('{"a": 1}',
+                    datetime(2017, 3, 4, 10, 11, 12, 500000,
+                             tzinfo=timezone(timedelta(hours=5, minutes=30))),
+                    '10:11')
+
+        self.assertEqual(expected, compile_converter(table)(row))
+
+    def test_invalid_bool(self):
+        row = ('1', '', '', '', '', 'maybe')
+
+        with self.assertRaises(ValueError):
+            compile_converter(self.table)(row)
+
+    def test_row_length(self):
+        with self.assertRaises(ValueError):
+            compile_converter(self.table)(('1', 'a'))
+
+    def test_cached(self):
+        self.assertIs(converter(self.table), converter(make_table()))
+        self.assertIsNot(converter(self.table), converter(self.table, null_str='NA'))
+        self.assertNotEqual(table_fingerprint(self.table),
+                            table_fingerprint(make_table('other')))
+
+    def test_convert_records(self):
+        rows = [('1', 'a', '', '', '', ''), ('2', 'b', '1', '', '', 'f')]
+        expected = [(1, 'a', None, None, None, None),
+                    (2, 'b', Decimal('1'), None, None, False)]
+
+        result = list(convert_records(self.table, rows))
+
+        self.assertEqual(expected, result)
+
+    def test_parse_iso_date(self):
+        self.assertEqual(date(2017, 1, 2), parse_iso_date('2017-01-02'))
+
+        with self.assertRaises(ValueError):
+            parse_iso_date('2017/01/02')
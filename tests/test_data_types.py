@@ -1,6 +1,11 @@
 import unittest
 
-from postpy.data_types import generate_numeric_range, NumericRange
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from uuid import UUID
+
+from postpy.data_types import (generate_numeric_range, NumericRange, parse_bool,
+                               text_parser)
 
 
 class TestNumericRange(unittest.TestCase):
@@ -18,3 +23,31 @@ class TestNumericRange(unittest.TestCase):
         result = list(generate_numeric_range(items, lower_bound, upper_bound))
 
         self.assertEqual(expected, result)
+
+
+class TestTextParser(unittest.TestCase):
+    def test_parse_bool(self):
+        self.assertEqual([True, True, False, False],
+                         [parse_bool(text) for text in ('yes', '1', 'f', 'No')])
+
+        for text in ('maybe', '2', 'tru', ''):
+            with self.assertRaises(ValueError):
+                parse_bool(text)
+
+    def test_text_parser(self):
+        self.assertEqual(5, text_parser('INTEGER')('5'))
+        self.assertEqual(Decimal('1.50'), text_parser('numeric(10,2)')('1.50'))
+        self.assertEqual(date(2016, 1, 2), text_parser('date')('2016-01-02'))
+        self.assertEqual(datetime(2016, 1, 2, 3, 4, 5),
+                         text_parser('timestamp without time zone')(
+                             '2016-01-02 03:04:05'))
+        self.assertEqual('IL', text_parser('CHAR(2)')('IL'))
+        self.assertTrue(text_parser('boolean')('t'))
+        self.assertEqual(datetime(2016, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+                         text_parser('timestamptz')('2016-01-02 03:04:05+00'))
+        self.assertEqual(datetime(2016, 1, 2, 3, 4, tzinfo=timezone(-timedelta(hours=8))),
+                         text_parser('timestamp with time zone')(
+                             '2016-01-02T03:04:00-08:00'))
+        self.assertFalse(text_parser('boolean')(' OFF'))
+        self.assertEqual(UUID(int=1),
+                         text_parser('uuid')('00000000-0000-0000-0000-000000000001'))
@@ -41,6 +41,45 @@ class TestCompileDDLStatements(PostgresStatementFixture, unittest.TestCase):
 
         self.assertSQLStatementEqual(expected, result)
 
+    def test_compile_create_table_without_primary_key(self):
+        expected = 'CREATE TABLE tname (c1 INTEGER NULL);'
+        result = ddl.compile_create_table(
+            qualified_name='tname',
+            column_statement='c1 INTEGER NULL,',
+            primary_key_statement='')
+
+        self.assertSQLStatementEqual(expected, result)
+
+    def test_compile_create_unlogged_table(self):
+        expected = 'CREATE UNLOGGED TABLE tname (c1 INTEGER NULL, PRIMARY KEY (c1));'
+        result = ddl.compile_create_table(
+            qualified_name='tname',
+            column_statement='c1 INTEGER NULL,',
+            primary_key_statement='PRIMARY KEY (c1)',
+            unlogged=True)
+
+        self.assertSQLStatementEqual(expected, result)
+
+    def test_compile_set_logged(self):
+        self.assertSQLStatementEqual('ALTER TABLE s.t SET LOGGED;',
+                                     ddl.compile_set_logged('s.t'))
+        self.assertSQLStatementEqual('ALTER TABLE s.t SET UNLOGGED;',
+                                     ddl.compile_set_logged('s.t', logged=False))
+
+    def test_compile_create_index(self):
+        expected = 'CREATE UNIQUE INDEX tname_pkey ON s.tname (c1, c2);'
+        result = ddl.compile_create_index('tname_pkey', 's.tname', ['c1', 'c2'],
+                                          unique=True)
+
+        self.assertSQLStatementEqual(expected, result)
+
+    def test_compile_add_constraint_using_index(self):
+        expected = ('ALTER TABLE s.tname ADD CONSTRAINT tname_pkey'
+                    ' PRIMARY KEY USING INDEX tname_pkey;')
+        result = ddl.compile_add_constraint_using_index('s.tname', 'tname_pkey')
+
+        self.assertSQLStatementEqual(expected, result)
+
 
 class TestCreateTableAs(PostgresStatementFixture, unittest.TestCase):
 
@@ -65,6 +104,26 @@ class TestCreateTableAs(PostgresStatementFixture, unittest.TestCase):
 
         self.assertSQLStatementEqual(expected, result)
 
+    def test_compile_create_empty(self):
+        expected = ("CREATE TABLE t AS (\nSELECT one, two FROM p WHERE one=two)"
+                    " WITH NO DATA")
+        result = self.create.compile_create_empty()
+
+        self.assertSQLStatementEqual(expected, result)
+
+    def test_compile_insert(self):
+        expected = ("INSERT INTO t SELECT one, two FROM p"
+                    " WHERE (one=two) AND one < 10")
+        result = self.create.compile_insert('one < 10')
+
+        self.assertSQLStatementEqual(expected, result)
+
+    def test_compile_range_clauses(self):
+        expected = ['id < 5', 'id >= 5 AND id < 9', 'id >= 9']
+        result = ddl.compile_range_clauses('id', ['5', '9'])
+
+        self.assertEqual(expected, result)
+
 
 class TestMaterializedView(PostgresStatementFixture, unittest.TestCase):
     def setUp(self):
@@ -88,3 +147,12 @@ class TestMaterializedView(PostgresStatementFixture, unittest.TestCase):
         result = ddl.MaterializedView(self.name).create(no_data=True)[0]
 
         self.assertSQLStatementEqual(expected, result)
+
+    def test_refresh(self):
+        view = ddl.MaterializedView(self.name)
+
+        self.assertSQLStatementEqual('REFRESH MATERIALIZED VIEW my_view',
+                                     view.refresh())
+        self.assertSQLStatementEqual(
+            'REFRESH MATERIALIZED VIEW CONCURRENTLY my_view',
+            view.refresh(concurrently=True))
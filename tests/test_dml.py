@@ -1,14 +1,19 @@
+import codecs
+import csv
 import io
 import textwrap
 import unittest
 from collections import namedtuple
 from datetime import date
 
-from postpy.base import Table, Column, PrimaryKey
+import psycopg2
+
+from postpy.base import (Table, Column, PrimaryKey, Partitioning,
+                         ListPartition, DefaultPartition)
 from postpy import dml
 from postpy.fixtures import (PostgresStatementFixture, skipPGVersionBefore,
                              get_records, PG_UPSERT_VERSION, PostgresDmlFixture,
-                             fetch_one_result)
+                             PostgreSQLFixture, fetch_one_result)
 
 
 def make_records():
@@ -54,6 +59,9 @@ class TestStatementFormatting(PostgresStatementFixture, unittest.TestCase):
         result = dml.compile_truncate_table(qualified_name)
 
         self.assertSQLStatementEqual(expected, result)
+        self.assertSQLStatementEqual(
+            'TRUNCATE my_schema.my_table;',
+            dml.compile_truncate_table(qualified_name, cascade=False))
 
 
 class TestInsertRecords(PostgresDmlFixture, unittest.TestCase):
@@ -376,3 +384,164 @@ class TestDeletePrimaryKeyRecords(PostgresDmlFixture, unittest.TestCase):
             for record in self.records:
                 cursor.execute(insert_statement, record)
             self.conn.commit()
+
+
+class TestPartitionLoaders(PostgreSQLFixture, unittest.TestCase):
+
+    def setUp(self):
+        self.column_names, self.records = make_records()
+        columns = [Column('city', 'VARCHAR(50)'), Column('state', 'CHAR(2)')]
+        partitioning = Partitioning('LIST', ['state'], [
+            ListPartition('cities_east', ['NY', 'FL']),
+            DefaultPartition('cities_other')
+        ])
+        self.table = Table('partitioned_cities', columns,
+                           PrimaryKey(['city', 'state']),
+                           partitioning=partitioning)
+
+        with self.conn.cursor() as cursor:
+            cursor.execute(self.table.create_statement())
+            for statement in self.table.create_partition_statements():
+                cursor.execute(statement)
+        self.conn.commit()
+
+    def test_insert_many_partitions(self):
+        records = [record for record in self.records if record.state]
+
+        result = dml.insert_many_partitions(
+            self.conn, self.table, self.column_names, records,
+            chunksize=1, workers=2)
+
+        self.assertEqual({'cities_east': 2, 'cities_other': 1}, result)
+        self.assertEqual(2, len(get_records(self.conn, 'cities_east')))
+
+    def test_copy_from_partitions(self):
+        text = '\n'.join(line for line in delimited_text().splitlines()
+                         if 'Zootopia' not in line)
+        copy_from = dml.CopyFromPartitions(self.table, workers=1, chunksize=1,
+                                           delimiter='|')
+
+        result = copy_from(self.conn, io.StringIO(text))
+
+        self.assertEqual({'cities_east': 2, 'cities_other': 1}, result)
+        self.assertEqual([('Chicago', 'IL')],
+                         get_records(self.conn, 'cities_other'))
+
+    def test_serial_failure_rolled_back(self):
+        records = [record for record in self.records if record.state]
+        text = 'city|state\nChicago|IL\nChicago|IL\n'
+        copy_from = dml.CopyFromPartitions(self.table, workers=1, chunksize=1,
+                                           delimiter='|')
+
+        with self.assertRaises(psycopg2.IntegrityError):
+            dml.insert_many_partitions(self.conn, self.table, self.column_names,
+                                       records + records[:1], chunksize=1,
+                                       workers=1)
+        with self.assertRaises(psycopg2.IntegrityError):
+            copy_from(self.conn, io.StringIO(text))
+
+        self.assertEqual([], get_records(self.conn, self.table.qualified_name))
+
+    def tearDown(self):
+        self.conn.rollback()
+        with self.conn.cursor() as cursor:
+            cursor.execute(self.table.drop_statement())
+        self.conn.commit()
+
+
+class TestCopyFromCsvBytes(PostgreSQLFixture, unittest.TestCase):
+
+    def setUp(self):
+        with self.conn.cursor() as cursor:
+            cursor.execute('CREATE TABLE copy_bytes_table (city TEXT);')
+        self.conn.commit()
+        self.text = 'city\nZürich\nSão Paulo\n'
+
+    def test_sniffed_encoding(self):
+        for encoding, data in [('cp1252', self.text.encode('cp1252')),
+                               ('utf_8', codecs.BOM_UTF8 + self.text.encode())]:
+            result = dml.copy_from_csv_bytes(self.conn, io.BytesIO(data),
+                                             'copy_bytes_table', sample_size=8)
+
+            self.assertEqual(encoding, result)
+
+        expected = ['São Paulo', 'São Paulo', 'Zürich', 'Zürich']
+
+        self.assertEqual(expected, self._cities())
+
+    def test_declared_encoding(self):
+        data = io.BytesIO(self.text.encode('latin1'))
+
+        dml.copy_from_csv_bytes(self.conn, data, 'copy_bytes_table',
+                                encoding='latin1')
+
+        self.assertEqual(['São Paulo', 'Zürich'], self._cities())
+
+    def test_declared_utf8_sig(self):
+        data = io.BytesIO(codecs.BOM_UTF8 + self.text.encode())
+
+        dml.copy_from_csv_bytes(self.conn, data, 'copy_bytes_table',
+                                encoding='utf-8-sig')
+
+        self.assertEqual(['São Paulo', 'Zürich'], self._cities())
+
+    def test_text_file(self):
+        with self.assertRaises(TypeError):
+            dml.copy_from_csv_bytes(self.conn, io.StringIO(self.text),
+                                    'copy_bytes_table')
+
+    def _cities(self):
+        with self.conn.cursor() as cursor:
+            cursor.execute('SELECT city FROM copy_bytes_table ORDER BY city')
+            return [city for city, in cursor.fetchall()]
+
+    def tearDown(self):
+        self.conn.rollback()
+        with self.conn.cursor() as cursor:
+            cursor.execute('DROP TABLE copy_bytes_table;')
+        self.conn.commit()
+
+
+class TestCopyFromTolerant(PostgreSQLFixture, unittest.TestCase):
+
+    def setUp(self):
+        self.table = Table('tolerant_table', [Column('city', 'TEXT'),
+                                              Column('population', 'INTEGER')],
+                           PrimaryKey(['city']))
+        with self.conn.cursor() as cursor:
+            cursor.execute(self.table.create_statement())
+        self.conn.commit()
+
+    def test_rejects(self):
+        text = ('city,population\n'
+                'Chicago,2700000\n'
+                'Miami,many\n'
+                '"Multi\nLine",10\n'
+                'Chicago,1\n'
+                'Austin\n'
+                'Boston,650000\n')
+        reject_file = io.StringIO()
+        copier = dml.CopyFromTolerant(self.table, reject_file=reject_file,
+                                      chunksize=4)
+
+        result = copier(self.conn, io.StringIO(text))
+        self.conn.commit()
+
+        self.assertEqual((3, 3), result)
+        with self.conn.cursor() as cursor:
+            cursor.execute('SELECT city FROM tolerant_table ORDER BY city')
+            self.assertEqual([('Boston',), ('Chicago',), ('Multi\nLine',)],
+                             cursor.fetchall())
+
+        rejects = list(csv.reader(io.StringIO(reject_file.getvalue())))
+
+        self.assertEqual([['2', 'Miami,many'], ['4', 'Chicago,1'], ['5', 'Austin']],
+                         [[number, record] for number, _, record in rejects])
+        self.assertIn('invalid input syntax', rejects[0][1])
+        self.assertIn('duplicate key', rejects[1][1])
+
+    def tearDown(self):
+        self.conn.rollback()
+        with self.conn.cursor() as cursor:
+            cursor.execute(self.table.drop_statement())
+        self.conn.commit()
@@ -1,7 +1,7 @@
 import unittest
 
 from postpy.fixtures import PostgresStatementFixture
-from postpy.dml_copy import copy_from_csv_sql
+from postpy.dml_copy import RecordStream, copy_from_csv_sql, iter_csv_records
 
 
 class TestDmlCopyStatements(PostgresStatementFixture, unittest.TestCase):
@@ -19,9 +19,53 @@ class TestDmlCopyStatements(PostgresStatementFixture, unittest.TestCase):
                     "    QUOTE '\"',"
                     "    ESCAPE '\\',"
                     "    FORCE_NOT_NULL (foo, bar),"
-                    "    ENCODING 'iso8859_1')")
+                    "    ENCODING 'LATIN1')")
         result = copy_from_csv_sql(table, delimiter=delimiter, null_str='NULL',
                                    header=False, encoding=encoding,
                                    force_not_null=force_not_null)
 
         self.assertSQLStatementEqual(expected, result)
+
+    def test_copy_from_csv_sql_freeze(self):
+        expected = ("COPY my_table FROM STDIN"
+                    "  WITH ("
+                    "    FORMAT CSV,"
+                    "    DELIMITER ',',"
+                    "    NULL '',"
+                    "    HEADER,"
+                    "    QUOTE '\"',"
+                    "    ESCAPE '\\',"
+                    "    ENCODING 'UTF8',"
+                    "    FREEZE)")
+        result = copy_from_csv_sql('my_table', freeze=True)
+
+        self.assertSQLStatementEqual(expected, result)
+
+
+class TestIterCsvRecords(unittest.TestCase):
+    def test_multiline_quoted_records(self):
+        lines = ['a,"multi\n', 'line",1\n', 'b,"say ""hi""",2\n', 'c,,3\n']
+
+        expected = ['a,"multi\nline",1\n', 'b,"say ""hi""",2\n', 'c,,3\n']
+        result = list(iter_csv_records(lines, escape_str='"'))
+
+        self.assertEqual(expected, result)
+
+    def test_escaped_quote(self):
+        lines = ['a,"escaped \\" quote\n', 'continues",1\n']
+
+        expected = [''.join(lines)]
+        result = list(iter_csv_records(lines))
+
+        self.assertEqual(expected, result)
+
+
+class TestRecordStream(unittest.TestCase):
+
+    def test_read(self):
+        stream = RecordStream(['a,1\n', 'b,2\n', 'c,3\n'])
+
+        self.assertEqual('a,1\nb', stream.read(5))
+        self.assertEqual(',2\n', stream.readline())
+        self.assertEqual('c,3\n', stream.read())
+        self.assertEqual('', stream.read(5))
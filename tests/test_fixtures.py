@@ -0,0 +1,50 @@
+import os
+import unittest
+from unittest import mock
+
+from postpy.dml import insert_many
+from postpy.fixtures import (TemplateDatabaseFixture, fetch_one_result,
+                             worker_database_name)
+
+
+class TestWorkerDatabaseName(unittest.TestCase):
+
+    def test_worker_database_name(self):
+        with mock.patch.dict(os.environ, {'PYTEST_XDIST_WORKER': 'gw3'}):
+            self.assertEqual('tests_gw3', worker_database_name('tests'))
+
+        with mock.patch.dict(os.environ, clear=False):
+            os.environ.pop('PYTEST_XDIST_WORKER', None)
+            self.assertEqual('tests_main', worker_database_name('tests'))
+
+
+class TestTemplateDatabaseFixture(TemplateDatabaseFixture, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        with self.conn.cursor() as cursor:
+            cursor.execute('CREATE TABLE fixture_cities (city TEXT PRIMARY KEY);')
+        self.conn.commit()
+
+    def test_commits_rolled_back(self):
+        insert_many(self.conn, 'fixture_cities', ['city'], [('Chicago',)])
+
+        self.assertEqual((1,), fetch_one_result(
+            self.conn, 'SELECT count(*) FROM fixture_cities'))
+
+    def test_rollback_to_commit(self):
+        with self.conn.cursor() as cursor:
+            cursor.execute("INSERT INTO fixture_cities VALUES ('Miami');")
+        self.conn.commit()
+
+        with self.assertRaises(Exception):
+            with self.conn:
+                with self.conn.cursor() as cursor:
+                    cursor.execute("INSERT INTO fixture_cities VALUES ('Miami');")
+
+        self.assertEqual((1,), fetch_one_result(
+            self.conn, 'SELECT count(*) FROM fixture_cities'))
+
+    def test_database(self):
+        self.assertEqual((worker_database_name(),),
+                         fetch_one_result(self.conn, 'SELECT current_database()'))
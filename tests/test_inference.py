@@ -0,0 +1,91 @@
+import io
+import textwrap
+import unittest
+
+from postpy.base import Column, PrimaryKey, Table
+from postpy.fixtures import PostgresStatementFixture
+from postpy.inference import ColumnInference, infer_table
+
+
+def infer_type(values, null_str=''):
+    column = ColumnInference('column', null_str=null_str)
+
+    for value in values:
+        column.update(value)
+
+    return column.data_type
+
+
+class TestColumnInference(unittest.TestCase):
+
+    def test_integers(self):
+        self.assertEqual('smallint', infer_type(['1', '-32768', '32767']))
+        self.assertEqual('integer', infer_type(['1', '32768']))
+        self.assertEqual('bigint', infer_type(['1', '-2147483649']))
+        self.assertEqual('numeric(19, 0)', infer_type(['9223372036854775808']))
+
+    def test_leading_zeros(self):
+        self.assertEqual('text', infer_type(['60601', '02134']))
+
+    def test_numeric(self):
+        self.assertEqual('numeric(5, 3)', infer_type(['1', '10.5', '-0.125']))
+
+    def test_double(self):
+        self.assertEqual('double precision', infer_type(['1.5', '2e10', 'NaN']))
+
+    def test_temporal(self):
+        self.assertEqual('date', infer_type(['2017-01-02', '2017-12-31']))
+        self.assertEqual('timestamp', infer_type(['2017-01-02',
+                                                  '2017-01-02 10:11:12']))
+
+    def test_other(self):
+        self.assertEqual('boolean', infer_type(['t', 'False', 'yes']))
+        self.assertEqual(
+            'uuid', infer_type(['a0eebc99-9c0b-4ef8-bb6d-6bb9bd380a11']))
+        self.assertEqual('text', infer_type(['1', 'one']))
+        self.assertEqual('text', infer_type(['NA'], null_str='NA'))
+
+    def test_nullable(self):
+        column = ColumnInference('column')
+        column.update('1')
+        column.update('')
+
+        self.assertEqual(Column('column', 'smallint', True), column.column())
+
+
+class TestInferTable(PostgresStatementFixture, unittest.TestCase):
+
+    def setUp(self):
+        self.text = textwrap.dedent("""\
+            id,zip,price,listed
+            1,60601,1.25,2017-01-02
+            2,02134,,2017-01-03
+            70000,10001,3.5,2017-01-04
+            """)
+
+    def test_infer_table(self):
+        expected = Table('listing', [Column('id', 'integer', False),
+                                     Column('zip', 'text', False),
+                                     Column('price', 'numeric(3, 2)', True),
+                                     Column('listed', 'date', False)],
+                         PrimaryKey(['id']))
+        result = infer_table('listing', io.StringIO(self.text),
+                             primary_key=['id'])
+
+        self.assertEqual(expected, result)
+
+    def test_without_primary_key(self):
+        expected = ('CREATE TABLE public.listing (id integer NOT NULL,'
+                    ' zip text NOT NULL, price numeric(3, 2) NULL,'
+                    ' listed date NOT NULL);')
+        result = infer_table('listing', io.StringIO(self.text)).create_statement()
+
+        self.assertSQLStatementEqual(expected, result)
+
+    def test_sample(self):
+        result = infer_table('listing', io.StringIO(self.text), sample_size=2,
+                             primary_key=['id'])
+
+        self.assertEqual('smallint', result.columns[0].data_type)
+        self.assertEqual([False, True, True, True],
+                         [column.nullable for column in result.columns])
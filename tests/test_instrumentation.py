@@ -0,0 +1,105 @@
+import io
+import json
+import unittest
+
+from postpy import instrumentation
+from postpy.dml import copy_from_csv
+from postpy.fixtures import PostgreSQLFixture
+from postpy.instrumentation import (StatementHistogram, StatementRecord,
+                                    fingerprint, normalize_statement)
+from postpy.sql import execute_transaction, select
+
+
+def make_record(statement, duration, rows=1):
+    return StatementRecord(fingerprint(statement), statement, None,
+                           rows, 10, duration, None)
+
+
+class TestNormalizeStatement(unittest.TestCase):
+
+    def test_literals_replaced(self):
+        statement = "SELECT * FROM foo WHERE bar = 'baz' AND id > 10"
+
+        expected = 'SELECT * FROM foo WHERE bar = ? AND id > ?'
+        result = normalize_statement(statement)
+
+        self.assertEqual(expected, result)
+
+    def test_parameter_batches_share_fingerprint(self):
+        first = 'INSERT INTO foo (a,b) VALUES %s,%s,%s'
+        second = 'INSERT INTO foo (a,b) VALUES %s'
+
+        self.assertEqual(fingerprint(first), fingerprint(second))
+
+    def test_temporary_table_names_share_fingerprint(self):
+        first = 'DROP TABLE IF EXISTS tmp_bulk_upsert_123_foo;'
+        second = 'DROP TABLE IF EXISTS tmp_bulk_upsert_9876_foo;'
+
+        self.assertEqual(fingerprint(first), fingerprint(second))
+
+
+class TestStatementHistogram(unittest.TestCase):
+
+    def setUp(self):
+        self.histogram = StatementHistogram(bounds=(0.1, 1.))
+
+    def test_aggregate(self):
+        statement = 'SELECT 1'
+        for duration in (0.05, 0.5, 5.):
+            self.histogram(make_record(statement, duration))
+
+        result = self.histogram.to_dict()['statements'][fingerprint(statement)]
+
+        self.assertEqual(3, result['calls'])
+        self.assertEqual(3, result['rows'])
+        self.assertEqual([1, 1, 1], result['histogram'])
+        self.assertEqual(0.05, result['min_time'])
+        self.assertEqual(5., result['max_time'])
+
+    def test_to_json(self):
+        self.histogram(make_record('SELECT 1', 0.01))
+
+        result = json.loads(self.histogram.to_json())
+
+        self.assertEqual([0.1, 1.], result['bounds'])
+        self.assertEqual(1, len(result['statements']))
+
+
+class TestExecuteHooks(PostgreSQLFixture, unittest.TestCase):
+
+    def setUp(self):
+        self.before = []
+        self.after = []
+        instrumentation.register_before_execute(
+            lambda cursor, statement, params: self.before.append(statement))
+        instrumentation.register_after_execute(self.after.append)
+
+    def test_execute_transaction(self):
+        statements = ['SELECT 1', 'SELECT 2']
+
+        execute_transaction(self.conn, statements)
+
+        self.assertEqual(statements, self.before)
+        self.assertEqual(statements, [record.statement for record in self.after])
+        self.assertTrue(all(record.connection is self.conn
+                            for record in self.after))
+
+    def test_select_rows(self):
+        list(select(self.conn, 'select * from generate_series(1, 3);'))
+
+        self.assertEqual(3, self.after[0].rows)
+
+    def test_copy_bytes(self):
+        text = 'a\n1\n2\n'
+        with self.conn.cursor() as cursor:
+            cursor.execute('CREATE TEMPORARY TABLE hook_copy (a INTEGER);')
+
+        copy_from_csv(self.conn, io.StringIO(text), 'hook_copy')
+
+        record = self.after[-1]
+        self.assertEqual(len(text), record.bytes)
+        self.assertEqual(2, record.rows)
+
+    def tearDown(self):
+        instrumentation.clear_hooks()
+        self.conn.rollback()
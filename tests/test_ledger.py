@@ -0,0 +1,144 @@
+import hashlib
+import io
+import unittest
+
+from postpy import ledger
+from postpy.base import Column, PrimaryKey, Table
+from postpy.dml import CopyFrom, CopyFromUpsert, insert_many
+from postpy.fixtures import PostgreSQLFixture, fetch_one_result
+
+
+TEXT = 'city,state,country\nChicago,IL,US\nMiami,FL,US\n'
+
+
+class TestHashingReader(unittest.TestCase):
+
+    def test_hexdigest(self):
+        reader = ledger.HashingReader(io.StringIO(TEXT))
+
+        while reader.read(5):
+            pass
+
+        self.assertEqual(hashlib.sha256(TEXT.encode()).hexdigest(),
+                         reader.hexdigest())
+
+
+class TestLoadOnce(PostgreSQLFixture, unittest.TestCase):
+
+    def setUp(self):
+        self.table = Table('ledger_cities', [Column('city', 'TEXT'),
+                                             Column('state', 'TEXT'),
+                                             Column('country', 'TEXT')],
+                           PrimaryKey(['city']))
+        with self.conn.cursor() as cursor:
+            cursor.execute(self.table.create_statement())
+        self.conn.commit()
+        ledger.create_ledger(self.conn)
+
+    def test_load_once(self):
+        first = ledger.load_once(self.conn, CopyFrom(self.table), io.StringIO(TEXT))
+        second = ledger.load_once(self.conn, CopyFrom(self.table), io.StringIO(TEXT))
+
+        self.assertEqual((2, False), (first.rows, first.skipped))
+        self.assertTrue(second.skipped)
+        self.assertEqual(first.content_hash, second.content_hash)
+        self.assertEqual((2,), self._count())
+        self.assertTrue(ledger.is_loaded(self.conn, self.table.qualified_name,
+                                         first.content_hash))
+
+    def test_known_hash(self):
+        content_hash = hashlib.sha256(TEXT.encode()).hexdigest()
+        upsert = CopyFromUpsert(self.table)
+
+        ledger.load_once(self.conn, upsert, io.StringIO(TEXT))
+        result = ledger.load_once(self.conn, upsert, io.StringIO('not csv'),
+                                  content_hash=content_hash)
+
+        self.assertTrue(result.skipped)
+        self.assertEqual((2,), self._count())
+
+    def test_failed_load_not_recorded(self):
+        with self.assertRaises(Exception):
+            ledger.load_once(self.conn, CopyFrom(self.table),
+                             io.StringIO('city,state,country\nChicago,IL\n'))
+
+        self.assertEqual((0,), fetch_one_result(
+            self.conn, 'SELECT count(*) FROM load_ledger'))
+
+    def _count(self):
+        return fetch_one_result(self.conn, 'SELECT count(*) FROM ledger_cities')
+
+    def tearDown(self):
+        self.conn.rollback()
+        with self.conn.cursor() as cursor:
+            cursor.execute(self.table.drop_statement())
+            cursor.execute('DROP TABLE load_ledger;')
+        self.conn.commit()
+
+
+class TestCheckpointedInsert(PostgreSQLFixture, unittest.TestCase):
+
+    def setUp(self):
+        self.records = [(number,) for number in range(10)]
+        with self.conn.cursor() as cursor:
+            cursor.execute('CREATE TABLE checkpoint_numbers (number INT PRIMARY KEY);')
+        self.conn.commit()
+        self.checkpoint = ledger.Checkpoint('numbers')
+        self.checkpoint.create(self.conn)
+
+    def test_resume(self):
+        def failing_records():
+            for record in self.records[:7]:
+                yield record
+            raise RuntimeError('source failed')
+
+        with self.assertRaises(RuntimeError):
+            insert_many(self.conn, 'checkpoint_numbers', ['number'],
+                        failing_records(), chunksize=2,
+                        checkpoint=self.checkpoint, commit_every=2)
+
+        self.assertEqual(ledger.Progress(2, 4),
+                         self.checkpoint.position(self.conn))
+        self.assertEqual((4,), self._count())
+
+        result = insert_many(self.conn, 'checkpoint_numbers', ['number'],
+                             self.records, chunksize=2,
+                             checkpoint=self.checkpoint, commit_every=2)
+
+        self.assertEqual(10, result)
+        self.assertEqual(ledger.Progress(0, 0),
+                         self.checkpoint.position(self.conn))
+        self.assertEqual((10,), self._count())
+
+    def test_completed_load_cleared(self):
+        more_records = [(number,) for number in range(10, 15)]
+
+        insert_many(self.conn, 'checkpoint_numbers', ['number'], self.records,
+                    checkpoint=self.checkpoint)
+
+        self.assertEqual(ledger.Progress(0, 0), self.checkpoint.position(self.conn))
+
+        result = insert_many(self.conn, 'checkpoint_numbers', ['number'],
+                             more_records, checkpoint=self.checkpoint)
+
+        self.assertEqual(5, result)
+        self.assertEqual((15,), self._count())
+
+    def test_clear(self):
+        with self.conn.cursor() as cursor:
+            self.checkpoint.save(cursor, ledger.Progress(2, 4))
+        self.conn.commit()
+
+        self.checkpoint.clear(self.conn)
+
+        self.assertEqual(ledger.Progress(0, 0), self.checkpoint.position(self.conn))
+
+    def _count(self):
+        return fetch_one_result(self.conn, 'SELECT count(*) FROM checkpoint_numbers')
+
+    def tearDown(self):
+        self.conn.rollback()
+        with self.conn.cursor() as cursor:
+            cursor.execute('DROP TABLE checkpoint_numbers;')
+            cursor.execute('DROP TABLE load_progress;')
+        self.conn.commit()
@@ -0,0 +1,86 @@
+import threading
+import unittest
+
+from postpy import parallel
+from postpy.connections import connect
+from postpy.fixtures import PostgreSQLFixture
+
+
+class TestTopologicalOrder(unittest.TestCase):
+
+    def test_order(self):
+        graph = {'c': {'a', 'b'}, 'b': {'a'}, 'a': set()}
+
+        expected = ['a', 'b', 'c']
+        result = parallel.topological_order(graph)
+
+        self.assertEqual(expected, result)
+
+    def test_cycle(self):
+        graph = {'a': {'b'}, 'b': {'a'}, 'c': set()}
+
+        with self.assertRaises(ValueError):
+            parallel.topological_order(graph)
+
+
+class TestCriticalPath(unittest.TestCase):
+
+    def test_critical_path(self):
+        results = [parallel.JobResult('a', None, 1.), parallel.JobResult('b', None, 5.),
+                   parallel.JobResult('c', None, 1.), parallel.JobResult('d', None, 3.)]
+        dependencies = {'c': {'a', 'b'}, 'd': {'a'}, 'b': {'missing'}}
+
+        self.assertEqual(['b', 'c'], parallel.critical_path(results, dependencies))
+        self.assertEqual([], parallel.critical_path([], dependencies))
+
+
+class TestRunJobs(PostgreSQLFixture, unittest.TestCase):
+
+    def test_execute_parallel(self):
+        statements = ['SELECT 1', 'SELECT 2', 'SELECT 3']
+
+        result = parallel.execute_parallel(statements, workers=2)
+
+        self.assertEqual(statements, [job.name for job in result])
+
+    def test_workers_bounded_by_jobs(self):
+        connections = []
+
+        def connection_factory():
+            conn = connect()
+            connections.append(conn)
+            return conn
+
+        parallel.execute_parallel(['SELECT 1'], workers=4,
+                                  connection_factory=connection_factory)
+
+        self.assertEqual(1, len(connections))
+
+    def test_run_dag(self):
+        finished = []
+        lock = threading.Lock()
+
+        def job(name):
+            def run(conn):
+                with conn.cursor() as cursor:
+                    cursor.execute('SELECT pg_sleep(0.01)')
+                with lock:
+                    finished.append(name)
+            return name, run
+
+        jobs = [job('child'), job('parent'), job('other')]
+        dependencies = {'child': {'parent', 'missing'}}
+
+        result = parallel.run_dag(jobs, dependencies, workers=3)
+
+        self.assertEqual(['child', 'parent', 'other'], [job.name for job in result])
+        self.assertLess(finished.index('parent'), finished.index('child'))
+
+    def test_run_dag_error(self):
+        def fail(conn):
+            raise RuntimeError
+
+        jobs = [('parent', fail), ('child', lambda conn: None)]
+
+        with self.assertRaises(RuntimeError):
+            parallel.run_dag(jobs, {'child': {'parent'}}, workers=2)
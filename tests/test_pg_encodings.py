@@ -1,11 +1,48 @@
+import codecs
 import unittest
 
-from postpy.pg_encodings import get_postgres_encoding
+from postpy.pg_encodings import (UnsupportedEncodingError, get_postgres_encoding,
+                                 sniff_encoding)
 
 
 class TestPGEncodings(unittest.TestCase):
     def test_get_postgres_encoding(self):
-        expected = 'utf_8'
+        expected = 'UTF8'
         result = get_postgres_encoding('utf8')
 
         self.assertEqual(expected, result)
+
+    def test_codec_names(self):
+        self.assertEqual('WIN1252', get_postgres_encoding('cp1252'))
+        self.assertEqual('WIN1252', get_postgres_encoding('windows-1252'))
+        self.assertEqual('LATIN1', get_postgres_encoding('latin-1'))
+        self.assertEqual('SJIS', get_postgres_encoding('shift_jis'))
+        self.assertEqual('SJIS', get_postgres_encoding('cp932'))
+        self.assertEqual('UTF8', get_postgres_encoding('utf-8-sig'))
+        self.assertEqual('EUC_CN', get_postgres_encoding('euc-cn'))
+
+    def test_unsupported_encoding(self):
+        with self.assertRaises(UnsupportedEncodingError):
+            get_postgres_encoding('utf-16')
+
+        with self.assertRaises(UnsupportedEncodingError):
+            get_postgres_encoding('not-an-encoding')
+
+
+class TestSniffEncoding(unittest.TestCase):
+    def test_utf8(self):
+        sample = 'city\nZürich\n'.encode('utf-8')
+
+        self.assertEqual('utf_8', sniff_encoding(sample))
+        self.assertEqual('utf_8', sniff_encoding(codecs.BOM_UTF8 + sample))
+        self.assertEqual('utf_8', sniff_encoding(sample[:-2]))
+
+    def test_fallback(self):
+        sample = 'city\nZürich\n'.encode('cp1252')
+
+        self.assertEqual('cp1252', sniff_encoding(sample))
+        self.assertEqual('latin1', sniff_encoding(sample, fallback='latin1'))
+
+    def test_unsupported_bom(self):
+        with self.assertRaises(UnsupportedEncodingError):
+            sniff_encoding('city'.encode('utf-16'))
@@ -0,0 +1,75 @@
+import unittest
+
+from postpy.fixtures import PostgreSQLFixture, fetch_one_result
+from postpy.instrumentation import execute
+from postpy.profiling import (SlowStatementProfiler, HotNode, is_dml,
+                              summarize_plan)
+
+
+def mock_plan():
+    return [{'Plan': {
+        'Node Type': 'ModifyTable',
+        'Relation Name': 'target',
+        'Plans': [{
+            'Node Type': 'Hash Join',
+            'Plans': [
+                {'Node Type': 'Seq Scan', 'Relation Name': 'target',
+                 'Actual Total Time': 10.},
+                {'Node Type': 'Hash', 'Hash Batches': 8,
+                 'Original Hash Batches': 1, 'Actual Total Time': 4.,
+                 'Plans': [{'Node Type': 'Seq Scan', 'Relation Name': 'staging',
+                            'Actual Total Time': 3.}]}
+            ]
+        }]
+    }}]
+
+
+class TestSummarizePlan(unittest.TestCase):
+
+    def test_summarize_plan(self):
+        expected = [
+            HotNode('Seq Scan', 'target', 'seq scan on target table', 10.),
+            HotNode('Hash', None, 'hash spilled to 8 batches', 4.),
+            HotNode('Seq Scan', 'staging', 'seq scan', 3.)
+        ]
+        result = summarize_plan(mock_plan())
+
+        self.assertEqual(expected, result)
+
+    def test_is_dml(self):
+        self.assertTrue(is_dml('INSERT INTO foo SELECT 1'))
+        self.assertTrue(is_dml('  delete from foo'))
+        self.assertFalse(is_dml('SELECT 1'))
+
+
+class TestSlowStatementProfiler(PostgreSQLFixture, unittest.TestCase):
+
+    def setUp(self):
+        self.table_name = 'profiled_table'
+        with self.conn.cursor() as cursor:
+            cursor.execute('CREATE TEMPORARY TABLE profiled_table (a INTEGER);')
+
+    def test_threshold_profile_rolls_back(self):
+        with SlowStatementProfiler(threshold=0.) as profiler:
+            with self.conn.cursor() as cursor:
+                execute(cursor, 'INSERT INTO profiled_table VALUES (1), (2);')
+
+        result = fetch_one_result(self.conn, 'SELECT count(*) FROM profiled_table')
+
+        self.assertEqual((2,), result)
+        self.assertEqual(1, len(profiler.profiles))
+        self.assertEqual('ModifyTable',
+                         profiler.profiles[0].plan[0]['Plan']['Node Type'])
+
+    def test_sampled_profile(self):
+        with SlowStatementProfiler(threshold=None, sample_rate=1.) as profiler:
+            with self.conn.cursor() as cursor:
+                execute(cursor, 'INSERT INTO profiled_table VALUES (%s);', (1,))
+
+        result = fetch_one_result(self.conn, 'SELECT count(*) FROM profiled_table')
+
+        self.assertEqual((1,), result)
+        self.assertEqual(1, len(profiler.profiles))
+
+    def tearDown(self):
+        self.conn.rollback()
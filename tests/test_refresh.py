@@ -0,0 +1,67 @@
+import unittest
+
+from postpy.admin import get_materialized_views, get_view_dependencies
+from postpy.fixtures import PostgreSQLFixture
+from postpy.refresh import refresh_materialized_views
+
+
+class TestRefreshMaterializedViews(PostgreSQLFixture, unittest.TestCase):
+
+    @classmethod
+    def _prep(cls):
+        statements = [
+            'CREATE SCHEMA refresh_test;',
+            'CREATE TABLE refresh_test.base AS'
+            ' SELECT generate_series(1, 10) AS id;',
+            'CREATE MATERIALIZED VIEW refresh_test.mv_one AS'
+            ' SELECT id FROM refresh_test.base;',
+            'CREATE UNIQUE INDEX mv_one_id ON refresh_test.mv_one (id);',
+            'CREATE VIEW refresh_test.plain AS SELECT id FROM refresh_test.mv_one;',
+            'CREATE MATERIALIZED VIEW refresh_test.mv_two AS'
+            ' SELECT count(*) FROM refresh_test.plain;',
+            'CREATE MATERIALIZED VIEW refresh_test.mv_three AS'
+            ' SELECT 1 AS one WITH NO DATA;'
+        ]
+        with cls.conn.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+        cls.conn.commit()
+
+    def test_get_materialized_views(self):
+        result = {record['name']: (record['populated'], record['has_unique_index'])
+                  for record in get_materialized_views(self.conn, 'refresh_test')}
+
+        expected = {'refresh_test.mv_one': (True, True),
+                    'refresh_test.mv_two': (True, False),
+                    'refresh_test.mv_three': (False, False)}
+
+        self.assertEqual(expected, result)
+
+    def test_get_view_dependencies(self):
+        result = get_view_dependencies(self.conn)
+
+        self.assertEqual({'refresh_test.mv_one'}, result['refresh_test.mv_two'])
+        self.assertEqual(set(), result['refresh_test.mv_one'])
+
+    def test_refresh(self):
+        with self.conn.cursor() as cursor:
+            cursor.execute('INSERT INTO refresh_test.base VALUES (11);')
+        self.conn.commit()
+
+        result = refresh_materialized_views(schema='refresh_test', workers=2)
+
+        with self.conn.cursor() as cursor:
+            cursor.execute('SELECT * FROM refresh_test.mv_two;')
+            count = cursor.fetchone()
+
+        self.assertEqual({'refresh_test.mv_one', 'refresh_test.mv_two',
+                          'refresh_test.mv_three'},
+                         {job.name for job in result})
+        self.assertEqual((11,), count)
+
+    @classmethod
+    def _clean(cls):
+        cls.conn.rollback()
+        with cls.conn.cursor() as cursor:
+            cursor.execute('DROP SCHEMA refresh_test CASCADE;')
+        cls.conn.commit()
@@ -48,6 +48,34 @@ class TestExecute(PostgreSQLFixture, unittest.TestCase):
 
         self.conn.commit()
 
+    def test_execute_transactions_reports_failures(self):
+        statements = ['SELECT 1', 'insert nothing into nothing']
+
+        result = sql.execute_transactions(self.conn, statements)
+
+        self.assertEqual([1], [failure.index for failure in result])
+        self.assertEqual('42601', result[0].pgcode)
+
+    def test_execute_batched_transactions(self):
+        statements = ['CREATE TABLE batched_one();',
+                      'insert nothing into nothing',
+                      'CREATE TABLE batched_two()',
+                      'CREATE TABLE batched_one();']
+
+        result = sql.execute_batched_transactions(self.conn, statements,
+                                                  batch_size=3)
+
+        self.assertEqual([1, 3], [failure.index for failure in result])
+        self.assertEqual(statements[3], result[1].statement)
+
+        with self.conn.cursor() as cursor:
+            cursor.execute(TABLE_QUERY)
+            tables = {row[0] for row in cursor.fetchall()}
+            cursor.execute('DROP TABLE batched_one; DROP TABLE batched_two;')
+        self.conn.commit()
+
+        self.assertTrue({'batched_one', 'batched_two'} <= tables)
+
     def test_doesnt_raise_exception(self):
         query = ["insert nothing into nothing"]
         try:
@@ -0,0 +1,109 @@
+import io
+import unittest
+
+from postpy.base import Column, PrimaryKey, Table
+from postpy.dml import CopyFromDelete, CopyFromUpsert
+from postpy.fixtures import PostgreSQLFixture
+from postpy.summary import (Aggregate, SummaryTable, apply_deltas,
+                            create_summary, drop_summary)
+
+
+def make_summary():
+    columns = [Column('id', 'INTEGER'),
+               Column('region', 'VARCHAR(10)'),
+               Column('amount', 'INTEGER', nullable=True)]
+    table = Table('summary_sales', columns, PrimaryKey(['id']))
+    aggregates = [Aggregate('total', 'sum', 'amount'),
+                  Aggregate('sales', 'count'),
+                  Aggregate('amounts', 'count', 'amount'),
+                  Aggregate('smallest', 'min', 'amount'),
+                  Aggregate('largest', 'max', 'amount')]
+
+    return SummaryTable('sales_by_region', table, ['region'], aggregates)
+
+
+class TestAggregate(unittest.TestCase):
+
+    def test_unsupported_function(self):
+        with self.assertRaises(ValueError):
+            Aggregate('average', 'avg', 'amount')
+
+    def test_missing_column(self):
+        with self.assertRaises(ValueError):
+            Aggregate('total', 'sum')
+
+    def test_delta_expression(self):
+        expected = 'min(amount) FILTER (WHERE _sign > 0) AS smallest'
+        result = Aggregate('smallest', 'MIN', 'amount').delta_expression
+
+        self.assertEqual(expected, result)
+
+
+class TestSummaryTable(PostgreSQLFixture, unittest.TestCase):
+
+    def setUp(self):
+        self.summary = make_summary()
+        self.table = self.summary.base_table
+
+        with self.conn.cursor() as cursor:
+            cursor.execute(self.table.create_statement())
+            cursor.execute("INSERT INTO summary_sales VALUES"
+                           " (1, 'east', 10), (2, 'east', 5), (3, 'west', 7),"
+                           " (4, 'north', 1);")
+        self.conn.commit()
+        create_summary(self.conn, self.summary)
+
+    def test_create(self):
+        self.assertEqual(self._expected(), self._summary())
+
+    def test_apply_deltas(self):
+        with self.conn.cursor() as cursor:
+            cursor.execute("INSERT INTO summary_sales VALUES"
+                           " (5, 'east', 20), (6, 'south', NULL);")
+            cursor.execute("UPDATE summary_sales SET amount = 8 WHERE id = 2;")
+            cursor.execute("DELETE FROM summary_sales WHERE id IN (3, 4);")
+            cursor.execute("INSERT INTO summary_sales VALUES (7, 'west', 9);")
+        self.conn.commit()
+
+        changed = apply_deltas(self.conn, self.summary)
+
+        self.assertEqual(4, changed)
+        self.assertEqual(self._expected(), self._summary())
+        self.assertEqual(0, apply_deltas(self.conn, self.summary))
+
+    def test_copy_deltas(self):
+        upsert_text = 'id,region,amount\n1,east,3\n8,south,4\n'
+        delete_text = 'id,region,amount\n3,west,7\n'
+
+        CopyFromUpsert(self.table)(self.conn, io.StringIO(upsert_text))
+        CopyFromDelete(self.table)(self.conn, io.StringIO(delete_text))
+        self.conn.commit()
+
+        apply_deltas(self.conn, self.summary)
+
+        self.assertEqual(self._expected(), self._summary())
+
+    def _summary(self):
+        query = ('SELECT region, coalesce(total, 0), sales, amounts, smallest,'
+                 ' largest FROM sales_by_region ORDER BY region')
+
+        return self._fetch_all(query)
+
+    def _expected(self):
+        query = ('SELECT region, coalesce(sum(amount), 0), count(*),'
+                 ' count(amount), min(amount), max(amount)'
+                 ' FROM summary_sales GROUP BY region ORDER BY region')
+
+        return self._fetch_all(query)
+
+    def _fetch_all(self, query):
+        with self.conn.cursor() as cursor:
+            cursor.execute(query)
+            return cursor.fetchall()
+
+    def tearDown(self):
+        self.conn.rollback()
+        drop_summary(self.conn, self.summary)
+        with self.conn.cursor() as cursor:
+            cursor.execute(self.table.drop_statement())
+        self.conn.commit()
@@ -0,0 +1,158 @@
+import io
+import unittest
+
+from postpy.base import Column, PrimaryKey, Table
+from postpy.fixtures import PostgreSQLFixture
+from postpy.sync import SyncResult, TableHasher, sync_table
+
+
+def make_table():
+    columns = [Column('id', 'INTEGER', False),
+               Column('name', 'TEXT', True),
+               Column('price', 'NUMERIC(10, 2)', True),
+               Column('active', 'BOOLEAN', True),
+               Column('listed', 'DATE', True),
+               Column('weight', 'DOUBLE PRECISION', True)]
+
+    return Table('sync_table', columns, PrimaryKey(['id']))
+
+
+SNAPSHOT = """\
+id,name,price,active,listed,weight
+1,"one, first",5.5,t,2017-01-01,1.0
+2,two,,false,2017-01-02,
+3,three,3,t,2017-01-03,0.25
+5,five,5.00,f,,1e16
+"""
+
+
+class TestSyncTable(PostgreSQLFixture, unittest.TestCase):
+
+    def setUp(self):
+        self.table = make_table()
+
+        with self.conn.cursor() as cursor:
+            cursor.execute(self.table.create_statement())
+            cursor.execute(
+                "INSERT INTO sync_table VALUES"
+                " (1, 'one, first', 5.50, true, '2017-01-01', 1),"
+                " (2, 'two', NULL, false, '2017-01-02', NULL),"
+                " (3, 'three', 4, true, '2017-01-03', 0.25),"
+                " (4, 'four', 4, true, '2017-01-04', 4);")
+        self.conn.commit()
+
+    def test_row_hashes_match(self):
+        hasher = TableHasher(self.table)
+        query = 'SELECT {}, {} FROM sync_table WHERE id < 3 ORDER BY id'.format(
+            hasher.key_text_expression, hasher.row_hash_expression)
+
+        with self.conn.cursor() as cursor:
+            cursor.execute(query)
+            server = cursor.fetchall()
+
+        client = [hasher.hash_fields(fields)
+                  for fields in [['1', 'one, first', '5.5', 't', '2017-01-01', '1.0'],
+                                 ['2', 'two', '', 'false', '2017-01-02', '']]]
+
+        self.assertEqual(server, [(key, row_hash) for key, _, row_hash in client])
+
+    def test_sync(self):
+        result = sync_table(self.conn, self.table, io.StringIO(SNAPSHOT), buckets=2)
+
+        self.assertEqual(1, result.new)
+        self.assertEqual(1, result.changed)
+        self.assertEqual(1, result.deleted)
+        self.assertEqual(
+            [(1, 'one, first'), (2, 'two'), (3, 'three'), (5, 'five')],
+            self._rows())
+
+        result = sync_table(self.conn, self.table, io.StringIO(SNAPSHOT), buckets=2)
+
+        self.assertEqual(SyncResult(0, 0, 0, 0), result)
+
+    def _rows(self):
+        with self.conn.cursor() as cursor:
+            cursor.execute('SELECT id, name FROM sync_table ORDER BY id')
+            return cursor.fetchall()
+
+    def tearDown(self):
+        self.conn.rollback()
+        with self.conn.cursor() as cursor:
+            cursor.execute(self.table.drop_statement())
+        self.conn.commit()
+
+
+class TestSyncTextKeys(PostgreSQLFixture, unittest.TestCase):
+
+    def setUp(self):
+        self.table = Table('sync_names', [Column('name', 'TEXT', False),
+                                          Column('score', 'INTEGER', True)],
+                           PrimaryKey(['name']))
+
+        with self.conn.cursor() as cursor:
+            cursor.execute(self.table.create_statement())
+            cursor.execute(
+                "INSERT INTO sync_names VALUES ('plain', 1), ('O\"Brien', 2),"
+                " ('back\\', 3), ('\"quoted\\\"', 4);")
+        self.conn.commit()
+
+    def test_delete_quoted_keys(self):
+        result = sync_table(self.conn, self.table,
+                            io.StringIO('name,score\nplain,1\n'), buckets=1)
+
+        self.assertEqual(3, result.deleted)
+
+        with self.conn.cursor() as cursor:
+            cursor.execute('SELECT name FROM sync_names')
+            self.assertEqual([('plain',)], cursor.fetchall())
+
+    def tearDown(self):
+        self.conn.rollback()
+        with self.conn.cursor() as cursor:
+            cursor.execute(self.table.drop_statement())
+        self.conn.commit()
+
+
+class TestSyncTimestamps(PostgreSQLFixture, unittest.TestCase):
+
+    def setUp(self):
+        self.table = Table('sync_events',
+                           [Column('happened', 'TIMESTAMP WITH TIME ZONE', False),
+                            Column('recorded', 'TIMESTAMP', True),
+                            Column('note', 'TEXT', True)],
+                           PrimaryKey(['happened']))
+        self.snapshot = ('happened,recorded,note\n'
+                         '2020-01-01 00:00:00+00,2020-01-01 00:00:00.5,a\n'
+                         '2020-01-01 06:30:00.25+05:30,2020-01-02 03:04:05,b\n'
+                         '2020-01-02 00:00:00,2020-01-02 03:04:05.123456,c\n')
+
+        with self.conn.cursor() as cursor:
+            cursor.execute("SET TIME ZONE 'America/Chicago';")
+            cursor.execute(self.table.create_statement())
+        self.conn.commit()
+
+    def test_unchanged_rows(self):
+        result = sync_table(self.conn, self.table, io.StringIO(self.snapshot),
+                            buckets=2)
+
+        self.assertEqual(3, result.new)
+
+        result = sync_table(self.conn, self.table, io.StringIO(self.snapshot),
+                            buckets=2)
+
+        self.assertEqual(SyncResult(0, 0, 0, 0), result)
+
+    def test_deleted_key(self):
+        sync_table(self.conn, self.table, io.StringIO(self.snapshot))
+        snapshot = self.snapshot.rsplit('\n', 2)[0] + '\n'
+
+        result = sync_table(self.conn, self.table, io.StringIO(snapshot))
+
+        self.assertEqual((0, 0, 1), result[:3])
+
+    def tearDown(self):
+        self.conn.rollback()
+        with self.conn.cursor() as cursor:
+            cursor.execute(self.table.drop_statement())
+            cursor.execute('RESET TIME ZONE;')
+        self.conn.commit()
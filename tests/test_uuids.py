@@ -1,6 +1,11 @@
+import io
 import unittest
+import uuid
 
 from postpy import uuids
+from postpy.base import Column, PrimaryKey, Table
+from postpy.dml import CopyFrom
+from postpy.fixtures import PostgreSQLFixture
 
 
 class TestUUIDFunctions(unittest.TestCase):
@@ -16,3 +21,69 @@ class TestUUIDFunctions(unittest.TestCase):
         result = uuids.uuid_sequence_function('my_schema')
 
         self.assertEqual(expected, result)
+
+
+class TestUUID7(unittest.TestCase):
+
+    def test_layout(self):
+        generator = uuids.UUID7Generator(clock=lambda: 1.5)
+        result = generator()
+
+        self.assertEqual(7, result.version)
+        self.assertEqual(uuid.RFC_4122, result.variant)
+        self.assertEqual(1500, result.int >> 80)
+
+    def test_monotonic(self):
+        generator = uuids.UUID7Generator(clock=lambda: 1.)
+        result = generator.batch(10000)
+
+        self.assertEqual(sorted(result), result)
+        self.assertEqual(len(result), len(set(result)))
+        self.assertGreater(result[-1].int >> 80, 1000)
+
+    def test_fill_buffer(self):
+        buffer = bytearray(16 * 4)
+        count = uuids.UUID7Generator().fill(memoryview(buffer)[16:], count=2)
+
+        self.assertEqual(2, count)
+        self.assertEqual(bytes(16), bytes(buffer[:16]))
+        self.assertEqual(7, uuid.UUID(bytes=bytes(buffer[16:32])).version)
+        self.assertEqual(bytes(16), bytes(buffer[48:]))
+
+    def test_keyed_records(self):
+        result = list(uuids.keyed_records([('a',), ('b',)], batch_size=1))
+
+        self.assertEqual(['a', 'b'], [record[1] for record in result])
+        self.assertLess(result[0][0], result[1][0])
+
+    def test_keyed_csv(self):
+        text = 'name,note\na,"multi\nline"\nb,\n'
+
+        lines = uuids.keyed_csv(io.StringIO(text)).read().splitlines()
+
+        self.assertEqual('id,name,note', lines[0])
+        self.assertEqual(',a,"multi', lines[1][36:])
+        self.assertEqual(7, uuid.UUID(lines[3][:36]).version)
+
+
+class TestUUID7Copy(PostgreSQLFixture, unittest.TestCase):
+
+    def test_copy(self):
+        table = Table('uuid7_table', [Column('id', 'UUID'),
+                                      Column('name', 'TEXT')],
+                      PrimaryKey(['id']))
+        text = 'name\na\nb\nc\n'
+
+        with self.conn.cursor() as cursor:
+            cursor.execute(table.create_statement())
+
+        CopyFrom(table)(self.conn, uuids.keyed_csv(io.StringIO(text)))
+
+        with self.conn.cursor() as cursor:
+            cursor.execute('SELECT name FROM uuid7_table ORDER BY id')
+            result = cursor.fetchall()
+
+        self.assertEqual([('a',), ('b',), ('c',)], result)
+
+    def tearDown(self):
+        self.conn.rollback()